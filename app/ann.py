@@ -0,0 +1,237 @@
+"""FAISS index factory and speed / recall benchmark.
+
+The build script (``scripts/build_index.py``) can lay the corpus out as an
+exact flat index or as one of FAISS' approximate structures:
+
+* ``flat``  – ``IndexFlatIP``; exact, cost grows linearly with the corpus.
+* ``ivf``   – ``IndexIVFFlat``; probes ``nprobe`` of ``nlist`` clusters.
+* ``ivfpq`` – ``IndexIVFPQ``; IVF with product-quantised codes (much smaller).
+* ``hnsw``  – ``IndexHNSWFlat``; graph search tuned by ``M`` / ``efSearch``.
+
+Vectors of ``flat`` / ``ivf`` / ``hnsw`` can be stored as ``fp16`` or
+``int8`` scalar-quantised codes instead of ``fp32`` (2× / 4× smaller), and
+any index can first reduce dimensionality – ``pca`` (trained ``PCAMatrix``)
+or ``truncate`` (keep the first dims, for Matryoshka-trained embedders) –
+followed by re-normalisation.  Reductions are stored in the index as an
+``IndexPreTransform``, so queries are projected by FAISS itself.
+
+All indexes use inner product on L2-normalised vectors (= cosine).  Built
+with explicit ``ids`` they are ID-mapped (flat / HNSW via ``IndexIDMap2``,
+IVF natively), so :func:`apply_delta` can update them in place.
+:func:`benchmark` compares any of them against the flat baseline so a
+deployment can pick its point on the speed / recall curve.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES   = ("flat", "ivf", "ivfpq", "hnsw")
+STORAGE_TYPES = ("fp32", "fp16", "int8")
+REDUCE_TYPES  = ("pca", "truncate")
+
+ADD_CHUNK = 65536               # rows copied into the index per add() call
+MAX_POINTS_PER_CENTROID = 256   # FAISS' own k-means subsampling default
+TRAIN_POINTS = 65536            # sample for scalar-quantiser ranges / PCA
+
+_SQ_TYPES = {"fp16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Rule-of-thumb cluster count (≈4·√n) that still leaves ≥39 points per centroid."""
+    nlist = int(4 * math.sqrt(max(n_vectors, 1)))
+    return max(1, min(nlist, n_vectors // 39 or 1))
+
+
+def _training_sample(vecs: np.ndarray, cap: int) -> np.ndarray:
+    """At most *cap* rows; k-means would subsample the rest anyway."""
+    if len(vecs) <= cap:
+        return np.ascontiguousarray(vecs, dtype="float32")
+    rows = np.sort(np.random.default_rng(0).choice(len(vecs), size=cap, replace=False))
+    return np.ascontiguousarray(vecs[rows], dtype="float32")
+
+
+def build_index(
+    vecs: np.ndarray,
+    kind: str = "flat",
+    nlist: Optional[int] = None,
+    nprobe: int = 8,
+    pq_m: int = 16,
+    pq_bits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    ef_search: int = 64,
+    ids: Optional[np.ndarray] = None,
+    storage: str = "fp32",
+    reduce: Optional[str] = None,
+    reduce_dim: Optional[int] = None,
+) -> faiss.Index:
+    """Create, train and fill an index of type *kind* with *vecs*.
+
+    With *ids* the vectors are stored under those labels instead of their
+    row numbers.  *storage* picks the code size of stored vectors and
+    *reduce* / *reduce_dim* an optional dimension reduction (see module
+    docstring); the returned index still takes full-size queries.
+    """
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {kind!r}; choose from {', '.join(INDEX_TYPES)}")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown storage {storage!r}; choose from {', '.join(STORAGE_TYPES)}")
+    if kind == "ivfpq" and storage != "fp32":
+        raise ValueError("ivfpq already stores compressed PQ codes; use storage='fp32'")
+    n, dim = vecs.shape
+    if reduce is not None:
+        if reduce not in REDUCE_TYPES:
+            raise ValueError(f"Unknown reduction {reduce!r}; choose from {', '.join(REDUCE_TYPES)}")
+        if not reduce_dim or not 0 < reduce_dim < dim:
+            raise ValueError(f"reduce_dim must be between 1 and {dim - 1}, got {reduce_dim}")
+    d  = reduce_dim if reduce is not None and reduce_dim else dim
+    ip = faiss.METRIC_INNER_PRODUCT
+    sq = _SQ_TYPES.get(storage)
+    lists = nlist or default_nlist(n)
+
+    if kind == "flat":
+        index = faiss.IndexScalarQuantizer(d, sq, ip) if sq is not None else faiss.IndexFlatIP(d)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWSQ(d, sq, hnsw_m, ip) if sq is not None else faiss.IndexHNSWFlat(d, hnsw_m, ip)
+        index.hnsw.efConstruction = ef_construction
+    else:
+        quantizer = faiss.IndexFlatIP(d)
+        if kind == "ivf":
+            if sq is not None:
+                index = faiss.IndexIVFScalarQuantizer(quantizer, d, lists, sq, ip)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, d, lists, ip)
+        else:
+            if d % pq_m:
+                raise ValueError(f"pq_m={pq_m} must divide the vector dimension {d}")
+            index = faiss.IndexIVFPQ(quantizer, d, lists, pq_m, pq_bits, ip)
+
+    if reduce is not None:
+        # project, then re-normalise so inner product stays cosine
+        project = faiss.PCAMatrix(dim, d) if reduce == "pca" else faiss.RemapDimensionsTransform(dim, d, False)
+        index = faiss.IndexPreTransform(faiss.NormalizationTransform(d, 2.0), index)
+        index.prepend_transform(project)
+    if not index.is_trained:
+        cap = lists * MAX_POINTS_PER_CENTROID if kind in ("ivf", "ivfpq") else TRAIN_POINTS
+        index.train(_training_sample(vecs, cap))
+
+    if ids is not None:
+        if kind in ("flat", "hnsw"):
+            index = faiss.IndexIDMap2(index)
+        ids = np.asarray(ids, dtype="int64")
+    # Add in chunks so a memory-mapped *vecs* is never copied whole
+    for start in range(0, n, ADD_CHUNK):
+        chunk = np.ascontiguousarray(vecs[start:start + ADD_CHUNK], dtype="float32")
+        if ids is None:
+            index.add(chunk)
+        else:
+            index.add_with_ids(chunk, np.ascontiguousarray(ids[start:start + ADD_CHUNK]))
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    return index
+
+
+def set_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """Apply query-time knobs; silently skips those the index type lacks."""
+    ps = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        if not value:
+            continue
+        try:
+            ps.set_index_parameter(index, name, int(value))
+        except RuntimeError:
+            pass  # e.g. nprobe on a flat / HNSW index
+
+
+def apply_delta(
+    index: faiss.Index,
+    vecs: np.ndarray,
+    ids: np.ndarray,
+    remove: np.ndarray,
+    storage: str = "fp32",
+    reduce: Optional[str] = None,
+    reduce_dim: Optional[int] = None,
+) -> faiss.Index:
+    """Drop the labels in *remove* and add *vecs* under *ids*.
+
+    Flat and IVF indexes are updated in place (IVF keeps its trained
+    centroids).  HNSW graphs cannot delete nodes, so an HNSW index is
+    rebuilt from the vectors it already stores – nothing is re-embedded;
+    *storage* / *reduce* / *reduce_dim* must then match the original build.
+    Returns the updated index.
+    """
+    vecs = np.ascontiguousarray(vecs, dtype="float32").reshape(-1, index.d)
+    ids = np.ascontiguousarray(ids, dtype="int64")
+    remove = np.ascontiguousarray(remove, dtype="int64")
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    graph = faiss.downcast_index(inner.index) if isinstance(inner, faiss.IndexPreTransform) else inner
+    if isinstance(graph, faiss.IndexHNSW) and len(remove):
+        old_ids = faiss.vector_to_array(index.id_map)
+        old_vecs = inner.reconstruct_n(0, inner.ntotal)   # undoes any reduction (approximately)
+        keep = ~np.isin(old_ids, remove)
+        return build_index(
+            np.vstack([old_vecs[keep], vecs]),
+            kind="hnsw",
+            hnsw_m=graph.hnsw.nb_neighbors(1),
+            ef_construction=graph.hnsw.efConstruction,
+            ef_search=graph.hnsw.efSearch,
+            ids=np.concatenate([old_ids[keep], ids]),
+            storage=storage,
+            reduce=reduce,
+            reduce_dim=reduce_dim,
+        )
+
+    if len(remove):
+        index.remove_ids(remove)
+    if len(ids):
+        index.add_with_ids(vecs, ids)
+    return index
+
+
+def index_nbytes(index: faiss.Index) -> int:
+    """Serialised size of *index* – a good proxy for its resident memory."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def benchmark(index: faiss.Index, reference: faiss.Index, queries: np.ndarray, k: int = 10) -> Dict[str, float]:
+    """Recall@k of *index* against *reference* plus single-query latency.
+
+    Queries are issued one at a time, which is how the API searches.
+    """
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    _, truth = reference.search(queries, k)
+
+    latencies, found = [], []
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, ids = index.search(queries[i:i + 1], k)
+        latencies.append(time.perf_counter() - t0)
+        found.append(ids[0])
+
+    hits = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+    lat_ms = np.asarray(latencies) * 1000
+    return {
+        "recall": hits / float(truth.size),
+        "mean_ms": float(lat_ms.mean()),
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "bytes": float(index_nbytes(index)),
+    }
+
+
+def format_report(rows: Dict[str, Dict[str, float]], k: int) -> str:
+    """Render benchmark rows (name → metrics) as a fixed-width table."""
+    header = f"{'index':<28}{'recall@' + str(k):>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'size MB':>10}"
+    lines = [header, "-" * len(header)]
+    for name, m in rows.items():
+        lines.append(
+            f"{name:<28}{m['recall']:>10.3f}{m['mean_ms']:>10.3f}{m['p50_ms']:>10.3f}"
+            f"{m['p95_ms']:>10.3f}{m['bytes'] / 1e6:>10.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,125 @@
+"""Versioned artefact directories and change detection.
+
+``scripts/build_index.py`` writes each build into its own directory and
+then flips a one-line ``CURRENT`` pointer::
+
+    artifacts/
+      CURRENT                 # e.g. "v7"
+      versions/v6/...         # previous build, kept for rollback
+      versions/v7/faiss.idx, passages.bin, passages.off.npy, index.json, manifest.json (+ .hashes.npy)
+
+Readers resolve ``CURRENT`` once and keep using that directory, so a build
+never changes files under a running server.  Without ``CURRENT`` the flat
+legacy layout (files directly in ``artifacts/``) is used and its version is
+the mtime + size of ``faiss.idx``.
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import shutil
+import threading
+from typing import Callable, Optional, Tuple, Union
+
+from .logger import logger
+
+CURRENT_NAME = "CURRENT"
+VERSIONS_DIR = "versions"
+INDEX_NAME   = "faiss.idx"
+
+PathLike = Union[str, os.PathLike]
+
+
+def version_dir(art_dir: PathLike, version: str) -> pathlib.Path:
+    return pathlib.Path(art_dir) / VERSIONS_DIR / version
+
+
+def current(art_dir: PathLike) -> Tuple[str, pathlib.Path]:
+    """``(version, directory)`` of the artefacts a reader should load now."""
+    art_dir = pathlib.Path(art_dir)
+    pointer = art_dir / CURRENT_NAME
+    if pointer.exists():
+        version = pointer.read_text(encoding="utf-8").strip()
+        return version, version_dir(art_dir, version)
+    st = (art_dir / INDEX_NAME).stat()
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}", art_dir
+
+
+def _number(name: str) -> int:
+    return int(name[1:]) if name.startswith("v") and name[1:].isdigit() else -1
+
+
+def next_version(art_dir: PathLike) -> str:
+    """``v<N+1>`` for the highest ``v<N>`` under ``versions/``."""
+    root = pathlib.Path(art_dir) / VERSIONS_DIR
+    numbers = [_number(d.name) for d in root.iterdir()] if root.exists() else []
+    return f"v{max(numbers, default=0) + 1}"
+
+
+def publish(art_dir: PathLike, version: str) -> None:
+    """Atomically point ``CURRENT`` at an already complete version directory."""
+    art_dir = pathlib.Path(art_dir)
+    if not (version_dir(art_dir, version) / INDEX_NAME).exists():
+        raise FileNotFoundError(f"{version_dir(art_dir, version)} has no {INDEX_NAME}")
+    tmp = art_dir / (CURRENT_NAME + ".tmp")
+    tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp, art_dir / CURRENT_NAME)
+
+
+def prune(art_dir: PathLike, keep: int) -> list:
+    """Delete all but the newest *keep* versions (never the current one)."""
+    root = pathlib.Path(art_dir) / VERSIONS_DIR
+    if not root.exists() or keep < 1:
+        return []
+    active, _ = current(art_dir)
+    names = sorted((d.name for d in root.iterdir() if d.is_dir()), key=_number, reverse=True)
+    removed = [name for name in names[keep:] if name != active]
+    for name in removed:
+        shutil.rmtree(root / name, ignore_errors=True)
+    return removed
+
+
+class VersionWatcher:
+    """Poll ``current(art_dir)`` and call *on_change* when the version moves.
+
+    Polling a single small file is cheap and needs no extra dependency;
+    ``interval_s`` bounds how long a new build takes to go live.
+    """
+
+    def __init__(self, art_dir: PathLike, interval_s: float, on_change: Callable[[], object]):
+        self.art_dir = pathlib.Path(art_dir)
+        self.interval_s = interval_s
+        self.on_change = on_change
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seen: Optional[str] = None
+
+    def _version(self) -> Optional[str]:
+        try:
+            return current(self.art_dir)[0]
+        except OSError:          # mid-build or no index yet
+            return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            version = self._version()
+            if version is None or version == self._seen:
+                continue
+            try:
+                self.on_change()
+            except Exception as exc:
+                logger.error("index_watch_failed", version=version, error=f"{type(exc).__name__}: {exc}")
+            self._seen = version    # do not retry a broken build on every poll
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._seen = self._version()
+            self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1)
+            self._thread = None
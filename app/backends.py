@@ -0,0 +1,144 @@
+"""Pool of Ollama backends: least-outstanding-requests routing + circuit breaking.
+
+``OLLAMA_URLS`` lists several Ollama servers; :meth:`BackendPool.pick`
+routes each request to the available backend with the fewest requests in
+flight (ties rotate, so an idle pool is used round-robin).  A backend is
+taken out of rotation
+
+* passively – after ``failure_threshold`` consecutive failed requests its
+  circuit opens for ``cooldown_s``; afterwards it gets trial traffic again
+  (half-open) and the next success closes the circuit;
+* actively – when a probe of ``GET /api/tags`` fails; the next successful
+  probe (or request) brings it back and closes an open circuit.
+
+If every backend is out, requests still go to the least loaded one rather
+than failing outright.  Failing over between backends is left to the
+caller (``app/ollama_client.py``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+BACKEND_INFLIGHT = Gauge(
+    "ollama_backend_inflight",
+    "Requests currently outstanding per Ollama backend",
+    ["backend"],
+)
+BACKEND_UP = Gauge(
+    "ollama_backend_up",
+    "1 while a backend is routable (probe healthy and circuit not open)",
+    ["backend"],
+)
+BACKEND_REQUESTS = Counter(
+    "ollama_backend_requests_total",
+    "Requests per Ollama backend by outcome",
+    ["backend", "result"],  # ok | error
+)
+CIRCUIT_OPENED = Counter(
+    "ollama_backend_circuit_opened_total",
+    "Times a backend's circuit breaker opened",
+    ["backend"],
+)
+
+
+class Backend:
+    """One Ollama server and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.inflight = 0
+        self.failures = 0            # consecutive failed requests
+        self.open_until = 0.0        # monotonic time the circuit stays open until
+        self.healthy = True          # result of the last probe
+
+    def available(self, now: float) -> bool:
+        return self.healthy and self.open_until <= now
+
+    def __repr__(self) -> str:
+        return f"Backend({self.url!r}, inflight={self.inflight}, failures={self.failures})"
+
+
+class BackendPool:
+    """Least-outstanding-requests balancer with passive + active health checks."""
+
+    def __init__(self, urls: Iterable[str], failure_threshold: int = 3, cooldown_s: float = 15.0):
+        self.backends: List[Backend] = [Backend(u) for u in urls]
+        if not self.backends:
+            raise ValueError("BackendPool needs at least one backend URL")
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self._turn = 0
+        for b in self.backends:
+            self._export(b)
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def _export(self, b: Backend) -> None:
+        BACKEND_UP.labels(b.url).set(1 if b.available(time.monotonic()) else 0)
+        BACKEND_INFLIGHT.labels(b.url).set(b.inflight)
+
+    def pick(self, exclude: Sequence[Backend] = ()) -> Optional[Backend]:
+        """Backend for the next request, skipping *exclude*; ``None`` when all are excluded."""
+        candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        routable = [b for b in candidates if b.available(now)] or candidates   # degrade, don't refuse
+        n = len(self.backends)
+        turn = self._turn
+        self._turn += 1
+        return min(routable, key=lambda b: (b.inflight, (self.backends.index(b) - turn) % n))
+
+    @contextmanager
+    def track(self, b: Backend) -> Iterator[Backend]:
+        """Count a request against *b* while it is outstanding."""
+        b.inflight += 1
+        BACKEND_INFLIGHT.labels(b.url).set(b.inflight)
+        try:
+            yield b
+        finally:
+            b.inflight -= 1
+            BACKEND_INFLIGHT.labels(b.url).set(b.inflight)
+
+    def success(self, b: Backend) -> None:
+        b.failures, b.open_until, b.healthy = 0, 0.0, True
+        BACKEND_REQUESTS.labels(b.url, "ok").inc()
+        self._export(b)
+
+    def failure(self, b: Backend) -> None:
+        b.failures += 1
+        BACKEND_REQUESTS.labels(b.url, "error").inc()
+        if b.failures >= self.failure_threshold:
+            # also re-opens a half-open circuit whose trial request failed
+            b.open_until = time.monotonic() + self.cooldown_s
+            CIRCUIT_OPENED.labels(b.url).inc()
+        self._export(b)
+
+    async def probe(self, client: httpx.AsyncClient, timeout: float = 2.0) -> None:
+        """One round of ``GET /api/tags`` against every backend, concurrently."""
+
+        async def _one(b: Backend) -> None:
+            try:
+                r = await client.get(f"{b.url}/api/tags", timeout=timeout)
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            b.healthy = ok
+            if ok and b.open_until:
+                b.failures, b.open_until = 0, 0.0
+            self._export(b)
+
+        await asyncio.gather(*(_one(b) for b in self.backends))
+
+    async def probe_forever(self, client: httpx.AsyncClient, interval_s: float, timeout: float = 2.0) -> None:
+        while True:
+            await self.probe(client, timeout)
+            await asyncio.sleep(interval_s)
@@ -0,0 +1,142 @@
+"""Dynamic micro-batching for the embedder and cross-encoder.
+
+Every ``_search`` call needs one tiny forward pass through ``EMBED`` and one
+through ``RERANK``.  A :class:`MicroBatcher` sits in front of a *batch
+function* and lets calls that arrive within ``max_wait_ms`` of each other
+share a single forward pass (up to ``max_batch_size`` items).  Each caller
+blocks on its own future and receives only its own result.
+
+The batcher is thread-based on purpose: ``_search`` is synchronous and runs
+on worker threads, so callers simply block until their batch has been
+processed by the background dispatcher thread.  A call made on a thread
+that runs an asyncio event loop bypasses the queue: blocking the loop means
+no other request can join the batch, so waiting would only add latency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from prometheus_client import Histogram
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_SIZE = Histogram(
+    "retrieval_batch_size",
+    "Number of requests grouped into one forward pass",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+def _on_event_loop() -> bool:
+    """True when called from a thread that is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class MicroBatcher(Generic[T, R]):
+    """Group concurrent single-item calls into one call of *fn*.
+
+    Parameters
+    ----------
+    fn : callable
+        Takes a list of items and returns a sequence of results of the same
+        length, in the same order.
+    max_batch_size : int
+        Upper bound on the number of items handed to *fn* at once.
+    max_wait_ms : float
+        How long the dispatcher waits for more items after the first one
+        arrives.  ``0`` only groups items that are already queued.
+    name : str
+        Label used for the ``retrieval_batch_size`` histogram.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "queue.SimpleQueue[Tuple[T, Future]]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    # ── public API ──────────────────────────────────────────────────────
+    def submit(self, item: T) -> R:
+        """Queue *item* and block until its result is available."""
+        if _on_event_loop():
+            return self._call([item])[0]
+        fut: Future = Future()
+        self._ensure_worker()
+        self._queue.put((item, fut))
+        return fut.result()
+
+    # ── internals ───────────────────────────────────────────────────────
+    def _ensure_worker(self) -> None:
+        # The pid check restarts the dispatcher in forked worker processes,
+        # where the parent's thread object is copied but not running.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._thread.start()
+
+    def _collect(self) -> List[Tuple[T, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _call(self, items: List[T]) -> Sequence[R]:
+        BATCH_SIZE.labels(self.name).observe(len(items))
+        results = self.fn(items)
+        if len(results) != len(items):
+            raise RuntimeError(
+                f"{self.name}: batch function returned {len(results)} results for {len(items)} items"
+            )
+        return results
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self._call(items)
+            except BaseException as exc:  # hand the failure to every caller
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+            for (_, fut), res in zip(batch, results):
+                fut.set_result(res)
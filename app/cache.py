@@ -0,0 +1,204 @@
+"""In-process caches for the retrieval path.
+
+Support traffic repeats a lot: the same refund / payout questions arrive with
+only case and whitespace differences.  :func:`normalize_query` folds those
+variants onto one key and :class:`LRUCache` keeps a bounded, optionally
+time-limited map from that key to previously computed results.
+
+Paraphrases defeat exact keys, so :class:`SemanticCache` keeps a small FAISS
+index of answered-question embeddings and matches new questions by cosine
+similarity instead.
+
+Every cache reports lookups to Prometheus as
+``cache_requests_total{cache="<name>", result="hit|miss"}`` and its current
+size as ``cache_entries{cache="<name>"}``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import faiss
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result",
+    ["cache", "result"],
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Number of entries currently held per cache",
+    ["cache"],
+)
+
+
+def normalize_query(question: str) -> str:
+    """Case-fold and collapse whitespace so trivial variants share a key."""
+    return " ".join(question.casefold().split())
+
+
+class LRUCache:
+    """Thread-safe LRU map with an optional per-entry TTL.
+
+    Parameters
+    ----------
+    name : str
+        Label used for the Prometheus metrics.
+    maxsize : int
+        Maximum number of entries; ``0`` disables the cache.
+    ttl_s : float, optional
+        Entries older than this many seconds count as misses.  ``None`` or
+        ``0`` keeps entries until they are evicted.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl_s: Optional[float] = None):
+        self.name = name
+        self.maxsize = max(0, maxsize)
+        self.ttl_s = ttl_s or None
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or ``None``; refreshes LRU position."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl_s is not None and time.monotonic() - entry[0] > self.ttl_s:
+                del self._data[key]
+                CACHE_ENTRIES.labels(self.name).set(len(self._data))
+                entry = None
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.labels(self.name, "miss").inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled or value is None:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            CACHE_ENTRIES.labels(self.name).set(len(self._data))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            CACHE_ENTRIES.labels(self.name).set(0)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+class SemanticCache:
+    """Similarity-matched cache backed by a tiny FAISS inner-product index.
+
+    Vectors must be L2-normalised so inner product equals cosine similarity.
+
+    Parameters
+    ----------
+    name : str
+        Label used for the Prometheus metrics.
+    threshold : float
+        Minimum cosine similarity for a hit; ``0`` disables the cache.
+    maxsize : int
+        Maximum number of entries; the oldest entry is evicted first.
+    ttl_s : float, optional
+        Entries older than this many seconds are dropped before each lookup.
+    """
+
+    def __init__(self, name: str, threshold: float = 0.0, maxsize: int = 512, ttl_s: Optional[float] = None):
+        self.name = name
+        self.threshold = threshold
+        self.maxsize = max(0, maxsize)
+        self.ttl_s = ttl_s or None
+        self.hits = 0
+        self.misses = 0
+        self._index: Optional[faiss.Index] = None   # created on first add (dim unknown until then)
+        self._entries: "OrderedDict[int, tuple[float, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.maxsize > 0
+
+    def _remove(self, entry_id: int) -> None:
+        del self._entries[entry_id]
+        self._index.remove_ids(np.asarray([entry_id], dtype="int64"))  # type: ignore[union-attr]
+
+    def _expire(self) -> None:
+        # entries are kept in insertion order, so the expired ones are at the front
+        if self.ttl_s is None:
+            return
+        cutoff = time.monotonic() - self.ttl_s
+        expired = False
+        while self._entries and next(iter(self._entries.values()))[0] < cutoff:
+            self._remove(next(iter(self._entries)))
+            expired = True
+        if expired:
+            CACHE_ENTRIES.labels(self.name).set(len(self._entries))
+
+    def lookup(self, vec: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, similarity)`` of the closest live entry above threshold."""
+        if not self.enabled:
+            return None
+        hit = None
+        with self._lock:
+            self._expire()
+            if self._index is not None and self._index.ntotal:
+                sims, ids = self._index.search(np.asarray(vec, dtype="float32").reshape(1, -1), 1)
+                sim, entry_id = float(sims[0][0]), int(ids[0][0])
+                entry = self._entries.get(entry_id)
+                if entry is not None and sim >= self.threshold:
+                    hit = (entry[1], sim)
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_REQUESTS.labels(self.name, "miss" if hit is None else "hit").inc()
+        return hit
+
+    def add(self, vec: np.ndarray, value: Any) -> None:
+        if not self.enabled or value is None:
+            return
+        vec = np.asarray(vec, dtype="float32").reshape(1, -1)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vec.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vec, np.asarray([entry_id], dtype="int64"))
+            self._entries[entry_id] = (time.monotonic(), value)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+            CACHE_ENTRIES.labels(self.name).set(len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = None   # a new embedder may change the dimension
+            self._entries.clear()
+            CACHE_ENTRIES.labels(self.name).set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
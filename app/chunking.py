@@ -0,0 +1,118 @@
+"""Token-bounded chunking of scraped articles.
+
+The scraper emits one record per ``<p>``, so index units range from one
+sentence to whole sections, and long ones get silently truncated by the
+embedder.  :func:`chunk_articles` regroups consecutive paragraphs of one
+URL into an article (paragraphs joined by a blank line) and cuts it into
+windows of at most ``max_tokens`` tokens of the embedder's tokenizer:
+
+* short paragraphs are merged until the budget is reached;
+* a window is ended at the last paragraph break – failing that, the last
+  sentence end – in its second half, so chunks rarely stop mid-sentence;
+* consecutive windows of one article share ``overlap`` tokens.
+
+Every :class:`Chunk` records its character span in the article text and
+which input paragraphs it covers.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Span = Tuple[int, int]
+SpanFn = Callable[[str], Sequence[Span]]
+
+PARAGRAPH_SEP = "\n\n"
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = (".", "?", "!", ":")
+
+
+def regex_spans(text: str) -> List[Span]:
+    """Character spans of words and punctuation – a tokenizer-free fallback."""
+    return [m.span() for m in _TOKEN.finditer(text)]
+
+
+def tokenizer_spans(tokenizer) -> SpanFn:
+    """Span function backed by a Hugging Face *fast* tokenizer's offset mapping."""
+
+    def spans(text: str) -> List[Span]:
+        enc = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        return [(s, e) for s, e in enc["offset_mapping"] if e > s]
+
+    return spans
+
+
+@dataclass
+class Chunk:
+    url: str
+    title: str
+    text: str
+    start: int            # character span of ``text`` in the article
+    end: int
+    paragraphs: range     # input paragraph numbers the chunk overlaps
+
+    def record(self) -> Dict:
+        return {"url": self.url, "title": self.title, "text": self.text, "start": self.start, "end": self.end}
+
+
+def _window_end(text: str, spans: Sequence[Span], start: int, end: int) -> int:
+    """Pull *end* back to a paragraph break, else a sentence end, in the window's second half."""
+    floor = start + (end - start) // 2
+    sentence = None
+    for i in range(end, floor, -1):
+        if PARAGRAPH_SEP in text[spans[i - 1][1]:spans[i][0]]:
+            return i
+        if sentence is None and text[spans[i - 1][0]:spans[i - 1][1]].endswith(_SENTENCE_END):
+            sentence = i
+    return sentence or end
+
+
+def split(text: str, spans: Sequence[Span], max_tokens: int, overlap: int = 0) -> List[Span]:
+    """Character spans of the windows over *text*, given its token *spans*."""
+    if max_tokens < 1 or overlap < 0 or (overlap and 2 * overlap >= max_tokens):
+        raise ValueError(f"need max_tokens >= 1 and 0 <= overlap < max_tokens / 2, got {max_tokens}, {overlap}")
+    n, start, out = len(spans), 0, []
+    while start < n:
+        end = min(start + max_tokens, n)
+        if end < n:
+            end = _window_end(text, spans, start, end)
+        out.append((spans[start][0], spans[end - 1][1]))
+        if end == n:
+            break
+        start = max(end - overlap, start + 1)
+    return out
+
+
+def _articles(records: Iterable[Dict]) -> Iterator[Tuple[str, str, List[str], int]]:
+    """``(url, title, paragraphs, number of the first one)`` per run of one URL."""
+    url: Optional[str] = None
+    title, first = "", 0
+    paras: List[str] = []
+    for n, rec in enumerate(records):
+        if paras and rec.get("url") != url:
+            yield url or "", title, paras, first
+            paras, first = [], n
+        if not paras:
+            url, title = rec.get("url"), rec.get("title") or ""
+        paras.append(rec["text"])
+    if paras:
+        yield url or "", title, paras, first
+
+
+def chunk_articles(records: Iterable[Dict], span_fn: SpanFn, max_tokens: int, overlap: int = 0) -> Iterator[Chunk]:
+    """Re-cut paragraph *records* (``url`` / ``title`` / ``text``) into token-bounded chunks."""
+    for url, title, paras, first in _articles(records):
+        text = PARAGRAPH_SEP.join(paras)
+        starts: List[int] = []
+        pos = 0
+        for p in paras:
+            starts.append(pos)
+            pos += len(p) + len(PARAGRAPH_SEP)
+        for s, e in split(text, span_fn(text), max_tokens, overlap):
+            lo = bisect.bisect_right(starts, s) - 1
+            hi = bisect.bisect_left(starts, e)
+            yield Chunk(url, title, text[s:e], s, e, range(first + lo, first + hi))
@@ -0,0 +1,388 @@
+"""Concurrent, incremental crawler for the Stripe Support site.
+
+``scripts/scrape_faq.py`` drives this module.  Compared with the original
+one-page-at-a-time Playwright loop:
+
+* **Concurrency** – ``concurrency`` asyncio workers share one frontier and
+  one pooled ``httpx.AsyncClient``; a :class:`HostRateLimiter` spaces the
+  requests to each host instead of a fixed sleep after every page.
+* **Conditional re-crawl** – every page's ``ETag`` / ``Last-Modified`` and
+  a hash of its body are kept in a small SQLite :class:`CrawlState`.  The
+  next crawl sends ``If-None-Match`` / ``If-Modified-Since``; a ``304`` or
+  an unchanged body reuses the stored links and paragraphs, so only
+  changed articles are downloaded and parsed.
+* **Optional rendering** – pages that need JavaScript can be rendered by
+  a :class:`BrowserPool` of Playwright contexts.  The conditional HTTP
+  request still runs first, so unchanged pages are never rendered.
+* **Resumable, flat-memory crawl** – the frontier (queued / in-flight /
+  done URLs) lives in the same SQLite file, and paragraphs are appended to
+  a :class:`JsonlSink` as each page finishes.  The sink's size is recorded
+  with every finished page, so an interrupted crawl truncates the output to
+  the last finished page and carries on from the stored frontier.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+from .logger import logger
+
+ROOT      = "https://support.stripe.com"
+SEED      = ROOT + "/topics"
+HEADERS   = {"User-Agent": "Mozilla/5.0"}
+MIN_WORDS = 20
+
+TOPIC_RX = re.compile(r"^/topics/[a-z0-9\-]+$")
+ART_RX   = re.compile(r"^/questions/[a-z0-9\-]+$")
+
+
+# ─── parsing ──────────────────────────────────────────────────────────────
+def parse_page(html: str, url: str, min_words: int = MIN_WORDS) -> Tuple[List[Dict], List[str]]:
+    """``(paragraph records, followable links)`` of one page.
+
+    Paragraphs (``<p>`` of at least *min_words* words) are harvested from
+    article pages only; links to topic / article pages on the same host
+    are returned absolute and without fragments.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    path = urlsplit(url).path
+    host = urlsplit(url).netloc
+
+    paragraphs: List[Dict] = []
+    if ART_RX.match(path):
+        h1 = soup.select_one("h1") or soup.select_one("h2")
+        title = h1.get_text(strip=True) if h1 else "Untitled"
+        for p_tag in soup.find_all("p"):
+            txt = p_tag.get_text(" ", strip=True)
+            if len(txt.split()) >= min_words:
+                paragraphs.append({"url": url, "title": title, "text": txt})
+
+    links: List[str] = []
+    for a in soup.find_all("a", href=True):
+        full = urljoin(url, a["href"].split("#")[0])
+        parts = urlsplit(full)
+        if parts.netloc == host and (TOPIC_RX.match(parts.path) or ART_RX.match(parts.path)):
+            links.append(f"{parts.scheme}://{parts.netloc}{parts.path}")
+    return paragraphs, list(dict.fromkeys(links))
+
+
+# ─── politeness ───────────────────────────────────────────────────────────
+class HostRateLimiter:
+    """At most *rate* request starts per second per host (evenly spaced)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# ─── incremental state ────────────────────────────────────────────────────
+class CrawlState:
+    """Per-URL validators, body hash, links and paragraphs, plus the crawl frontier, in SQLite."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                   url TEXT PRIMARY KEY,
+                   etag TEXT,
+                   last_modified TEXT,
+                   content_hash TEXT,
+                   links TEXT,
+                   paragraphs TEXT,
+                   fetched_at REAL
+               )"""
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, status INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS frontier_status ON frontier (status)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+        self.db.commit()
+
+    # ── frontier: 0 = queued, 1 = in flight, 2 = done ──
+    def resume(self) -> bool:
+        """Re-queue in-flight URLs of an interrupted crawl; ``True`` if work is left."""
+        self.db.execute("UPDATE frontier SET status = 0 WHERE status = 1")
+        self.db.commit()
+        return self.db.execute("SELECT 1 FROM frontier WHERE status = 0 LIMIT 1").fetchone() is not None
+
+    def restart(self, seed: str) -> None:
+        """Forget the previous frontier and queue *seed* (page validators are kept)."""
+        self.db.execute("DELETE FROM frontier")
+        self.db.execute("INSERT INTO frontier (url) VALUES (?)", (seed,))
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('output_bytes', 0)")
+        self.db.commit()
+
+    def claim(self) -> Optional[str]:
+        """Oldest queued URL, marked in flight, or ``None``."""
+        row = self.db.execute("SELECT url FROM frontier WHERE status = 0 ORDER BY rowid LIMIT 1").fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE frontier SET status = 1 WHERE url = ?", row)
+        return row[0]
+
+    def finish(self, url: str, links: List[str], output_bytes: int, max_pages: Optional[int] = None) -> None:
+        """Mark *url* done, queue its unseen *links* and record the output size, atomically."""
+        room = None
+        if max_pages is not None:
+            room = max_pages - self.db.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+        for link in links:
+            if room is not None and room <= 0:
+                break
+            added = self.db.execute("INSERT OR IGNORE INTO frontier (url) VALUES (?)", (link,)).rowcount
+            if room is not None:
+                room -= added
+        self.db.execute("UPDATE frontier SET status = 2 WHERE url = ?", (url,))
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('output_bytes', ?)", (output_bytes,))
+        self.db.commit()
+
+    def output_bytes(self) -> int:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'output_bytes'").fetchone()
+        return int(row[0]) if row else 0
+
+    # ── pages ──
+    def get(self, url: str) -> Optional[Dict]:
+        row = self.db.execute(
+            "SELECT etag, last_modified, content_hash, links, paragraphs FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, links, paragraphs = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "links": json.loads(links),
+            "paragraphs": json.loads(paragraphs),
+        }
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str,
+            links: List[str], paragraphs: List[Dict]) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, content_hash, json.dumps(links),
+             json.dumps(paragraphs, ensure_ascii=False), time.time()),
+        )
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class JsonlSink:
+    """Append-only JSONL output that can be rolled back to a recorded size."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "ab")
+
+    def size(self) -> int:
+        """Current size of the file on disk."""
+        self._f.flush()
+        return os.fstat(self._f.fileno()).st_size
+
+    def truncate(self, size: int) -> None:
+        """Roll back to *size* bytes; never grows the file (that would pad it with NULs)."""
+        if size > self.size():
+            raise ValueError(f"{self.path} is shorter than {size} bytes")
+        self._f.truncate(size)
+        self._f.seek(size)
+
+    def write(self, records: List[Dict]) -> int:
+        """Append *records*, flush, and return the new file size."""
+        for rec in records:
+            self._f.write((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._f.flush()
+        return self._f.tell()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+# ─── optional JS rendering ────────────────────────────────────────────────
+class BrowserPool:
+    """A fixed pool of Playwright browser contexts for JS-rendered pages."""
+
+    def __init__(self, size: int = 4, headers: Optional[Dict[str, str]] = None):
+        self.size = size
+        self.headers = headers or HEADERS
+        self._contexts: asyncio.Queue = asyncio.Queue()
+
+    async def __aenter__(self) -> "BrowserPool":
+        from playwright.async_api import async_playwright
+
+        self._pw = await async_playwright().start()
+        self._browser = await self._pw.chromium.launch(
+            headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"]
+        )
+        for _ in range(self.size):
+            await self._contexts.put(await self._browser.new_context(extra_http_headers=self.headers))
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._browser.close()
+        await self._pw.stop()
+
+    async def render(self, url: str) -> str:
+        ctx = await self._contexts.get()
+        try:
+            page = await ctx.new_page()
+            try:
+                await page.goto(url, timeout=90_000)
+                return await page.content()
+            finally:
+                await page.close()
+        finally:
+            self._contexts.put_nowait(ctx)
+
+
+# ─── crawler ──────────────────────────────────────────────────────────────
+class Crawler:
+    """Breadth-first crawl from *seed* with bounded concurrency.
+
+    Parameters
+    ----------
+    seed : str
+        Start URL; only same-host topic / article links are followed.
+    state : CrawlState
+        Validators, parse results and the frontier of earlier crawls.  An
+        unfinished frontier is resumed unless ``restart=True``.
+    sink : JsonlSink, optional
+        Receives each finished page's paragraphs (otherwise only counted).
+    concurrency : int
+        Pages in flight at once.
+    rate : float
+        Requests per second per host (``0`` = unlimited).
+    renderer : BrowserPool, optional
+        Render changed pages in a browser instead of parsing the raw HTML.
+    """
+
+    def __init__(self, seed: str, state: CrawlState, sink: Optional[JsonlSink] = None, concurrency: int = 8,
+                 rate: float = 4.0, min_words: int = MIN_WORDS, renderer: Optional[BrowserPool] = None,
+                 client: Optional[httpx.AsyncClient] = None, max_pages: Optional[int] = None,
+                 restart: bool = False):
+        self.seed = seed
+        self.state = state
+        self.sink = sink
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(rate)
+        self.min_words = min_words
+        self.renderer = renderer
+        self.client = client
+        self.max_pages = max_pages
+        self.restart = restart
+        self.resumed = False
+        self.stats = {"pages": 0, "parsed": 0, "not_modified": 0, "unchanged": 0, "errors": 0, "paragraphs": 0}
+        self._inflight = 0
+        self._wake = asyncio.Condition()   # binds to the running loop on first use; renewed per run()
+
+    async def _visit(self, url: str) -> Tuple[List[Dict], List[str]]:
+        """Fetch *url* (conditionally) and parse it if it changed."""
+        known = self.state.get(url)
+        headers = {}
+        if known and known["etag"]:
+            headers["If-None-Match"] = known["etag"]
+        if known and known["last_modified"]:
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        if self.client is None:
+            raise RuntimeError("Crawler has no HTTP client; call run()")
+        await self.limiter.wait(url)
+        resp = await self.client.get(url, headers=headers)
+        if resp.status_code == 304 and known:
+            self.stats["not_modified"] += 1
+            return known["paragraphs"], known["links"]
+        resp.raise_for_status()
+
+        body_hash = hashlib.sha256(resp.content).hexdigest()
+        if known and known["content_hash"] == body_hash:
+            self.stats["unchanged"] += 1
+            paragraphs, links = known["paragraphs"], known["links"]
+        else:
+            self.stats["parsed"] += 1
+            html = await self.renderer.render(url) if self.renderer else resp.text
+            paragraphs, links = parse_page(html, url, self.min_words)
+
+        self.state.put(url, resp.headers.get("etag"), resp.headers.get("last-modified"), body_hash, links, paragraphs)
+        return paragraphs, links
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._wake:
+                while (url := self.state.claim()) is None:
+                    if self._inflight == 0:
+                        self._wake.notify_all()
+                        return
+                    await self._wake.wait()
+                self._inflight += 1
+            try:
+                paragraphs, links = await self._visit(url)
+            except Exception as exc:
+                self.stats["errors"] += 1
+                logger.warning("crawl_failed", url=url, error=f"{type(exc).__name__}: {exc}")
+                paragraphs, links = [], []
+            size = self.sink.write(paragraphs) if self.sink else 0
+            self.state.finish(url, links, size, self.max_pages)
+            self.stats["pages"] += 1
+            self.stats["paragraphs"] += len(paragraphs)
+            async with self._wake:
+                self._inflight -= 1
+                self._wake.notify_all()
+
+    async def run(self) -> Dict[str, int]:
+        """Crawl until the frontier is empty; returns counters."""
+        self.resumed = not self.restart and self.state.resume()
+        if self.resumed and self.sink and self.sink.size() < self.state.output_bytes():
+            # output deleted / rotated / replaced since the interruption: its pages are gone
+            logger.warning("crawl_output_shorter_than_frontier", path=self.sink.path,
+                           size=self.sink.size(), expected=self.state.output_bytes())
+            self.resumed = False
+        if not self.resumed:
+            self.state.restart(self.seed)
+        if self.sink:
+            self.sink.truncate(self.state.output_bytes())   # drop half-written pages
+
+        own_client = self.client is None
+        client = self.client or httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=self.concurrency),
+        )
+        self.client = client
+        self._wake = asyncio.Condition()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if own_client:
+                await client.aclose()
+                self.client = None
+        return dict(self.stats)
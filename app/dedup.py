@@ -0,0 +1,116 @@
+"""Exact and near-duplicate paragraph detection (MinHash + LSH).
+
+The scraper keeps every ``<p>`` of 20+ words, so Stripe's boilerplate
+("If you have any questions, contact support …") appears hundreds of times.
+Duplicates inflate the index and crowd the rerank candidates with copies
+of one passage.  :class:`Deduper` makes a single streaming pass:
+
+* **exact** – paragraphs equal after case / whitespace / punctuation
+  folding map to the first occurrence;
+* **near**  – word-shingle MinHash signatures are banded into LSH buckets;
+  a candidate that shares a bucket with an earlier paragraph and whose
+  estimated Jaccard similarity reaches ``threshold`` is a duplicate of it.
+
+The first occurrence of each group is kept and remembers every member's
+source, so nothing is lost from attribution.  Only kept paragraphs' band
+keys and signatures are held in memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_PRIME = (1 << 31) - 1
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Casefold and reduce to space-separated word characters."""
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def shingles(words: List[str], size: int) -> np.ndarray:
+    """crc32 of every *size*-word window (the whole text if it is shorter)."""
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class Deduper:
+    """Streaming exact + near-duplicate detector.
+
+    Parameters
+    ----------
+    threshold : float
+        Estimated Jaccard similarity (of word shingles) at or above which a
+        paragraph counts as a near duplicate.  ``None`` disables the near
+        stage, leaving exact matching only.
+    num_perm, bands : int
+        Signature length and LSH bands (``num_perm`` must divide evenly).
+        Candidates need one identical band; 64 / 16 catches pairs well
+        below the default threshold, which the signature check then filters.
+    shingle : int
+        Words per shingle.
+    """
+
+    def __init__(self, threshold: Optional[float] = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle: int = 5, seed: int = 0):
+        if num_perm % bands:
+            raise ValueError(f"bands={bands} must divide num_perm={num_perm}")
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.shingle = shingle
+        self.bands = bands
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: Dict[Tuple[int, bytes], int] = {}
+        self._sigs: Dict[int, np.ndarray] = {}
+        self.kept = 0
+        self.exact_dups = 0
+        self.near_dups = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        x = shingles(normalize(text).split(), self.shingle)
+        return ((x[:, None] * self._a + self._b) % _PRIME).min(axis=0)
+
+    def add(self, text: str) -> Optional[int]:
+        """Register *text*; returns the group id it duplicates, else ``None``.
+
+        Kept paragraphs get consecutive group ids ``0, 1, 2, …``.
+        """
+        key = hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=16).digest()
+        group = self._exact.get(key)
+        if group is not None:
+            self.exact_dups += 1
+            return group
+
+        if self.threshold is not None:
+            sig = self.signature(text)
+            bands = [(b, band.tobytes()) for b, band in enumerate(np.split(sig, self.bands))]
+            for band in bands:
+                cand = self._buckets.get(band)
+                if cand is not None and float((self._sigs[cand] == sig).mean()) >= self.threshold:
+                    self.near_dups += 1
+                    self._exact[key] = cand
+                    return cand
+
+        group = self.kept
+        self.kept += 1
+        self._exact[key] = group
+        if self.threshold is not None:
+            self._sigs[group] = sig
+            for band in bands:
+                self._buckets.setdefault(band, group)
+        return None
+
+    @property
+    def removed(self) -> int:
+        return self.exact_dups + self.near_dups
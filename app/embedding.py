@@ -0,0 +1,218 @@
+"""Streaming, multi-process, resumable corpus embedding.
+
+``scripts/build_index.py`` used to hold every paragraph and every vector in
+memory and encode on one process.  Here the corpus is read lazily and cut
+into fixed-size batches; each batch is encoded (in-process, or on a pool of
+worker processes that each load the model once) and written straight into a
+memory-mapped ``vectors.npy`` shard at its row offset.  Completed batch
+numbers are checkpointed to ``vectors.ckpt.json`` after the rows are
+flushed, so an interrupted build re-run with the same inputs only encodes
+the batches that are missing.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import pathlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+SHARD_NAME      = "vectors.npy"
+CHECKPOINT_NAME = "vectors.ckpt.json"
+
+PathLike = Union[str, os.PathLike]
+
+
+# ─── lazy corpus access ───────────────────────────────────────────────────
+def scan_jsonl(path: PathLike, field: Optional[str] = "text") -> Iterator[Tuple[int, object]]:
+    """Yield ``(byte offset, text)`` for every record, one line at a time.
+
+    With ``field=None`` the whole decoded record is yielded instead.
+    """
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield offset, record if field is None else record[field]
+            offset += len(line)
+
+
+def read_at(path: PathLike, offsets: Iterable[int], field: Optional[str] = "text") -> Iterator:
+    """Texts at byte *offsets* from :func:`scan_jsonl`; negative offsets yield ``""``.
+
+    With ``field=None`` whole records are yielded (``None`` for negative offsets).
+    """
+    with open(path, "rb") as f:
+        for off in offsets:
+            if off < 0:
+                yield "" if field is not None else None
+                continue
+            f.seek(int(off))
+            record = json.loads(f.readline())
+            yield record if field is None else record[field]
+
+
+def select(items: Iterable, positions: Sequence[int]) -> Iterator:
+    """Items at the ascending *positions* of *items*, consumed in one pass."""
+    wanted = iter(positions)
+    nxt = next(wanted, None)
+    for pos, item in enumerate(items):
+        if nxt is None:
+            return
+        if pos == nxt:
+            yield item
+            nxt = next(wanted, None)
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    batch: List = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ─── checkpoint ───────────────────────────────────────────────────────────
+def _load_checkpoint(shard_dir: pathlib.Path, meta: Dict) -> Set[int]:
+    """Done batch numbers, or an empty set if the checkpoint is for another job."""
+    path = shard_dir / CHECKPOINT_NAME
+    if not path.exists() or not (shard_dir / SHARD_NAME).exists():
+        return set()
+    data = json.loads(path.read_text())
+    if {k: data.get(k) for k in meta} != meta:
+        return set()
+    return set(data["done"])
+
+
+def _save_checkpoint(shard_dir: pathlib.Path, meta: Dict, done: Set[int]) -> None:
+    path = shard_dir / CHECKPOINT_NAME
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({**meta, "done": sorted(done)}))
+    os.replace(tmp, path)
+
+
+# ─── workers ──────────────────────────────────────────────────────────────
+def sentence_transformer(name: str):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name)
+
+
+def _encode_into(model, shard: np.memmap, start: int, texts: List[str], encode_batch_size: int) -> None:
+    vecs = model.encode(texts, batch_size=encode_batch_size, normalize_embeddings=True, show_progress_bar=False)
+    shard[start:start + len(texts)] = np.asarray(vecs, dtype="float32")
+    shard.flush()   # rows must be on disk before the batch is checkpointed
+
+
+_WORKER: Dict = {}
+
+
+def _init_worker(model_factory: Callable, model_name: str, shard_path: str, threads: int) -> None:
+    try:  # share the cores between processes instead of oversubscribing them
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _WORKER["model"] = model_factory(model_name)
+    _WORKER["shard"] = np.lib.format.open_memmap(shard_path, mode="r+")
+
+
+def _worker_encode(batch_no: int, start: int, texts: List[str], encode_batch_size: int) -> int:
+    _encode_into(_WORKER["model"], _WORKER["shard"], start, texts, encode_batch_size)
+    return batch_no
+
+
+# ─── driver ───────────────────────────────────────────────────────────────
+def embed_to_shard(
+    texts: Iterable[str],
+    n: int,
+    dim: int,
+    shard_dir: PathLike,
+    fingerprint: str,
+    model_name: str,
+    model=None,
+    model_factory: Callable = sentence_transformer,
+    workers: int = 1,
+    batch_size: int = 256,
+    encode_batch_size: int = 64,
+    checkpoint_every: int = 16,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> np.ndarray:
+    """Embed the *n* strings of *texts* into ``shard_dir/vectors.npy``.
+
+    *fingerprint* identifies the input (e.g. a hash of the texts); a
+    checkpoint left by a run with the same fingerprint, model and shape is
+    resumed.  With ``workers > 1`` batches go to a spawn-based process pool
+    whose workers build their model with ``model_factory(model_name)``;
+    otherwise *model* (or a freshly built one) encodes in-process.
+    *on_batch* is called with the size of every finished or skipped batch.
+    Returns the shard as a read-only memmap.
+    """
+    shard_dir = pathlib.Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    shard_path = shard_dir / SHARD_NAME
+    meta = {"fingerprint": fingerprint, "model": model_name, "n": n, "dim": dim, "batch_size": batch_size}
+
+    done = _load_checkpoint(shard_dir, meta)
+    if not done:
+        np.lib.format.open_memmap(shard_path, mode="w+", dtype="float32", shape=(n, dim)).flush()
+        _save_checkpoint(shard_dir, meta, done)
+
+    since_save = 0
+
+    def _finished(batch_no: int, size: int) -> None:
+        nonlocal since_save
+        done.add(batch_no)
+        since_save += 1
+        if since_save >= checkpoint_every:
+            _save_checkpoint(shard_dir, meta, done)
+            since_save = 0
+        if on_batch:
+            on_batch(size)
+
+    def _todo():
+        for batch_no, batch in enumerate(batched(texts, batch_size)):
+            if batch_no in done:
+                if on_batch:
+                    on_batch(len(batch))
+                continue
+            yield batch_no, batch_no * batch_size, batch
+
+    try:
+        if workers <= 1:
+            model = model if model is not None else model_factory(model_name)
+            shard = np.lib.format.open_memmap(shard_path, mode="r+")
+            for batch_no, start, batch in _todo():
+                _encode_into(model, shard, start, batch, encode_batch_size)
+                _finished(batch_no, len(batch))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_factory, model_name, str(shard_path), threads),
+            ) as pool:
+                pending: Dict = {}
+                for batch_no, start, batch in _todo():
+                    # Bounded window: never read far ahead of the workers
+                    if len(pending) >= 2 * workers:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in finished:
+                            _finished(fut.result(), pending.pop(fut))
+                    pending[pool.submit(_worker_encode, batch_no, start, batch, encode_batch_size)] = len(batch)
+                for fut in list(pending):
+                    _finished(fut.result(), pending.pop(fut))
+    finally:
+        _save_checkpoint(shard_dir, meta, done)
+
+    return np.load(shard_path, mmap_mode="r")
@@ -0,0 +1,119 @@
+"""Run CPU-bound retrieval off the asyncio event loop.
+
+``_search`` (embed → FAISS → rerank) holds the CPU for tens to hundreds of
+milliseconds.  Calling it directly from an ``async`` route stalls every other
+request on the worker, including ``/healthz`` and ``/metrics``.  A
+:class:`RetrievalExecutor` hands the call to a thread or process pool and
+caps how many calls may run at once; callers beyond that wait on the event
+loop without blocking it.
+
+Thread pools are the default: they share the loaded models and let the
+micro-batcher (``app/batching.py``) merge concurrent queries.  Process pools
+sidestep the GIL but load one copy of the models per process, and each
+worker keeps the index and caches it was forked with – :meth:`recycle`
+replaces the workers after the parent's state changed (e.g. a hot reload).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from prometheus_client import Gauge, Histogram
+
+QUEUE_DEPTH = Gauge(
+    "retrieval_queue_depth",
+    "Retrieval calls waiting for a free executor slot",
+)
+INFLIGHT = Gauge(
+    "retrieval_inflight",
+    "Retrieval calls currently running on the executor",
+)
+QUEUE_WAIT = Histogram(
+    "retrieval_queue_wait_seconds",
+    "Time a retrieval call waited for an executor slot",
+)
+
+
+class RetrievalExecutor:
+    """Bounded-concurrency bridge between the event loop and a worker pool.
+
+    Parameters
+    ----------
+    kind : {"thread", "process"}
+        Pool flavour.
+    max_workers : int
+        Pool size.
+    max_concurrency : int, optional
+        Calls allowed to run at once; defaults to *max_workers*.  Extra
+        callers queue on the event loop and show up in
+        ``retrieval_queue_depth``.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 8, max_concurrency: Optional[int] = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind {kind!r}; expected 'thread' or 'process'")
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self._pool: Optional[Executor] = None
+        # asyncio primitives belong to one loop; keep one semaphore per loop.
+        self._sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="retrieval")
+        return self._pool
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Await ``fn(*args, **kwargs)`` evaluated on the pool."""
+        loop = asyncio.get_running_loop()
+        sem = self._semaphore(loop)
+
+        QUEUE_DEPTH.inc()
+        t0 = time.perf_counter()
+        try:
+            await sem.acquire()
+        finally:
+            QUEUE_DEPTH.dec()
+        QUEUE_WAIT.observe(time.perf_counter() - t0)
+
+        INFLIGHT.inc()
+        try:
+            return await loop.run_in_executor(self._get_pool(), functools.partial(fn, *args, **kwargs))
+        finally:
+            INFLIGHT.dec()
+            sem.release()
+
+    def recycle(self) -> None:
+        """Fork fresh process workers for the next calls; running calls finish on the old ones.
+
+        Threads share the parent's memory, so thread pools are left alone.
+        """
+        if self.kind != "process" or self._pool is None:
+            return
+        old, self._pool = self._pool, None
+        old.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; a later :meth:`run` starts a fresh one."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,145 @@
+"""Background loading of heavy components with per-component readiness.
+
+Reading the FAISS index and instantiating the embedder / cross-encoder takes
+seconds to minutes.  Doing it at import time means the server cannot even
+answer ``/healthz`` until everything is in memory.  A
+:class:`BackgroundLoader` runs registered loader functions on background
+threads after start-up and records each component's state and timing so
+``/readyz`` can report them and ``/query`` can fail fast while loading.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from prometheus_client import Gauge
+
+from .logger import logger
+
+COMPONENT_READY = Gauge(
+    "component_ready",
+    "1 once a component has finished loading",
+    ["component"],
+)
+COMPONENT_LOAD_SECONDS = Gauge(
+    "component_load_seconds",
+    "Wall-clock time spent loading a component",
+    ["component"],
+)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class _Component:
+    def __init__(self, name: str, fn: Callable[[], None]):
+        self.name = name
+        self.fn = fn
+        self.state = PENDING
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def run(self) -> None:
+        self.state = LOADING
+        t0 = time.perf_counter()
+        try:
+            self.fn()
+        except Exception as exc:
+            self.state, self.error = FAILED, f"{type(exc).__name__}: {exc}"
+            logger.error("component_load_failed", component=self.name, error=self.error)
+        else:
+            self.state = READY
+            COMPONENT_READY.labels(self.name).set(1)
+        finally:
+            self.seconds = time.perf_counter() - t0
+            COMPONENT_LOAD_SECONDS.labels(self.name).set(self.seconds)
+        if self.state == READY:
+            logger.info("component_loaded", component=self.name, seconds=round(self.seconds, 3))
+
+    def status(self) -> Dict:
+        out: Dict = {"state": self.state}
+        if self.seconds is not None:
+            out["seconds"] = round(self.seconds, 3)
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class BackgroundLoader:
+    """Load named components concurrently, once, on a daemon thread."""
+
+    def __init__(self):
+        self._components: Dict[str, _Component] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    def add(self, name: str, fn: Callable[[], None]) -> None:
+        """Register *fn*, which loads *name* and publishes it (e.g. a global)."""
+        self._components[name] = _Component(name, fn)
+        COMPONENT_READY.labels(name).set(0)
+
+    def _run_all(self) -> None:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, len(self._components)), thread_name_prefix="loader") as pool:
+            list(pool.map(lambda c: c.run(), self._components.values()))
+        logger.info("components_loaded", ready=self.ready, seconds=round(time.perf_counter() - t0, 3))
+        self._done.set()
+
+    def start(self) -> None:
+        """Begin loading in the background; later calls are no-ops."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_all, name="background-loader", daemon=True)
+                self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Start loading if needed and block until every component has run once."""
+        if not self._done.is_set():
+            self.start()
+            if not self._done.wait(timeout):
+                raise TimeoutError("components still loading")
+
+    def load(self, timeout: Optional[float] = None) -> None:
+        """Start loading if needed and block until done; raise if anything failed."""
+        self.wait(timeout)
+        if self.failed:
+            errors = {c.name: c.error for c in self._components.values() if c.state == FAILED}
+            raise RuntimeError(f"component(s) failed to load: {errors}")
+
+    def retry(self, names: Iterable[str] = ()) -> None:
+        """Run *names* plus every failed component again, after the first pass.
+
+        Blocking; lets an operator recover from a failed start-up (e.g. a
+        broken artefact that has since been replaced) without a restart.
+        """
+        self.wait()
+        again = [c for c in self._components.values() if c.name in names or c.state == FAILED]
+        for c in again:
+            c.error = None
+            COMPONENT_READY.labels(c.name).set(0)
+        for c in again:
+            c.run()
+
+    @property
+    def ready(self) -> bool:
+        return all(c.state == READY for c in self._components.values())
+
+    @property
+    def failed(self) -> bool:
+        return any(c.state == FAILED for c in self._components.values())
+
+    def status(self) -> Dict:
+        """Overall state plus per-component ``state`` / ``seconds`` / ``error``."""
+        if self.ready:
+            overall = READY
+        elif self.failed:
+            overall = FAILED
+        else:
+            overall = LOADING if self._thread is not None else PENDING
+        return {
+            "status": overall,
+            "components": {name: c.status() for name, c in self._components.items()},
+        }
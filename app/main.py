@@ -1,28 +1,74 @@
 # app/main.py
-from fastapi import FastAPI, Response
+import asyncio
+import hmac
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 
 # Local
 from .retrieval import get_answer
 from .retrieval import stream_answer
+from .retrieval import EXECUTOR as RETRIEVAL_EXECUTOR
+from .retrieval import LOADER as RETRIEVAL_LOADER
+from .retrieval import WATCHER as INDEX_WATCHER
+from .retrieval import reload_index
+from . import ollama_client
 from .logger import logger
 
 # Prometheus metrics
 from app.middleware import MetricsMiddleware
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
+# Seconds clients are told to wait while models are still loading
+RETRY_AFTER_S = os.getenv("RETRY_AFTER_S", "5")
+
+# Shared secret for /admin/* (sent as X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load index & models in the background so /healthz answers immediately
+    RETRIEVAL_LOADER.start()
+    # One pooled HTTP client to Ollama for the app's lifetime
+    ollama_client.open_client()
+    # Optional: pick up new artefact versions without a restart
+    if INDEX_WATCHER is not None:
+        INDEX_WATCHER.start()
+    yield
+    if INDEX_WATCHER is not None:
+        INDEX_WATCHER.stop()
+    # Release retrieval worker threads / processes on shutdown
+    RETRIEVAL_EXECUTOR.shutdown(wait=False)
+    await ollama_client.close_client()
+
 app = FastAPI(
     title="SoloRAG – Stripe FAQ Assistant",
     version="0.1.0",
     description="Retrieval-Augmented Generation over Stripe Support docs",
+    lifespan=lifespan,
 )
 
 # Register middleware early so it wraps all routes
 app.add_middleware(MetricsMiddleware)
 
+class GenerationOptions(BaseModel):
+    """Per-request Ollama model options; unset fields keep the server's OLLAMA_OPTIONS."""
+    num_predict: Optional[int] = Field(default=None, ge=-2, description="max tokens to generate (-1 = unlimited)")
+    num_ctx: Optional[int] = Field(default=None, ge=256, description="context window in tokens")
+    temperature: Optional[float] = Field(default=None, ge=0)
+    top_p: Optional[float] = Field(default=None, gt=0, le=1)
+    top_k: Optional[int] = Field(default=None, ge=1)
+    repeat_penalty: Optional[float] = Field(default=None, ge=0)
+    seed: Optional[int] = None
+
 class Query(BaseModel):
     question: str
+    options: Optional[GenerationOptions] = None
+    keep_alive: Optional[str] = Field(default=None, description='how long Ollama keeps the model loaded, e.g. "30m"')
 
     # Provide an example for the Swagger /docs page
     model_config = {
@@ -42,6 +88,58 @@ class Query(BaseModel):
             raise ValueError("Question must not be empty.")
         return v
 
+    def llm_overrides(self) -> Dict[str, Any]:
+        """``options`` / ``keep_alive`` keyword arguments for get_answer / stream_answer."""
+        overrides: Dict[str, Any] = {}
+        options = self.options.model_dump(exclude_none=True) if self.options else {}
+        if options:
+            overrides["options"] = options
+        if self.keep_alive is not None:
+            overrides["keep_alive"] = self.keep_alive
+        return overrides
+
+class ComponentStatus(BaseModel):
+    state: str
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class Readiness(BaseModel):
+    status: str
+    components: Dict[str, ComponentStatus]
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "status": "loading",
+                    "components": {
+                        "index": {"state": "ready", "seconds": 0.42},
+                        "embedder": {"state": "loading"},
+                    },
+                }
+            ]
+        }
+    }
+
+def _require_ready() -> None:
+    """Fail fast with 503 + Retry-After until retrieval has finished loading."""
+    if not RETRIEVAL_LOADER.ready:
+        detail = "Retrieval failed to load." if RETRIEVAL_LOADER.failed else "Retrieval is still loading."
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": RETRY_AFTER_S})
+
+class ReloadResult(BaseModel):
+    version: str
+    previous: Optional[str] = None
+    reloaded: bool
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {"version": "v8", "previous": "v7", "reloaded": True}
+            ]
+        }
+    }
+
 class Health(BaseModel):
     status: str = "ok"
 
@@ -59,18 +157,20 @@ async def query(q: Query):
     Retrieve relevant FAQ snippets, pass them to the LLM,
     and return the markdown answer plus source snippets.
     """
+    _require_ready()
     logger.info("query_received", question=q.question)
-    answer, sources = await get_answer(q.question)
+    answer, sources = await get_answer(q.question, **q.llm_overrides())
     return {"answer": answer, "sources": sources}
 
 @app.post("/query/stream")
 async def query_stream(q: Query):
     """Stream incremental answer tokens as they are produced by the LLM."""
 
+    _require_ready()
     logger.info("query_stream_received", question=q.question)
 
     async def token_generator():
-        async for chunk in stream_answer(q.question):
+        async for chunk in stream_answer(q.question, **q.llm_overrides()):
             yield chunk
     return StreamingResponse(token_generator(), media_type="text/plain")
 
@@ -79,6 +179,36 @@ async def health() -> Health:
     """Simple liveness probe."""
     return Health()
 
+@app.get("/readyz", response_model=Readiness, response_model_exclude_none=True, responses={503: {"model": Readiness}})
+async def ready(response: Response) -> Readiness:
+    """Readiness probe: per-component load state and timing; 503 until all are ready."""
+    status = RETRIEVAL_LOADER.status()
+    if status["status"] != "ready":
+        response.status_code = 503
+        response.headers["Retry-After"] = RETRY_AFTER_S
+    return Readiness(**status)
+
+@app.post("/admin/reload", response_model=ReloadResult)
+async def admin_reload(force: bool = False, x_admin_token: Optional[str] = Header(default=None)) -> ReloadResult:
+    """Load the artefact version named by ``artifacts/CURRENT`` and swap it in.
+
+    Queries keep being served from the old version while the new one loads;
+    requests already in flight finish on the version they started with.
+    After a failed start-up it retries loading, so a replaced artefact can
+    be picked up without a restart.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN.")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+    if not RETRIEVAL_LOADER.ready and not RETRIEVAL_LOADER.failed:
+        _require_ready()   # still loading: 503 + Retry-After
+    try:
+        result = await asyncio.to_thread(reload_index, force)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {type(exc).__name__}: {exc}")
+    return ReloadResult(**result)
+
 # --------------------------- metrics endpoint ---------------------------
 
 @app.get(
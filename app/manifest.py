@@ -0,0 +1,149 @@
+"""Content-hash manifest for incremental index builds.
+
+``scripts/build_index.py`` used to re-embed the whole corpus on every run.
+The manifest records, for each paragraph's content hash, the FAISS label(s)
+it was stored under.  On the next build :func:`plan` compares the corpus
+against it:
+
+* paragraphs whose hash is already known keep their label – no embedding;
+* new or edited paragraphs get fresh labels and are the only ones embedded;
+* labels whose hash no longer occurs are removed from the ID-mapped index.
+
+Labels are never reused, so the passage store is addressed by label and
+removed paragraphs leave empty slots (:attr:`Delta.holes`).  Once holes make
+up more than ``--compact-ratio`` of the labels, the build script compacts
+them away with a full rebuild.
+
+On disk the manifest is ``manifest.json`` (build settings, counts) plus
+``manifest.hashes.npy``: one 24-byte ``(hash, label)`` row per label, sorted
+by hash.  :func:`load` memory-maps that table and :func:`plan` binary-searches
+it, so the previous build's hashes are paged in on demand instead of being
+parsed into Python objects.  A build still keeps a few bytes per paragraph
+(labels, byte offsets) in memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+HASHES_NAME   = "manifest.hashes.npy"
+
+# one row per label; sorted by hash (then label) so lookups are a binary search
+ENTRY = np.dtype([("hash", "S16"), ("id", "<i8")])
+
+PathLike = Union[str, os.PathLike]
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def content_hash(text: str) -> str:
+    return _digest(text).hex()
+
+
+def _table(hashes: Union[np.ndarray, Dict[str, List[int]]]) -> np.ndarray:
+    """Hash table as sorted ``ENTRY`` rows; also converts the legacy JSON dict."""
+    if isinstance(hashes, np.ndarray):
+        return hashes
+    rows = [(bytes.fromhex(h), i) for h, ids in hashes.items() for i in ids]
+    table = np.array(rows, dtype=ENTRY)
+    return table[np.argsort(table, order=("hash", "id"), kind="stable")]
+
+
+@dataclass
+class Delta:
+    """Difference between a corpus and the manifest of the previous build."""
+
+    ids: List[int]       # label of every corpus paragraph, in corpus order
+    added: List[int]     # corpus positions that need embedding
+    removed: List[int]   # labels to drop from the index
+    next_id: int         # first label not yet handed out
+    fingerprint: str     # hash over the added paragraphs, identifies the embedding job
+
+    @property
+    def unchanged(self) -> int:
+        return len(self.ids) - len(self.added)
+
+    @property
+    def holes(self) -> int:
+        """Labels handed out but no longer backed by a paragraph."""
+        return self.next_id - len(self.ids)
+
+
+def plan(texts: Iterable[str], previous: Optional[Dict] = None) -> Delta:
+    """Match *texts* against *previous* (a loaded manifest, or ``None``).
+
+    *texts* is consumed once, so a lazy reader works.
+    """
+    table = _table(previous["hashes"]) if previous else np.empty(0, dtype=ENTRY)
+    keys = table["hash"]
+    used = np.zeros(len(table), dtype=bool)
+    next_id = int(previous["next_id"]) if previous else 0
+    ids: List[int] = []
+    added: List[int] = []
+    digest = hashlib.blake2b(digest_size=16)
+    for pos, text in enumerate(texts):
+        h = _digest(text)
+        key = h.rstrip(b"\0")           # numpy hands "S" values back without trailing NULs
+        j = int(np.searchsorted(keys, h))
+        while j < len(table) and keys[j] == key and used[j]:
+            j += 1                    # duplicates consume one label each
+        if j < len(table) and keys[j] == key:
+            used[j] = True
+            ids.append(int(table["id"][j]))
+        else:
+            ids.append(next_id)
+            added.append(pos)
+            digest.update(h.hex().encode())
+            next_id += 1
+    removed = np.sort(table["id"][~used]).tolist()
+    return Delta(ids=ids, added=added, removed=removed, next_id=next_id, fingerprint=digest.hexdigest())
+
+
+def build(texts: Iterable[str], delta: Delta, **info) -> Dict:
+    """Manifest describing the index after *delta* was applied."""
+    table = np.empty(len(delta.ids), dtype=ENTRY)
+    table["id"] = delta.ids
+    n = 0
+    for n, text in enumerate(texts, start=1):
+        table["hash"][n - 1] = _digest(text)
+    table = table[:n]
+    table = table[np.argsort(table, order=("hash", "id"), kind="stable")]
+    return {**info, "next_id": delta.next_id, "count": len(delta.ids), "hashes": table}
+
+
+def load(art_dir: PathLike) -> Optional[Dict]:
+    """The manifest of *art_dir*, its hash table memory-mapped; ``None`` if absent."""
+    art_dir = pathlib.Path(art_dir)
+    path = art_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if "hashes" in manifest:          # pre-table builds kept the hashes inline
+        manifest["hashes"] = _table(manifest["hashes"])
+    elif (art_dir / HASHES_NAME).exists():
+        manifest["hashes"] = np.load(art_dir / HASHES_NAME, mmap_mode="r")
+    else:
+        return None
+    return manifest
+
+
+def save(manifest: Dict, art_dir: PathLike) -> None:
+    art_dir = pathlib.Path(art_dir)
+    table = _table(manifest["hashes"])
+    tmp = art_dir / (HASHES_NAME + ".tmp.npy")
+    np.save(tmp, table)
+    os.replace(tmp, art_dir / HASHES_NAME)
+    path = art_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({k: v for k, v in manifest.items() if k != "hashes"}), encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,126 @@
+"""Columnar per-passage metadata, addressed by FAISS label.
+
+The scraper records ``url`` and ``title`` for every paragraph; the passage
+store keeps only text.  ``scripts/build_index.py`` writes the rest to
+``passages.meta.npz`` next to ``faiss.idx`` as plain NumPy columns (no
+pickles):
+
+* per passage – ``article`` (``int32`` row in the article columns, ``-1``
+  for labels left empty by removed paragraphs), ``tokens`` and the
+  ``start`` / ``end`` character span of a chunk in its article (the
+  passage itself for builds without chunking; all ``int32``);
+* per article – ``url``, ``title`` and ``slug`` (the article id, i.e. the
+  last path segment of its URL), each with one trailing ``""`` row that
+  ``article == -1`` indexes.
+
+Paragraphs of one article share its row, so the file stays small, and
+looking up any number of hits is a handful of fancy-indexing operations.
+"""
+
+from __future__ import annotations
+
+import array
+import os
+import pathlib
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+import numpy as np
+
+META_NAME = "passages.meta.npz"
+
+PathLike = Union[str, os.PathLike]
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Words plus punctuation marks – a cheap, model-independent token estimate."""
+    return len(_TOKEN.findall(text))
+
+
+def article_id(url: str) -> str:
+    """``/questions/how-refunds-work`` → ``how-refunds-work``."""
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def exists(art_dir: PathLike) -> bool:
+    return (pathlib.Path(art_dir) / META_NAME).exists()
+
+
+class PassageMetadata:
+    """url / title / article id / token count / article span for every passage label."""
+
+    def __init__(self, article: np.ndarray, tokens: np.ndarray, url: np.ndarray, title: np.ndarray, slug: np.ndarray,
+                 start: np.ndarray, end: np.ndarray):
+        self.article = article
+        self.tokens  = tokens
+        self.url     = url
+        self.title   = title
+        self.slug    = slug
+        self.start   = start
+        self.end     = end
+
+    @classmethod
+    def build(cls, records: Iterable[Optional[Dict]]) -> "PassageMetadata":
+        """Columns for *records* in label order; a falsy record is an empty label."""
+        rows: Dict[str, int] = {}
+        urls: List[str] = []
+        titles: List[str] = []
+        article, tokens = array.array("i"), array.array("i")
+        start, end = array.array("i"), array.array("i")
+        for rec in records:
+            if not rec:
+                for col in (tokens, start, end):
+                    col.append(0)
+                article.append(-1)
+                continue
+            url = rec.get("url") or ""
+            row = rows.get(url)
+            if row is None:
+                row = rows[url] = len(urls)
+                urls.append(url)
+                titles.append(rec.get("title") or "")
+            article.append(row)
+            tokens.append(count_tokens(rec["text"]))
+            start.append(rec.get("start", 0))
+            end.append(rec.get("end", len(rec["text"])))
+        return cls(
+            np.frombuffer(article, dtype=np.int32).copy(),
+            np.frombuffer(tokens, dtype=np.int32).copy(),
+            np.array(urls + [""], dtype=str),
+            np.array(titles + [""], dtype=str),
+            np.array([article_id(u) for u in urls] + [""], dtype=str),
+            np.frombuffer(start, dtype=np.int32).copy(),
+            np.frombuffer(end, dtype=np.int32).copy(),
+        )
+
+    def save(self, out_dir: PathLike) -> None:
+        out_dir = pathlib.Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = out_dir / (META_NAME + ".tmp.npz")
+        np.savez(tmp, article=self.article, tokens=self.tokens, url=self.url, title=self.title, slug=self.slug,
+                 start=self.start, end=self.end)
+        os.replace(tmp, out_dir / META_NAME)
+
+    @classmethod
+    def load(cls, art_dir: PathLike) -> "PassageMetadata":
+        with np.load(pathlib.Path(art_dir) / META_NAME) as z:
+            return cls(*(z[k] for k in ("article", "tokens", "url", "title", "slug", "start", "end")))
+
+    def __len__(self) -> int:
+        return len(self.article)
+
+    def columns(self, ids: Sequence[int]) -> Dict[str, list]:
+        """``url`` / ``title`` / ``article`` / ``tokens`` / ``start`` / ``end`` lists for passage *ids*."""
+        labels = np.asarray(ids, dtype=np.int64)
+        rows = self.article[labels]
+        return {
+            "url": self.url[rows].tolist(),
+            "title": self.title[rows].tolist(),
+            "article": self.slug[rows].tolist(),
+            "tokens": self.tokens[labels].tolist(),
+            "start": self.start[labels].tolist(),
+            "end": self.end[labels].tolist(),
+        }
@@ -2,47 +2,222 @@
 """Thin async wrapper around the Ollama REST API.
 
 Call ``await generate(prompt)`` to obtain the model response.
-The helper runs the synchronous ``requests`` call in a thread pool so it
-plays nicely with the asyncio event-loop used by FastAPI.
+
+The FastAPI lifespan opens one pooled ``httpx.AsyncClient`` (``open_client``
+/ ``close_client``) so requests reuse keep-alive connections to Ollama;
+outside the app (scripts, tests) each call falls back to a one-off client.
+
+Generation options (``num_ctx``, ``num_predict``, sampling …) come from
+``OLLAMA_OPTIONS`` (JSON) and can be overridden per call; ``OLLAMA_KEEP_ALIVE``
+keeps the model loaded between bursts.  Ollama's own timings of each answer
+(model load, prompt evaluation) and the time to the first streamed token are
+exported as Prometheus histograms.
+
+``OLLAMA_URLS`` (comma-separated) spreads requests over several Ollama
+servers via :class:`app.backends.BackendPool`: least outstanding requests
+first, with circuit breaking and ``/api/tags`` probes.  A request that fails
+on connect / with a 5xx – for streams, before the first token – is retried
+on another backend.
 """
 
 from __future__ import annotations
 
 import os
+import time
 import asyncio
 import httpx
-from typing import Final
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Final, List, Optional
 import json
 
+from prometheus_client import Counter, Histogram
+
+from .backends import Backend, BackendPool
+
 OLLAMA_URL: Final[str] = os.getenv("OLLAMA_URL", "http://localhost:11434")
+# Several servers: OLLAMA_URLS=http://gpu-a:11434,http://gpu-b:11434 (overrides OLLAMA_URL)
+OLLAMA_URLS: Final[list] = [u.strip() for u in os.getenv("OLLAMA_URLS", "").split(",") if u.strip()] or [OLLAMA_URL]
+FAILURE_THRESHOLD: Final[int] = int(os.getenv("OLLAMA_FAILURE_THRESHOLD", "3"))   # consecutive failures → circuit opens
+COOLDOWN_S: Final[float] = float(os.getenv("OLLAMA_COOLDOWN_S", "15"))            # … for this long
+PROBE_INTERVAL_S: Final[float] = float(os.getenv("OLLAMA_PROBE_INTERVAL_S", "10"))  # /api/tags probes (0 = off)
 OLLAMA_MODEL: Final[str] = os.getenv("OLLAMA_MODEL", "llama3:8b-instruct-q5_K_M")
-TIMEOUT: Final[float] = 30.0
+TIMEOUT: Final[float] = float(os.getenv("OLLAMA_TIMEOUT", "30"))               # whole-response read, non-streaming
+CONNECT_TIMEOUT: Final[float] = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+# Streaming: prompt evaluation on CPU can take a while before the first
+# token, after which tokens should keep coming (0 disables either limit)
+FIRST_TOKEN_TIMEOUT: Final[float] = float(os.getenv("OLLAMA_FIRST_TOKEN_TIMEOUT", "120"))
+IDLE_TIMEOUT: Final[float] = float(os.getenv("OLLAMA_IDLE_TIMEOUT", "30"))
+# Connection pool of the shared client
+MAX_CONNECTIONS: Final[int] = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE: Final[int] = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "8"))
+KEEPALIVE_EXPIRY: Final[float] = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+
+# Model options sent with every request, e.g. '{"num_ctx": 4096, "num_predict": 512, "temperature": 0.2}'
+OLLAMA_OPTIONS: Final[Dict[str, Any]] = json.loads(os.getenv("OLLAMA_OPTIONS", "") or "{}")
+# How long Ollama keeps the model loaded after a request ("30m", "-1" = forever); unset = server default
+OLLAMA_KEEP_ALIVE: Final[Optional[str]] = os.getenv("OLLAMA_KEEP_ALIVE") or None
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+TIME_TO_FIRST_TOKEN = Histogram(
+    "ollama_time_to_first_token_seconds",
+    "Seconds until the first token: wall clock when streaming, "
+    "Ollama's load + prompt-eval time otherwise",
+    ["mode"],  # stream | generate
+    buckets=_LATENCY_BUCKETS,
+)
+PROMPT_EVAL_SECONDS = Histogram(
+    "ollama_prompt_eval_seconds",
+    "Prompt evaluation time reported by Ollama (drops when the prompt prefix is cached)",
+    buckets=_LATENCY_BUCKETS,
+)
+PROMPT_EVAL_TOKENS = Histogram(
+    "ollama_prompt_eval_tokens",
+    "Prompt tokens Ollama had to evaluate (excludes a reused cached prefix)",
+    buckets=(16, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "ollama_load_seconds",
+    "Model load time reported by Ollama (non-zero after the model was unloaded)",
+    buckets=_LATENCY_BUCKETS,
+)
+
+STREAM_TIMEOUTS = Counter(
+    "ollama_stream_timeouts_total",
+    "Streams aborted because Ollama went quiet",
+    ["phase"],  # first_token | idle
+)
+
+POOL = BackendPool(OLLAMA_URLS, failure_threshold=FAILURE_THRESHOLD, cooldown_s=COOLDOWN_S)
+
+_client: Optional[httpx.AsyncClient] = None
+_probes: Optional[asyncio.Task] = None
 
-async def generate(prompt: str, retries: int = 3, delay_s: float = 0.5) -> str:
-    """Send *prompt* to Ollama and return the generated response."""
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+
+
+def open_client() -> httpx.AsyncClient:
+    """Create the shared pooled client (idempotent); call from the app lifespan.
+
+    With several backends this also starts the background health probes.
+    """
+    global _client, _probes
+    if _client is None:
+        _client = _new_client()
+        if len(POOL) > 1 and PROBE_INTERVAL_S > 0:
+            _probes = asyncio.get_running_loop().create_task(
+                POOL.probe_forever(_client, PROBE_INTERVAL_S, timeout=CONNECT_TIMEOUT)
+            )
+    return _client
+
+
+async def close_client() -> None:
+    """Stop the probes and close the shared client and its pooled connections."""
+    global _client, _probes
+    probes, _probes = _probes, None
+    if probes is not None:
+        probes.cancel()
+        try:
+            await probes
+        except asyncio.CancelledError:
+            pass
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def _session() -> AsyncIterator[httpx.AsyncClient]:
+    """The shared client, or a one-off client when none is open."""
+    if _client is not None:
+        yield _client
+        return
+    async with _new_client() as client:
+        yield client
+
+
+def _payload(prompt: str, stream: bool, options: Optional[Dict[str, Any]], keep_alive: Optional[str]) -> Dict:
+    """Request body; *options* are merged over ``OLLAMA_OPTIONS``."""
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": False,
+        "stream": stream,
     }
-    url = f"{OLLAMA_URL}/api/generate"
+    merged = {**OLLAMA_OPTIONS, **(options or {})}
+    if merged:
+        payload["options"] = merged
+    keep_alive = keep_alive if keep_alive is not None else OLLAMA_KEEP_ALIVE
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    return payload
+
+
+def _record_timings(data: Dict) -> float:
+    """Observe Ollama's final-message timings (nanoseconds); returns load + prompt-eval seconds."""
+    load = data.get("load_duration", 0) / 1e9
+    prompt_eval = data.get("prompt_eval_duration", 0) / 1e9
+    if "load_duration" in data:
+        MODEL_LOAD_SECONDS.observe(load)
+    if "prompt_eval_duration" in data:
+        PROMPT_EVAL_SECONDS.observe(prompt_eval)
+    if "prompt_eval_count" in data:
+        PROMPT_EVAL_TOKENS.observe(data["prompt_eval_count"])
+    return load + prompt_eval
+
+
+async def generate(
+    prompt: str,
+    retries: int = 3,
+    delay_s: float = 0.5,
+    options: Optional[Dict[str, Any]] = None,
+    keep_alive: Optional[str] = None,
+) -> str:
+    """Send *prompt* to Ollama and return the generated response.
+
+    *options* / *keep_alive* override ``OLLAMA_OPTIONS`` / ``OLLAMA_KEEP_ALIVE``.
+    *retries* counts rounds over the backend pool: within a round a failed
+    request moves on to the next untried backend, and between rounds the
+    client sleeps *delay_s*.  With a single backend that is *retries* attempts.
+    """
+    payload = _payload(prompt, False, options, keep_alive)
     last_exception = None
+    tried: List[Backend] = []   # backends that failed in this round; others are tried first
+    rounds = 1
 
-    async with httpx.AsyncClient() as client:
-        for attempt in range(retries):
+    async with _session() as client:
+        while True:
+            backend = POOL.pick(tried)
+            if backend is None:               # every backend failed once: back off, go round again
+                if rounds >= retries:
+                    break
+                rounds += 1
+                tried = []
+                await asyncio.sleep(delay_s)
+                continue
             try:
-                r = await client.post(url, json=payload, timeout=TIMEOUT)
+                with POOL.track(backend):
+                    r = await client.post(f"{backend.url}/api/generate", json=payload)
                 r.raise_for_status()
-                return r.json()["response"].strip()
+                data = r.json()
+                POOL.success(backend)
+                if "total_duration" in data:           # Ollama's timings are present
+                    TIME_TO_FIRST_TOKEN.labels("generate").observe(_record_timings(data))
+                return data["response"].strip()
             except (httpx.HTTPStatusError, httpx.RequestError) as e:
                 last_exception = e
                 if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
                     raise # Don't retry on client errors (4xx)
-                
-                if attempt < retries - 1:
-                    await asyncio.sleep(delay_s)
-                else:
-                    break
+                POOL.failure(backend)
+                tried.append(backend)
     
     # If we exited the loop without success, propagate the last captured exception
     if last_exception is not None:
@@ -52,36 +227,82 @@ async def generate(prompt: str, retries: int = 3, delay_s: float = 0.5) -> str:
 
 # ------------------------------------------------------------------------------------
 # NEW: async generator for streaming tokens
-async def stream_generate(prompt: str):
-    """Yields chunks of the Ollama response as they arrive (server streaming)."""
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": True,
-    }
-    url = f"{OLLAMA_URL}/api/generate"
-
-    async with httpx.AsyncClient(timeout=None) as client:
-        async with client.stream("POST", url, json=payload) as r:
-            async for line in r.aiter_lines():
-                if not line:
-                    continue
-                if line.strip() == "[DONE]":
-                    break
-                try:
-                    data = json.loads(line)
-                except Exception:
-                    # In case of malformed JSON just forward raw line
-                    yield line
-                    continue
-
-                # Ollama streams each partial response under the 'response' key.
-                token = data.get("response")
-                if token is not None:
-                    yield token
-                # Check for end condition if API marks it.
-                if data.get("done") is True:
-                    break
+async def stream_generate(
+    prompt: str,
+    options: Optional[Dict[str, Any]] = None,
+    keep_alive: Optional[str] = None,
+):
+    """Yields chunks of the Ollama response as they arrive (server streaming).
+
+    Raises ``httpx.ReadTimeout`` if no line arrives within
+    ``FIRST_TOKEN_TIMEOUT`` of the request, or ``IDLE_TIMEOUT`` of the last one.
+    Until the first token, connection errors, 5xx responses and that
+    timeout move the request to the next backend.
+    """
+    payload = _payload(prompt, True, options, keep_alive)
+    tried: List[Backend] = []
+    t0, started = time.perf_counter(), False
+
+    async with _session() as client:
+        while True:
+            backend = POOL.pick(tried)
+            if backend is None:               # only if the pool itself is empty
+                raise RuntimeError("no Ollama backend configured")
+            try:
+                with POOL.track(backend):
+                    async for token in _stream_from(client, backend, payload):
+                        if not started:
+                            TIME_TO_FIRST_TOKEN.labels("stream").observe(time.perf_counter() - t0)
+                            started = True
+                        yield token
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                    raise
+                POOL.failure(backend)
+                tried.append(backend)
+                if started or len(tried) >= len(POOL):
+                    raise
+                continue
+            POOL.success(backend)
+            return
+
+
+async def _stream_from(client: httpx.AsyncClient, backend: Backend, payload: Dict):
+    """Tokens of one streamed generation on *backend*."""
+    # Reads are bounded per line below instead of per socket read
+    timeout = httpx.Timeout(None, connect=CONNECT_TIMEOUT)
+    async with client.stream("POST", f"{backend.url}/api/generate", json=payload, timeout=timeout) as r:
+        r.raise_for_status()
+        lines = r.aiter_lines()
+        phase, limit = "first_token", FIRST_TOKEN_TIMEOUT
+        while True:
+            try:
+                line = await asyncio.wait_for(anext(lines), limit or None)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                STREAM_TIMEOUTS.labels(phase).inc()
+                raise httpx.ReadTimeout(f"No data from Ollama for {limit:g}s ({phase})") from None
+            phase, limit = "idle", IDLE_TIMEOUT
+            if not line:
+                continue
+            if line.strip() == "[DONE]":
+                break
+            try:
+                data = json.loads(line)
+            except Exception:
+                # In case of malformed JSON just forward raw line
+                yield line
+                continue
+
+            # Ollama streams each partial response under the 'response' key.
+            token = data.get("response")
+            if token:
+                yield token
+            # Check for end condition if API marks it.
+            if data.get("done") is True:
+                _record_timings(data)
+                break
 
 # ------------------------------------------------------------------------------------
 # End of public API – no additional helpers below to keep the surface minimal.
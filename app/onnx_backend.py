@@ -0,0 +1,138 @@
+"""ONNX Runtime backends for the embedder and cross-encoder.
+
+PyTorch inference for ``EMBED`` / ``RERANK`` is a large share of non-LLM
+latency on CPU.  ``scripts/export_onnx.py`` exports both models (optionally
+dynamically quantised to int8) into ``artifacts/onnx/{embedder,reranker}``;
+the classes below load those exports and mimic the parts of the
+``SentenceTransformer.encode`` / ``CrossEncoder.predict`` API that
+``app.retrieval`` uses, so the rest of the pipeline is unchanged.
+
+Each export directory holds ``model.onnx`` (fp32), optionally
+``model.int8.onnx``, the Hugging Face tokenizer files and
+``onnx_config.json`` describing pooling / activation / max length.
+
+``onnxruntime`` and ``transformers`` are imported lazily so the default
+PyTorch path does not need them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+CONFIG_NAME = "onnx_config.json"
+FP32_NAME   = "model.onnx"
+INT8_NAME   = "model.int8.onnx"
+
+
+def model_path(model_dir: Union[str, os.PathLike], quantized: bool = False) -> pathlib.Path:
+    return pathlib.Path(model_dir) / (INT8_NAME if quantized else FP32_NAME)
+
+
+class _OnnxModel:
+    """Tokenizer + InferenceSession pair shared by both wrappers."""
+
+    def __init__(self, model_dir: Union[str, os.PathLike], quantized: bool = False, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = pathlib.Path(model_dir)
+        path = model_path(model_dir, quantized)
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found – run scripts/export_onnx.py first")
+
+        self.config: Dict = json.loads((model_dir / CONFIG_NAME).read_text())
+        self.max_length = int(self.config.get("max_length", 512))
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            opts.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, encoded) -> np.ndarray:
+        feeds = {k: np.asarray(v, dtype=np.int64) for k, v in encoded.items() if k in self._inputs}
+        return self.session.run(None, feeds)[0]
+
+
+class OnnxEmbedder(_OnnxModel):
+    """Drop-in for ``SentenceTransformer.encode`` (mean or CLS pooling)."""
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        **_: object,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)  # type: ignore[list-item]
+        out = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            hidden = self._run(enc)                                   # (batch, tokens, dim)
+            if self.config.get("pooling", "mean") == "cls":
+                emb = hidden[:, 0]
+            else:
+                mask = enc["attention_mask"][..., None].astype(hidden.dtype)
+                emb = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(emb.astype("float32"))
+        dim = int(self.config.get("dim", 0))
+        vecs = np.vstack(out) if out else np.zeros((0, dim), dtype="float32")
+        if normalize_embeddings:
+            vecs = vecs / np.clip(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None)
+        return vecs[0] if single else vecs
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """Drop-in for ``CrossEncoder.predict`` on single-logit rerankers."""
+
+    def predict(self, sentences: Sequence[Sequence[str]], batch_size: int = 32, **_: object) -> np.ndarray:
+        pairs = list(sentences)
+        scores = []
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            enc = self.tokenizer(
+                [q for q, _ in batch],
+                [p for _, p in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            logits = self._run(enc)[:, 0]
+            if self.config.get("activation") == "sigmoid":
+                logits = 1.0 / (1.0 + np.exp(-logits))
+            scores.append(logits.astype("float32"))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype="float32")
+
+
+# ─── parity helpers (used by scripts/export_onnx.py) ──────────────────────
+def embedding_parity(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Minimum row-wise cosine similarity between two embedding matrices."""
+    a = reference / np.clip(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12, None)
+    b = candidate / np.clip(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12, None)
+    return float((a * b).sum(axis=1).min())
+
+
+def ranking_agreement(reference: np.ndarray, candidate: np.ndarray, k: int) -> float:
+    """Fraction of the reference top-*k* that the candidate also ranks top-*k*."""
+    k = min(k, len(reference))
+    if k == 0:
+        return 1.0
+    top_ref = set(np.argsort(-np.asarray(reference))[:k].tolist())
+    top_new = set(np.argsort(-np.asarray(candidate))[:k].tolist())
+    return len(top_ref & top_new) / k
@@ -2,21 +2,152 @@
 
 Keeping prompt code separate makes it easier to A/B-test wording,
 share helpers across endpoints, and unit-test token budgeting.
+
+Context is packed into a token budget rather than cut to a fixed number of
+characters per snippet: :func:`pack_context` walks the snippets best
+rerank score first and adds their sentences while they fit, skipping
+sentences that repeat one already packed (chunk overlap, near-duplicate
+articles).  Tokens are counted with ``PROMPT_TOKENIZER`` – the Hugging Face
+name or path of the LLM's tokenizer – or, when unset or unavailable, with
+the words-plus-punctuation estimate of :func:`app.metadata.count_tokens`.
 """
 
 from __future__ import annotations
 
-import textwrap
-from typing import List, Dict
+import functools
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+from prometheus_client import Histogram
+
+from .logger import logger
+from .metadata import count_tokens as estimate_tokens
 
 SYSTEM_MSG: str = (
     "You are a concise yet thorough Stripe support agent. "
     "Answer **only** from the provided context. "
     "If the question cannot be answered from the context, say so."
 )
+# Every prompt starts with these exact bytes and only varies after them, so
+# Ollama can reuse the KV cache of this prefix across requests – keep
+# anything per-request (dates, ids, the question) out of it.
+PROMPT_PREFIX: str = f"{SYSTEM_MSG}\n\n### Context\n"
+
+# Whole-prompt token budget (system message + context + question); 0 = no limit
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1536"))
+PROMPT_TOKENIZER    = os.getenv("PROMPT_TOKENIZER", "")
+# Word-set Jaccard at which a sentence counts as a repeat of a packed one
+REDUNDANCY_THRESHOLD = float(os.getenv("PROMPT_REDUNDANCY_THRESHOLD", "0.85"))
+
+PROMPT_TOKENS = Histogram(
+    "prompt_tokens",
+    "Tokens in the prompt sent to the LLM",
+    buckets=(128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096),
+)
+PROMPT_SENTENCES_DROPPED = Histogram(
+    "prompt_sentences_dropped",
+    "Context sentences left out of a prompt, by reason",
+    ["reason"],  # redundant | budget
+    buckets=(0, 1, 2, 5, 10, 20, 50),
+)
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_WORD = re.compile(r"\w+")
+
+
+@functools.lru_cache(maxsize=1)
+def token_counter() -> Callable[[str], int]:
+    """Token count function of ``PROMPT_TOKENIZER``, else the regex estimate."""
+    if PROMPT_TOKENIZER:
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(PROMPT_TOKENIZER)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+        except Exception as e:  # missing package / offline / unknown name
+            logger.warning("prompt_tokenizer_unavailable", tokenizer=PROMPT_TOKENIZER, error=str(e))
+    return estimate_tokens
+
+
+def _sentences(text: str) -> List[str]:
+    return [s for s in (" ".join(p.split()) for p in _SENTENCE.split(text)) if s]
+
+
+def _redundant(words: set, norm: str, packed_words: List[set], packed_text: str) -> bool:
+    # exact repeat, or a fragment of a packed sentence (e.g. the start of an overlapping chunk)
+    if f"\n{norm}\n" in packed_text or (len(words) >= 4 and norm in packed_text):
+        return True
+    return any(len(words & w) >= REDUNDANCY_THRESHOLD * len(words | w) for w in packed_words)
+
 
+def _truncate(sentence: str, room: int, count: Callable[[str], int]) -> str:
+    """Longest word prefix of *sentence* (plus ``…``) within *room* tokens."""
+    words = sentence.split()
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count(" ".join(words[:mid]) + "…") <= room:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) + "…" if lo else ""
 
-def build_prompt(question: str, context_snips: List[Dict]) -> str:  # type: ignore[name-defined]
+
+def pack_context(
+    context_snips: List[Dict],
+    budget: Optional[int],
+    count: Optional[Callable[[str], int]] = None,
+) -> List[str]:
+    """Snippet texts that fit *budget* tokens, best ``score`` first.
+
+    Each snippet contributes the sentences that still fit and are not
+    redundant; snippets left with none are dropped.  ``None`` or ``0`` means
+    no budget (only redundant sentences are removed).
+    """
+    counter: Callable[[str], int] = count or token_counter()
+    room: float = budget if budget else float("inf")
+    ranked = sorted(context_snips, key=lambda s: s.get("score", 0.0), reverse=True)
+    packed: List[str] = []
+    packed_words: List[set] = []
+    packed_text = "\n"
+    dropped = {"redundant": 0, "budget": 0}
+    for snip in ranked:
+        kept: List[str] = []
+        for sentence in _sentences(snip["text"]):
+            norm = sentence.casefold()
+            words = set(_WORD.findall(norm))
+            if _redundant(words, norm, packed_words, packed_text):
+                dropped["redundant"] += 1
+                continue
+            cost = counter(sentence) + 1                     # + separator / bullet
+            if cost > room:
+                if not packed and not kept:                  # never send the best snippet empty
+                    sentence = _truncate(sentence, int(room) - 1, counter)
+                    cost = counter(sentence) + 1 if sentence else 0
+                if not sentence or cost > room:
+                    dropped["budget"] += 1
+                    continue
+            kept.append(sentence)
+            packed_words.append(words)
+            packed_text += norm + "\n"
+            room -= cost
+        if kept:
+            packed.append(" ".join(kept))
+    for reason, n in dropped.items():
+        PROMPT_SENTENCES_DROPPED.labels(reason).observe(n)
+    return packed
+
+
+def _render(question: str, bullets: str) -> str:
+    return (
+        f"{PROMPT_PREFIX}{bullets}\n\n"
+        f"### Question\n{question}\n\n"
+        "### Answer (markdown):"
+    )
+
+
+def build_prompt(question: str, context_snips: List[Dict], budget: Optional[int] = None) -> str:  # type: ignore[name-defined]
     """Compose the final prompt fed to the LLM.
 
     Parameters
@@ -24,23 +155,25 @@ def build_prompt(question: str, context_snips: List[Dict]) -> str:  # type: igno
     question : str
         The end-user question.
     context_snips : list of dicts
-        Each dict must have at least a ``text`` field; an optional
-        ``score`` is ignored here but handy for debugging.
+        Each dict must have at least a ``text`` field; ``score`` (rerank
+        score) decides which snippets get the token budget first.
+    budget : int, optional
+        Token budget of the whole prompt; defaults to ``PROMPT_TOKEN_BUDGET``.
 
     Returns
     -------
     str
         The full prompt string.
     """
+    count = token_counter()
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    # the budget left for context once the fixed parts are in
+    context_budget = max(budget - count(_render(question, "")), 1) if budget else None
 
-    bullets = "\n".join(
-        f"- {textwrap.shorten(s['text'], width=300, placeholder='…')}"  # noqa: E501
-        for s in context_snips
-    )
+    snippets = pack_context(context_snips, context_budget, count)
+    prompt = _render(question, "\n".join(f"- {s}" for s in snippets))
 
-    return (
-        f"{SYSTEM_MSG}\n\n"
-        f"### Context\n{bullets}\n\n"
-        f"### Question\n{question}\n\n"
-        "### Answer (markdown):"
-    )
+    tokens = count(prompt)
+    PROMPT_TOKENS.observe(tokens)
+    logger.debug("prompt_built", tokens=tokens, snippets=len(snippets), retrieved=len(context_snips))
+    return prompt
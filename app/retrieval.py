@@ -1,66 +1,520 @@
 # app/retrieval.py
 """
-Vector search  ➜  rerank  ➜  build prompt  ➜  call Ollama
+Vector (+ BM25) search  ➜  rerank  ➜  build prompt  ➜  call Ollama
 Exposes a single async function:  get_answer(question:str) -> (markdown, sources)
 """
 
-import os, pathlib, asyncio, json, textwrap
+import os, pathlib, asyncio, json, textwrap, hashlib, threading
+from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 import requests, faiss, numpy as np
 from sentence_transformers import SentenceTransformer, CrossEncoder
 from .ollama_client import generate as call_ollama, stream_generate as call_ollama_stream
 from .prompt import build_prompt
 from .logger import logger
+from .batching import MicroBatcher
+from .executor import RetrievalExecutor
+from .cache import LRUCache, SemanticCache, normalize_query
+from .singleflight import SingleFlight, StreamFlight
+from .ann import set_search_params
+from . import store
+from . import artifacts
+from . import sparse
+from . import metadata
+from .loader import BackgroundLoader
+from .onnx_backend import OnnxEmbedder, OnnxCrossEncoder
+from prometheus_client import Counter, Info
 
 # ─── artefact paths ───────────────────────────────────────────────────────
+# The active version lives in ART_DIR/versions/<v>/ (see app/artifacts.py),
+# or directly in ART_DIR for the legacy flat layout.
 BASE_DIR   = pathlib.Path(__file__).resolve().parent.parent
 ART_DIR    = BASE_DIR / "artifacts"
-INDEX_FILE = ART_DIR / "faiss.idx"
 META_FILE  = ART_DIR / "meta.npy"
 
-# ─── load index & models once at import time ──────────────────────────────
-logger.info("loading_index", details="Loading FAISS index & embeddings …")
-INDEX   = faiss.read_index(str(INDEX_FILE))
-TEXTS   = np.load(META_FILE, allow_pickle=True)
-EMBED   = SentenceTransformer("intfloat/e5-base-v2")
-RERANK  = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+# mmap lets IVF inverted lists stay on disk and be shared via the page cache
+FAISS_MMAP = os.getenv("FAISS_MMAP", "1") != "0"
+
+def _read_index(path: pathlib.Path):
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if FAISS_MMAP else 0
+    return faiss.read_index(str(path), flags)
+
+def _open_texts(art_dir: pathlib.Path):
+    """mmap'd passage store, falling back to a legacy pickled meta.npy."""
+    if store.exists(art_dir):
+        return store.PassageStore(art_dir)
+    logger.warning("legacy_meta_npy", details="passages.bin missing; loading pickled meta.npy (run `python -m app.store`)")
+    return np.load(art_dir / META_FILE.name, allow_pickle=True)
+
+# ─── models & index, loaded in the background (see app/loader.py) ─────────
+EMBED_MODEL  = os.getenv("EMBED_MODEL", "intfloat/e5-base-v2")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+# "torch" (default) or "onnx" – the latter loads scripts/export_onnx.py output
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "torch")
+ONNX_DIR          = pathlib.Path(os.getenv("ONNX_DIR", str(ART_DIR / "onnx")))
+ONNX_QUANTIZED    = os.getenv("ONNX_QUANTIZED", "0") == "1"
+
+# Query-time knobs for IVF / HNSW indexes (ignored by the flat index)
+FAISS_NPROBE    = int(os.getenv("FAISS_NPROBE", "0"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "0"))
+
+# Hybrid retrieval: BM25 (app/sparse.py) runs beside the dense search when the
+# version has a bm25.npz; the two rankings are merged by reciprocal rank fusion
+# (constant RRF_K) before the cross-encoder.  HYBRID_SEARCH=0 → dense only.
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") != "0"
+RRF_K         = int(os.getenv("RRF_K", "60"))
+
+class IndexSnapshot:
+    """FAISS index + passages of one artefact version, swapped as a unit.
+
+    Requests read ``SNAPSHOT`` once and keep that object, so a reload never
+    mixes versions within a request and in-flight work finishes on the
+    version it started with.
+    """
+
+    def __init__(self, version: str, path: pathlib.Path):
+        self.version = version
+        self.path    = path
+        self.index   = None
+        self.texts   = None
+        self.sparse  = None
+        self.meta    = None
+
+    def load_index(self):
+        index = _read_index(self.path / artifacts.INDEX_NAME)
+        set_search_params(index, nprobe=FAISS_NPROBE or None, ef_search=FAISS_EF_SEARCH or None)
+        self.index = index
+
+    def load_texts(self):
+        self.texts = _open_texts(self.path)
+        # url / title / article / tokens columns; absent for pre-metadata builds
+        self.meta = metadata.PassageMetadata.load(self.path) if metadata.exists(self.path) else None
+
+    def load_sparse(self):
+        """BM25 index of this version, if it was built with one."""
+        self.sparse = sparse.BM25Index.load(self.path) if HYBRID_SEARCH and sparse.exists(self.path) else None
+
+SNAPSHOT = None
+EMBED    = None
+RERANK   = None
+
+_SNAPSHOT_LOCK = threading.Lock()
+
+INDEX_INFO = Info("index", "Artefact version currently serving queries")
+INDEX_RELOADS = Counter(
+    "index_reloads_total",
+    "Hot index reload attempts",
+    ["result"],
+)
+
+def _startup_snapshot() -> IndexSnapshot:
+    """Snapshot the loader fills in; its version is resolved once."""
+    global SNAPSHOT
+    with _SNAPSHOT_LOCK:
+        if SNAPSHOT is None:
+            SNAPSHOT = IndexSnapshot(*artifacts.current(ART_DIR))
+            INDEX_INFO.info({"version": SNAPSHOT.version})
+    return SNAPSHOT
+
+def _load_index():
+    _startup_snapshot().load_index()
+
+def _load_passages():
+    _startup_snapshot().load_texts()
+
+def _load_sparse():
+    _startup_snapshot().load_sparse()
+
+def _load_embedder():
+    global EMBED
+    if RETRIEVAL_BACKEND == "onnx":
+        EMBED = OnnxEmbedder(ONNX_DIR / "embedder", quantized=ONNX_QUANTIZED)
+    else:
+        EMBED = SentenceTransformer(EMBED_MODEL)
+
+def _load_reranker():
+    global RERANK
+    if RETRIEVAL_BACKEND == "onnx":
+        RERANK = OnnxCrossEncoder(ONNX_DIR / "reranker", quantized=ONNX_QUANTIZED)
+    else:
+        RERANK = CrossEncoder(RERANK_MODEL)
+
+LOADER = BackgroundLoader()
+LOADER.add("index", _load_index)
+LOADER.add("passages", _load_passages)
+LOADER.add("sparse", _load_sparse)
+LOADER.add("embedder", _load_embedder)
+LOADER.add("reranker", _load_reranker)
 
 # ─── Ollama config ────────────────────────────────────────────────────────
 OLLAMA_URL   = os.getenv("OLLAMA_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b-instruct-q5_K_M")
 
+# ─── micro-batching (see app/batching.py) ─────────────────────────────────
+BATCHING          = os.getenv("RETRIEVAL_BATCHING", "1") != "0"
+BATCH_MAX_SIZE    = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+def _encode_batch(queries):
+    """One embedder forward pass for many queries → (n, dim) float32."""
+    return np.asarray(EMBED.encode(list(queries), normalize_embeddings=True), dtype="float32")
+
+def _rerank_batch(groups):
+    """One cross-encoder forward pass for the pairs of many requests."""
+    flat   = [pair for pairs in groups for pair in pairs]
+    scores = RERANK.predict(flat) if flat else []
+    out, pos = [], 0
+    for pairs in groups:
+        out.append([float(s) for s in scores[pos:pos + len(pairs)]])
+        pos += len(pairs)
+    return out
+
+EMBED_BATCHER  = MicroBatcher(_encode_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="embed")
+RERANK_BATCHER = MicroBatcher(_rerank_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="rerank")
+
+# ─── query / result caches (see app/cache.py) ─────────────────────────────
+QUERY_CACHE_SIZE  = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_S = float(os.getenv("QUERY_CACHE_TTL_S", "3600"))
+
+# Semantic answer cache: off unless a similarity threshold is configured
+# (e.g. ANSWER_CACHE_THRESHOLD=0.95); hits skip retrieval *and* Ollama.
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0"))
+ANSWER_CACHE_SIZE      = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL_S     = float(os.getenv("ANSWER_CACHE_TTL_S", "3600"))
+
+# Cross-encoder scores per (normalised query, passage id) – one entry per pair
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+
+QVEC_CACHE   = LRUCache("query_vector", QUERY_CACHE_SIZE, QUERY_CACHE_TTL_S)
+CTX_CACHE    = LRUCache("retrieval", QUERY_CACHE_SIZE, QUERY_CACHE_TTL_S)
+RERANK_CACHE = LRUCache("rerank_score", RERANK_CACHE_SIZE, QUERY_CACHE_TTL_S)
+ANSWER_CACHE = SemanticCache("answer", ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_S)
+
+def invalidate_caches() -> None:
+    """Drop everything derived from the current index / models."""
+    QVEC_CACHE.clear()
+    CTX_CACHE.clear()
+    RERANK_CACHE.clear()
+    ANSWER_CACHE.clear()
+    logger.info("caches_invalidated", index_version=SNAPSHOT.version if SNAPSHOT else None)
+
+# ─── hot index reload (see app/artifacts.py) ──────────────────────────────
+# INDEX_WATCH_S > 0 polls artifacts/CURRENT and reloads when it moves;
+# POST /admin/reload triggers the same thing on demand.
+INDEX_WATCH_S = float(os.getenv("INDEX_WATCH_S", "0"))
+
+_RELOAD_LOCK = threading.Lock()
+
+# loader components that fill the snapshot; re-run together to recover it
+SNAPSHOT_COMPONENTS = ("index", "passages", "sparse")
+
+def _snapshot_loaded(snap: Optional[IndexSnapshot]) -> bool:
+    return snap is not None and snap.index is not None and snap.texts is not None
+
+def _recover_snapshot() -> dict:
+    """Re-run the components of a failed start-up against the current version."""
+    global SNAPSHOT
+    old = SNAPSHOT
+    with _SNAPSHOT_LOCK:
+        SNAPSHOT = None   # _startup_snapshot() resolves artifacts/CURRENT again
+    LOADER.retry(SNAPSHOT_COMPONENTS)
+    new = SNAPSHOT
+    if LOADER.failed or new is None:
+        INDEX_RELOADS.labels("error").inc()
+        logger.error("index_recovery_failed", components=LOADER.status()["components"])
+        LOADER.load()   # raises with the per-component errors
+        raise RuntimeError("index snapshot missing after recovery")
+    return {"version": new.version, "previous": old.version if old is not None else None}
+
+def reload_index(force: bool = False) -> dict:
+    """Load the current artefact version off to the side and swap it in.
+
+    Blocking – call it from a worker thread.  Queries keep using the old
+    snapshot while the new one loads; on failure the old one stays.  After
+    a failed start-up it re-runs the failed components instead, so a fixed
+    artefact can be loaded without a restart.
+    """
+    global SNAPSHOT
+    with _RELOAD_LOCK:
+        LOADER.wait()
+        if LOADER.failed:
+            result = _recover_snapshot()
+        else:
+            old = SNAPSHOT
+            if old is None:
+                raise RuntimeError("retrieval index is not loaded")
+            version, path = artifacts.current(ART_DIR)
+            if version == old.version and not force:
+                return {"version": version, "previous": old.version, "reloaded": False}
+            try:
+                new = IndexSnapshot(version, path)
+                new.load_index()
+                new.load_texts()
+                new.load_sparse()
+            except Exception as exc:
+                INDEX_RELOADS.labels("error").inc()
+                logger.error("index_reload_failed", version=version, error=f"{type(exc).__name__}: {exc}")
+                raise
+            SNAPSHOT = new   # single reference assignment → atomic for readers
+            result = {"version": new.version, "previous": old.version}
+        INDEX_INFO.info({"version": result["version"]})
+        INDEX_RELOADS.labels("ok").inc()
+        invalidate_caches()
+        EXECUTOR.recycle()   # process workers were forked with the old snapshot and caches
+        snap = SNAPSHOT
+        vectors = int(snap.index.ntotal) if snap is not None and snap.index is not None else 0
+        logger.info("index_reloaded", version=result["version"], previous=result["previous"], vectors=vectors)
+        return {**result, "reloaded": True}
+
+WATCHER = artifacts.VersionWatcher(ART_DIR, INDEX_WATCH_S, reload_index) if INDEX_WATCH_S > 0 else None
+
+def _embed(query: str) -> np.ndarray:
+    """Query vector, cached per normalised question and batched on a miss."""
+    LOADER.load()
+    key = normalize_query(query)
+    vec = QVEC_CACHE.get(key)
+    if vec is None:
+        vec = EMBED_BATCHER.submit(query) if BATCHING else _encode_batch([query])[0]
+        QVEC_CACHE.put(key, vec)
+    return vec
+
+def _query_hash(query: str) -> str:
+    return hashlib.blake2b(normalize_query(query).encode("utf-8"), digest_size=8).hexdigest()
+
+def _rerank(query: str, ids, passages, version=None):
+    """Cross-encoder scores for (query, passage) pairs.
+
+    Scores are cached per (index *version*, query hash, passage id); only
+    pairs not seen before go to the cross-encoder, batched across
+    concurrent callers.
+    """
+    qh     = _query_hash(query)
+    keys   = [(version, qh, int(i)) for i in ids]
+    scores = [RERANK_CACHE.get(key) for key in keys]
+    todo   = [j for j, sc in enumerate(scores) if sc is None]
+    if todo:
+        pairs = [[query, passages[j]] for j in todo]
+        fresh = RERANK_BATCHER.submit(pairs) if BATCHING else _rerank_batch([pairs])[0]
+        for j, sc in zip(todo, fresh):
+            scores[j] = sc
+            RERANK_CACHE.put(keys[j], sc)
+    return scores
+
+# ─── retrieval executor (see app/executor.py) ─────────────────────────────
+RETRIEVAL_EXECUTOR        = os.getenv("RETRIEVAL_EXECUTOR", "thread")
+RETRIEVAL_WORKERS         = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+RETRIEVAL_MAX_CONCURRENCY = int(os.getenv("RETRIEVAL_MAX_CONCURRENCY", str(RETRIEVAL_WORKERS)))
+
+EXECUTOR = RetrievalExecutor(RETRIEVAL_EXECUTOR, RETRIEVAL_WORKERS, RETRIEVAL_MAX_CONCURRENCY)
+
+# BM25 runs here while the calling thread embeds the query and searches FAISS
+SPARSE_POOL = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="bm25")
+
+# ─── adaptive overfetch / rerank early-exit ───────────────────────────────
+# Off by default. When on, the dense (FAISS) scores decide how many
+# candidates the cross-encoder sees:
+#   skip   – k-th vs (k+1)-th dense score gap ≥ ADAPTIVE_SKIP_MARGIN → no rerank
+#   shrink – gap ≥ ADAPTIVE_SHRINK_MARGIN → rerank only 2·k candidates
+#   widen  – top-1 vs last default candidate spread ≤ ADAPTIVE_FLAT_SPREAD
+#            → rerank k·ADAPTIVE_MAX_OVERFETCH candidates
+#   full   – otherwise, the usual k·overfetch
+ADAPTIVE_RERANK        = os.getenv("ADAPTIVE_RERANK", "0") == "1"
+ADAPTIVE_SKIP_MARGIN   = float(os.getenv("ADAPTIVE_SKIP_MARGIN", "0.15"))
+ADAPTIVE_SHRINK_MARGIN = float(os.getenv("ADAPTIVE_SHRINK_MARGIN", "0.05"))
+ADAPTIVE_FLAT_SPREAD   = float(os.getenv("ADAPTIVE_FLAT_SPREAD", "0.02"))
+ADAPTIVE_MAX_OVERFETCH = int(os.getenv("ADAPTIVE_MAX_OVERFETCH", "10"))
+
+RERANK_PATH = Counter(
+    "retrieval_rerank_path_total",
+    "Retrieval requests by rerank path (full, shrink, widen, skip)",
+    ["path"],
+)
+
+def _plan_rerank(dense, k: int, overfetch: int):
+    """Pick the rerank path from descending dense scores → (path, n_candidates)."""
+    n_default = min(len(dense), k * overfetch)
+    if len(dense) <= k:
+        return "full", len(dense)
+    margin = float(dense[k - 1] - dense[k])
+    if margin >= ADAPTIVE_SKIP_MARGIN:
+        return "skip", 0
+    if float(dense[0] - dense[n_default - 1]) <= ADAPTIVE_FLAT_SPREAD:
+        return "widen", len(dense)
+    if margin >= ADAPTIVE_SHRINK_MARGIN:
+        return "shrink", min(n_default, 2 * k)
+    return "full", n_default
+
+
 # ─── helpers ──────────────────────────────────────────────────────────────
+def _retrieve(query: str, k: int = 4, overfetch: int = 5, adaptive=None):
+    """Vector (+ BM25) search + cross-encoder rerank → (top-k paragraphs, rerank path).
+
+    When the snapshot has a BM25 index, the dense and lexical rankings are
+    fused with RRF and the cross-encoder sees the fused head.  With
+    *adaptive* (default: ``ADAPTIVE_RERANK``) the candidate set may be
+    shrunk, widened or not reranked at all; skipped requests return the
+    fused top-k with RRF scores (dense cosine scores without BM25) instead
+    of cross-encoder scores.
+    """
+    LOADER.load()  # no-op once loaded; blocks direct callers during start-up
+    snap     = SNAPSHOT  # one version for the whole request, even across a reload
+    if snap is None or snap.index is None or snap.texts is None:
+        raise RuntimeError("retrieval index is not loaded")
+    index, texts = snap.index, snap.texts
+    adaptive = ADAPTIVE_RERANK if adaptive is None else adaptive
+
+    # Entries are keyed by index version so a new index never serves stale ctx
+    key    = (snap.version, normalize_query(query), k, overfetch, adaptive)
+    cached = CTX_CACHE.get(key)
+    if cached is not None:
+        return [dict(s) for s in cached], "cached"
+
+    fetch    = k * (max(overfetch, ADAPTIVE_MAX_OVERFETCH) if adaptive else overfetch)
+    lexical  = SPARSE_POOL.submit(snap.sparse.search, query, fetch) if snap.sparse is not None else None
+    q_vec_np = _embed(query)[None, :]
+    dist, idx = index.search(q_vec_np, fetch)
+
+    keep  = idx[0] >= 0                      # FAISS pads short results with -1
+    ids   = [int(i) for i in idx[0][keep]]
+    dense = dist[0][keep]
+    path, n = _plan_rerank(dense, k, overfetch) if adaptive else ("full", len(ids))
+    RERANK_PATH.labels(path).inc()
+
+    fused = sparse.rrf([ids, lexical.result()[0]], RRF_K) if lexical is not None else None
+    if n == 0 and fused is not None:
+        ranked = [(i, texts[i], score) for i, score in fused[:k]]
+    elif n == 0:
+        ranked = [(i, texts[i], float(d)) for i, d in zip(ids[:k], dense[:k])]
+    else:
+        if fused is not None:
+            ids = [i for i, _ in fused]
+        ids      = ids[:n]
+        passages = [texts[i] for i in ids]
+        scores   = _rerank(query, ids, passages, snap.version)
+        ranked   = sorted(
+            zip(ids, passages, scores),
+            key=lambda x: x[2],
+            reverse=True,
+        )[:k]
+    ctx = [{"id": i, "text": p, "score": float(s)} for i, p, s in ranked]
+    if snap.meta is not None and ctx:
+        cols = snap.meta.columns([s["id"] for s in ctx])
+        for name, values in cols.items():
+            for s, v in zip(ctx, values):
+                s[name] = v
+    CTX_CACHE.put(key, [dict(s) for s in ctx])
+    return ctx, path
+
 def _search(query: str, k: int = 4, overfetch: int = 5):
     """Vector search + cross-encoder rerank → top-k paragraphs."""
-    q_vec_np = np.asarray(EMBED.encode([query], normalize_embeddings=True), dtype="float32")
-    _, idx = INDEX.search(q_vec_np, k * overfetch)
-
-    passages = [TEXTS[i] for i in idx[0]]
-    scores   = RERANK.predict([[query, p] for p in passages])
-    ranked   = sorted(
-        zip(passages, [float(s) for s in scores]),
-        key=lambda x: x[1],
-        reverse=True,
-    )[:k]
-    return [{"text": p, "score": float(s)} for p, s in ranked]
+    return _retrieve(query, k, overfetch)[0]
+
+def _index_version() -> Optional[str]:
+    snap = SNAPSHOT
+    return snap.version if snap is not None else None
+
+async def _cached_answer(question: str):
+    """Look *question* up in the semantic answer cache.
+
+    Returns ``(q_vec, hit)``; ``q_vec`` is ``None`` when the cache is off and
+    ``hit`` is ``(answer, ctx)`` or ``None``.  Answers are tagged with the
+    index version they were generated from and only served on that version.
+    """
+    if not ANSWER_CACHE.enabled:
+        return None, None
+    q_vec = await EXECUTOR.run(_embed, question)
+    found = ANSWER_CACHE.lookup(q_vec)
+    if found is None:
+        return q_vec, None
+    (version, answer, ctx), similarity = found
+    if version != _index_version():   # written by a request that outlived a reload
+        return q_vec, None
+    logger.info("answer_cache_hit", similarity=round(similarity, 4))
+    return q_vec, (answer, [dict(s) for s in ctx])
+
+def _remember_answer(q_vec, answer: str, ctx, version: Optional[str]) -> None:
+    # a reload since the request started means ctx may come from the old index
+    if q_vec is not None and answer.strip() and version == _index_version():
+        ANSWER_CACHE.add(q_vec, (version, answer, [dict(s) for s in ctx]))
+
+# ─── request coalescing (see app/singleflight.py) ─────────────────────────
+# Concurrent requests for the same normalised question on the same index
+# version share one retrieval + generation; streams fan out the leader's
+# tokens.  COALESCE_REQUESTS=0 disables.
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") != "0"
+ANSWER_FLIGHTS = SingleFlight("answer")
+STREAM_FLIGHTS = StreamFlight("stream")
+
+def _flight_key(question: str, llm: Dict):
+    return (_index_version(), normalize_query(question), json.dumps(llm, sort_keys=True))
+
+def _llm_kwargs(options: Optional[Dict], keep_alive: Optional[str]) -> Dict[str, Any]:
+    """Per-request Ollama overrides – only those actually given."""
+    llm: Dict[str, Any] = {}
+    if options:
+        llm["options"] = options
+    if keep_alive is not None:
+        llm["keep_alive"] = keep_alive
+    return llm
+
+async def _cached_answer_for(question: str, llm: Dict):
+    # answers generated with other model options are not interchangeable
+    return (None, None) if llm.get("options") else await _cached_answer(question)
 
 # ─── public API ───────────────────────────────────────────────────────────
-async def get_answer(question: str):
+async def get_answer(question: str, options: Optional[Dict] = None, keep_alive: Optional[str] = None):
     """
     Returns (markdown_answer, source_snippets)
-    source_snippets: List[{"text": str, "score": float}]
+    source_snippets: List[{"id", "text", "score"} + {"url", "title", "article", "tokens", "start", "end"}
+                     when the index version has passage metadata]
+    options / keep_alive override the Ollama defaults for this request.
     """
-    ctx = _search(question)
+    llm = _llm_kwargs(options, keep_alive)
+    if not COALESCE_REQUESTS:
+        return await _answer(question, llm)
+    answer, ctx = await ANSWER_FLIGHTS.do(_flight_key(question, llm), lambda: _answer(question, llm))
+    return answer, [dict(s) for s in ctx]
+
+async def _answer(question: str, llm: Dict):
+    version = _index_version()
+    q_vec, hit = await _cached_answer_for(question, llm)
+    if hit is not None:
+        return hit
+
+    ctx = await EXECUTOR.run(_search, question)
     prompt = build_prompt(question, ctx)
-    answer = await call_ollama(prompt)
+    answer = await call_ollama(prompt, **llm)
+    _remember_answer(q_vec, answer, ctx, version)
     return answer, ctx
 
 # ─── streaming variant ───────────────────────────────────────────────────
-async def stream_answer(question: str):
+async def stream_answer(question: str, options: Optional[Dict] = None, keep_alive: Optional[str] = None):
     """Async generator yielding answer chunks; yields sources at end as JSON string."""
-    ctx = _search(question)
+    llm = _llm_kwargs(options, keep_alive)
+    if COALESCE_REQUESTS:
+        chunks = STREAM_FLIGHTS.subscribe(_flight_key(question, llm), lambda: _stream_answer(question, llm))
+    else:
+        chunks = _stream_answer(question, llm)
+    async for chunk in chunks:
+        yield chunk
+
+async def _stream_answer(question: str, llm: Dict):
+    version = _index_version()
+    q_vec, hit = await _cached_answer_for(question, llm)
+    if hit is not None:
+        answer, ctx = hit
+        yield answer
+        yield "\n\n[SOURCES] " + json.dumps(ctx)
+        return
+
+    ctx = await EXECUTOR.run(_search, question)
     prompt = build_prompt(question, ctx)
 
-    async for chunk in call_ollama_stream(prompt):
+    chunks = []
+    async for chunk in call_ollama_stream(prompt, **llm):
+        chunks.append(chunk)
         yield chunk
+    _remember_answer(q_vec, "".join(chunks), ctx, version)
     # After streaming answer, append newline and JSON sources
     yield "\n\n[SOURCES] " + json.dumps(ctx)
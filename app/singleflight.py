@@ -0,0 +1,162 @@
+"""Single-flight coalescing of identical in-flight requests.
+
+When a question spikes, every copy of it would retrieve, rerank and wait on
+Ollama for the same answer.  :class:`SingleFlight` runs the work once per
+key: the first caller (the leader) starts it as a task and concurrent
+callers with the same key (followers) await that task instead.
+:class:`StreamFlight` does the same for async generators – the leader's
+chunks go to a fan-out buffer that every subscriber replays from the start
+and then follows live, so a follower joining mid-stream still receives the
+whole answer.
+
+The work runs in its own task, so one caller disconnecting does not cancel
+it for the others; it is cancelled only once every caller has gone.  A key
+is forgotten as soon as its work finishes – this is not a cache.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import (Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Generic, Hashable, List,
+                    Optional, TypeVar)
+
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+FLIGHT_REQUESTS = Counter(
+    "singleflight_requests_total",
+    "Requests by coalescing group and role (leader ran the work, follower shared it)",
+    ["group", "role"],
+)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+def _consume(task: asyncio.Task) -> None:
+    """Mark a finished task's exception as retrieved (callers may all have left)."""
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Share one execution of a coroutine function among concurrent callers per key.
+
+    Every caller receives the same result object (or exception); copy it if
+    callers may mutate it.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key: Hashable, call: _Call, task: asyncio.Task) -> None:
+        self._forget(key, call)
+        _consume(task)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()``, or the run already in flight for *key*."""
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(functools.partial(self._finished, key, call))
+            FLIGHT_REQUESTS.labels(self.name, "leader").inc()
+        else:
+            FLIGHT_REQUESTS.labels(self.name, "follower").inc()
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()   # every caller went away
+
+
+class _Broadcast(Generic[T]):
+    """Chunks produced so far plus the signal for the next one."""
+
+    def __init__(self) -> None:
+        self.chunks: List[T] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.wake = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        self.wake.set()
+        self.wake = asyncio.Event()
+
+
+class StreamFlight:
+    """Fan one async generator out to every concurrent subscriber of a key."""
+
+    def __init__(self, name: str = "stream"):
+        self.name = name
+        self._streams: Dict[Hashable, _Broadcast] = {}
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def _forget(self, key: Hashable, b: _Broadcast) -> None:
+        if self._streams.get(key) is b:
+            del self._streams[key]
+
+    def _finished(self, key: Hashable, b: _Broadcast, task: asyncio.Task) -> None:
+        self._forget(key, b)   # also if the pump was cancelled before it started
+
+    async def _pump(self, key: Hashable, b: _Broadcast, fn: Callable[[], AsyncGenerator[Any, None]]) -> None:
+        gen = fn()
+        try:
+            async for chunk in gen:
+                b.chunks.append(chunk)
+                b.notify()
+        except Exception as e:
+            b.error = e
+        finally:
+            b.done = True
+            self._forget(key, b)
+            b.notify()
+            await gen.aclose()
+
+    async def subscribe(self, key: Hashable, fn: Callable[[], AsyncGenerator[T, None]]) -> AsyncIterator[T]:
+        """Yield every chunk of ``fn()``, or of the stream already in flight for *key*."""
+        b = self._streams.get(key)
+        if b is None:
+            b = self._streams[key] = _Broadcast()
+            b.task = asyncio.ensure_future(self._pump(key, b, fn))
+            b.task.add_done_callback(functools.partial(self._finished, key, b))
+            FLIGHT_REQUESTS.labels(self.name, "leader").inc()
+        else:
+            FLIGHT_REQUESTS.labels(self.name, "follower").inc()
+        b.subscribers += 1
+        i = 0
+        try:
+            while True:
+                if i < len(b.chunks):
+                    yield b.chunks[i]
+                    i += 1
+                elif b.done:
+                    break
+                else:
+                    await b.wake.wait()
+            if b.error is not None:
+                raise b.error
+        finally:
+            b.subscribers -= 1
+            if not b.subscribers and b.task is not None and not b.task.done():
+                b.task.cancel()   # every subscriber went away
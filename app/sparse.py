@@ -0,0 +1,141 @@
+"""Precomputed BM25 inverted index for hybrid retrieval.
+
+Dense search misses exact tokens – error codes (``card_declined``), API
+fields (``payment_intent``), country names – that a lexical match finds
+trivially.  ``scripts/build_index.py`` writes a BM25 index next to
+``faiss.idx``:
+
+* ``bm25.npz``        – ``scipy.sparse`` CSR matrix, one row per term, one
+  column per passage label, holding the *final* BM25 weight of that term in
+  that passage (idf and length normalisation already applied).
+* ``bm25.vocab.json`` – the terms in row order plus ``k1`` / ``b``.
+
+A query is then a row gather plus one ``np.bincount`` over the postings of
+its terms, proportional to the postings touched rather than to the corpus.
+:func:`rrf` merges the BM25 and dense rankings by reciprocal rank fusion.
+"""
+
+from __future__ import annotations
+
+import array
+import collections
+import json
+import os
+import pathlib
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+MATRIX_NAME = "bm25.npz"
+VOCAB_NAME  = "bm25.vocab.json"
+
+PathLike = Union[str, os.PathLike]
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Casefolded word tokens; ``_`` is kept, so ``card_declined`` stays one term."""
+    return _TOKEN.findall(text.casefold())
+
+
+def exists(art_dir: PathLike) -> bool:
+    art_dir = pathlib.Path(art_dir)
+    return (art_dir / MATRIX_NAME).exists() and (art_dir / VOCAB_NAME).exists()
+
+
+class BM25Index:
+    """Term × passage matrix of BM25 weights; ``search`` returns label ids."""
+
+    def __init__(self, matrix: sparse.csr_matrix, terms: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.matrix = matrix
+        self.terms  = list(terms)
+        self.vocab: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self.k1, self.b = k1, b
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """Index *texts*; the i-th text becomes passage label *i* (``""`` for holes)."""
+        vocab: Dict[str, int] = {}
+        rows, cols, tfs = array.array("i"), array.array("i"), array.array("f")
+        lengths = array.array("i")
+        for doc, text in enumerate(texts):
+            counts = collections.Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, freq in counts.items():
+                rows.append(vocab.setdefault(term, len(vocab)))
+                cols.append(doc)
+                tfs.append(freq)
+
+        dl  = np.frombuffer(lengths, dtype=np.int32).astype(np.float32)
+        n   = int((dl > 0).sum())                            # holes are not documents
+        avg = float(dl[dl > 0].mean()) if n else 1.0
+        r   = np.frombuffer(rows, dtype=np.int32)
+        c   = np.frombuffer(cols, dtype=np.int32)
+        tf  = np.frombuffer(tfs, dtype=np.float32)
+
+        df  = np.bincount(r, minlength=len(vocab)).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))          # Lucene's non-negative idf
+        w   = idf[r] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl[c] / avg))
+        matrix = sparse.csr_matrix((w.astype(np.float32), (r, c)), shape=(len(vocab), len(lengths)))
+        terms = sorted(vocab, key=vocab.__getitem__)
+        return cls(matrix, terms, k1, b)
+
+    def save(self, out_dir: PathLike) -> None:
+        out_dir = pathlib.Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        sparse.save_npz(out_dir / MATRIX_NAME, self.matrix)
+        (out_dir / VOCAB_NAME).write_text(
+            json.dumps({"k1": self.k1, "b": self.b, "terms": self.terms}, ensure_ascii=False), encoding="utf-8"
+        )
+
+    @classmethod
+    def load(cls, art_dir: PathLike) -> "BM25Index":
+        art_dir = pathlib.Path(art_dir)
+        meta = json.loads((art_dir / VOCAB_NAME).read_text(encoding="utf-8"))
+        return cls(sparse.load_npz(art_dir / MATRIX_NAME).tocsr(), meta["terms"], meta["k1"], meta["b"])
+
+    @property
+    def n_docs(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(self, query: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-*n* ``(labels, scores)`` by BM25, best first; empty if no term matches."""
+        rows = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not rows or n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        postings = self.matrix[rows]
+        docs, inverse = np.unique(postings.indices, return_inverse=True)
+        scores = np.bincount(inverse, weights=postings.data).astype(np.float32)
+        if len(docs) > n:
+            top = np.argpartition(-scores, n - 1)[:n]
+            docs, scores = docs[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return docs[order].astype(np.int64), scores[order]
+
+
+def rrf(rankings: Iterable[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Reciprocal rank fusion: ``Σ 1 / (k + rank)`` over *rankings*, best first.
+
+    Ties keep the order in which ids were first seen, so the first ranking
+    (dense) breaks them.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            fused[int(doc)] = fused.get(int(doc), 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+if __name__ == "__main__":  # python -m app.sparse artifacts/  (index an existing passage store)
+    import sys
+
+    from .store import PassageStore
+
+    target = pathlib.Path(sys.argv[1] if len(sys.argv) > 1 else "artifacts")
+    passages = PassageStore(target)
+    index = BM25Index.build(passages[i] for i in range(len(passages)))
+    index.save(target)
+    print(f"✅  BM25 over {index.n_docs:,} passages, {len(index.terms):,} terms → {target / MATRIX_NAME}")
@@ -0,0 +1,102 @@
+"""Compact, memory-mapped passage store.
+
+Replaces the pickled ``meta.npy`` object array.  Passages live in two files
+next to ``faiss.idx``:
+
+* ``passages.bin``     – every passage as UTF-8, concatenated.
+* ``passages.off.npy`` – ``uint64`` offsets; passage *i* is
+  ``blob[off[i]:off[i+1]]``.
+
+Both are opened with ``mmap`` so start-up cost no longer depends on corpus
+size and the OS page cache shares one copy across uvicorn workers.  Nothing
+is unpickled, so a tampered artefact cannot execute code.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import pathlib
+from typing import Iterable, Union
+
+import numpy as np
+
+BLOB_NAME    = "passages.bin"
+OFFSETS_NAME = "passages.off.npy"
+
+PathLike = Union[str, os.PathLike]
+
+
+def write_store(texts: Iterable[str], out_dir: PathLike) -> int:
+    """Write *texts* as a passage store under *out_dir*; returns the count.
+
+    Texts are streamed to disk one at a time, so the corpus never has to
+    be held in memory as a single blob.
+    """
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    blob_tmp = out_dir / (BLOB_NAME + ".tmp")
+    offsets = [0]
+    with blob_tmp.open("wb") as f:
+        for text in texts:
+            data = text.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    off_tmp = out_dir / (OFFSETS_NAME + ".tmp.npy")
+    np.save(off_tmp, np.asarray(offsets, dtype=np.uint64))
+    # Swap both files in only once they are complete
+    os.replace(blob_tmp, out_dir / BLOB_NAME)
+    os.replace(off_tmp, out_dir / OFFSETS_NAME)
+    return len(offsets) - 1
+
+
+def convert_meta(meta_file: PathLike, out_dir: PathLike) -> int:
+    """One-off migration of a legacy pickled ``meta.npy`` into a store."""
+    texts = np.load(meta_file, allow_pickle=True)
+    return write_store((str(t) for t in texts), out_dir)
+
+
+def exists(art_dir: PathLike) -> bool:
+    art_dir = pathlib.Path(art_dir)
+    return (art_dir / BLOB_NAME).exists() and (art_dir / OFFSETS_NAME).exists()
+
+
+class PassageStore:
+    """Read-only, index-addressable view over a passage store.
+
+    ``store[i]`` returns passage *i* as ``str`` – the same access pattern as
+    the old ``TEXTS`` object array, so callers need no changes.
+    """
+
+    def __init__(self, art_dir: PathLike):
+        art_dir = pathlib.Path(art_dir)
+        self.offsets: np.ndarray = np.load(art_dir / OFFSETS_NAME, mmap_mode="r")
+        self._file = (art_dir / BLOB_NAME).open("rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap refuses zero-length files; an empty store is still valid
+        self._blob: Union[mmap.mmap, bytes] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"passage id {i} out of range")
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+
+if __name__ == "__main__":  # python -m app.store artifacts/
+    import sys
+
+    target = pathlib.Path(sys.argv[1] if len(sys.argv) > 1 else "artifacts")
+    n = convert_meta(target / "meta.npy", target)
+    print(f"✅  Wrote {n:,} passages → {target / BLOB_NAME}")
@@ -1,6 +1,14 @@
 import sys, pathlib, pytest
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
 
+# Load index & models once, synchronously (the app lifespan does not run
+# under httpx.AsyncClient, so the background loader is never started there)
+@pytest.fixture(scope="session", autouse=True)
+def _load_retrieval():
+    from app import retrieval as retr
+    retr.LOADER.load()
+    yield
+
 # Avoid real HTTP calls to Ollama during tests
 @pytest.fixture(autouse=True)
 def _stub_ollama(monkeypatch):
@@ -0,0 +1,127 @@
+# app/tests/test_ann.py
+import numpy as np
+import pytest
+
+from app import ann
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(42)
+    vecs = rng.standard_normal((2000, 32)).astype("float32")
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+@pytest.mark.parametrize("kind", ann.INDEX_TYPES)
+def test_every_index_type_builds_and_searches(corpus, kind):
+    index = ann.build_index(corpus, kind=kind, nlist=16, pq_m=8, nprobe=16, ef_search=128)
+    assert index.ntotal == len(corpus)
+    _, ids = index.search(corpus[:5], 3)
+    assert ids.shape == (5, 3)
+
+
+def test_flat_benchmark_is_exact(corpus):
+    flat = ann.build_index(corpus, kind="flat")
+    report = ann.benchmark(flat, flat, corpus[:20], k=5)
+    assert report["recall"] == 1.0
+    assert report["p95_ms"] >= report["p50_ms"] > 0
+
+
+def test_nprobe_trades_recall(corpus):
+    flat = ann.build_index(corpus, kind="flat")
+    ivf = ann.build_index(corpus, kind="ivf", nlist=32, nprobe=1)
+    low = ann.benchmark(ivf, flat, corpus[:50], k=10)["recall"]
+    ann.set_search_params(ivf, nprobe=32)   # probing every list is exhaustive
+    full = ann.benchmark(ivf, flat, corpus[:50], k=10)["recall"]
+    assert full == pytest.approx(1.0)
+    assert low <= full
+
+
+def test_set_search_params_ignores_missing_knobs(corpus):
+    flat = ann.build_index(corpus[:100], kind="flat")
+    ann.set_search_params(flat, nprobe=4, ef_search=32)  # must not raise
+
+
+def test_unknown_type_rejected(corpus):
+    with pytest.raises(ValueError):
+        ann.build_index(corpus, kind="lsh")
+
+
+def test_format_report_lists_rows():
+    rows = {"flat (exact)": {"recall": 1.0, "mean_ms": 0.1, "p50_ms": 0.1, "p95_ms": 0.2, "bytes": 1e6}}
+    text = ann.format_report(rows, k=10)
+    assert "recall@10" in text and "flat (exact)" in text
+
+
+@pytest.mark.parametrize("kind", ann.INDEX_TYPES)
+def test_apply_delta_adds_and_removes_labels(corpus, kind):
+    ids = np.arange(1000, dtype="int64") + 100     # labels need not be row numbers
+    index = ann.build_index(corpus[:1000], kind=kind, nlist=16, pq_m=8, nprobe=16, ef_search=128, ids=ids)
+    _, found = index.search(corpus[:1], 1)
+    assert found[0, 0] == 100
+
+    index = ann.apply_delta(index, corpus[1000:1010], np.arange(5000, 5010), np.arange(100, 110))
+    assert index.ntotal == 1000
+    _, found = index.search(corpus[1000:1001], 5)
+    assert 5000 in found[0]
+    _, found = index.search(corpus[:10], 5)
+    assert not set(found.ravel().tolist()) & set(range(100, 110))
+
+
+def test_build_index_adds_memmap_in_chunks(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(ann, "ADD_CHUNK", 300)
+    np.save(tmp_path / "vecs.npy", corpus)
+    vecs = np.load(tmp_path / "vecs.npy", mmap_mode="r")
+    index = ann.build_index(vecs, kind="ivf", nlist=16, nprobe=16, ids=np.arange(len(corpus)))
+    assert index.ntotal == len(corpus)
+    _, found = index.search(corpus[1500:1501], 1)
+    assert found[0, 0] == 1500
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf", "hnsw"])
+def test_scalar_quantized_storage_shrinks_index(corpus, kind):
+    flat = ann.build_index(corpus, kind="flat")
+    sizes = {}
+    for storage in ann.STORAGE_TYPES:
+        index = ann.build_index(corpus, kind=kind, nlist=16, nprobe=16, ef_search=128, storage=storage)
+        report = ann.benchmark(index, flat, corpus[:50], k=10)
+        assert report["recall"] >= 0.9
+        sizes[storage] = report["bytes"]
+    assert sizes["int8"] < sizes["fp16"] < sizes["fp32"]
+
+
+@pytest.fixture(scope="module")
+def low_rank():
+    """Vectors whose signal lies in their first 8 dims."""
+    rng = np.random.default_rng(7)
+    vecs = np.hstack([rng.standard_normal((1500, 8)), 0.01 * rng.standard_normal((1500, 24))]).astype("float32")
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+@pytest.mark.parametrize("reduce", ann.REDUCE_TYPES)
+def test_dimension_reduction_keeps_recall_and_takes_full_queries(low_rank, reduce):
+    flat = ann.build_index(low_rank, kind="flat")
+    index = ann.build_index(low_rank, kind="flat", reduce=reduce, reduce_dim=8, storage="fp16")
+    assert index.d == low_rank.shape[1]
+    report = ann.benchmark(index, flat, low_rank[:50], k=10)
+    assert report["recall"] >= 0.8
+    assert report["bytes"] < ann.index_nbytes(flat) / 4
+
+
+def test_apply_delta_rebuilds_reduced_hnsw(low_rank):
+    layout = dict(storage="int8", reduce="pca", reduce_dim=8)
+    index = ann.build_index(low_rank[:1000], kind="hnsw", ids=np.arange(1000), **layout)
+    index = ann.apply_delta(index, low_rank[1000:1010], np.arange(5000, 5010), np.arange(10), **layout)
+    assert index.ntotal == 1000
+    _, found = index.search(low_rank[1000:1001], 5)
+    assert 5000 in found[0]
+    assert not set(index.search(low_rank[:10], 5)[1].ravel().tolist()) & set(range(10))
+
+
+def test_invalid_layouts_rejected(corpus):
+    with pytest.raises(ValueError):
+        ann.build_index(corpus, kind="ivfpq", pq_m=8, storage="int8")
+    with pytest.raises(ValueError):
+        ann.build_index(corpus, reduce="pca", reduce_dim=64)
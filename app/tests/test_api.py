@@ -144,3 +144,133 @@ async def test_mocked_streaming_answer(monkeypatch):
     assert "This is a mocked streaming answer" in text_response
     assert "It works correctly" in text_response
     assert "[SOURCES]" in text_response
+
+
+
+@pytest.mark.asyncio
+async def test_generation_options_reach_ollama(monkeypatch):
+    seen = {}
+
+    async def _fake_generate(prompt: str, **kwargs):
+        seen.update(kwargs)
+        return "ok"
+
+    from app import retrieval as retr
+    monkeypatch.setattr(retr, "call_ollama", _fake_generate)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/query", json={"question": "Options?", "options": {"num_predict": 64, "temperature": 0},
+                                          "keep_alive": "30m"})
+        assert r.status_code == 200
+        assert seen == {"options": {"num_predict": 64, "temperature": 0.0}, "keep_alive": "30m"}
+
+        bad = await ac.post("/query", json={"question": "Options?", "options": {"top_p": 2}})
+        assert bad.status_code == 422
+
+
+# ---------- readiness ------------------------------------------------------
+@pytest.mark.asyncio
+async def test_readyz_reports_components():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/readyz")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["status"] == "ready"
+    for name in ("index", "passages", "embedder", "reranker"):
+        assert data["components"][name]["state"] == "ready"
+        assert data["components"][name]["seconds"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_query_returns_503_while_loading(monkeypatch):
+    import threading
+    from app import main
+    from app.loader import BackgroundLoader
+
+    gate, started = threading.Event(), threading.Event()
+    loading = BackgroundLoader()
+    loading.add("embedder", lambda: (started.set(), gate.wait(5)))
+    loading.start()
+    assert started.wait(5)   # the loader thread has reached the embedder
+    monkeypatch.setattr(main, "RETRIEVAL_LOADER", loading)
+
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            q = await ac.post("/query", json={"question": "Too early?"})
+            s = await ac.post("/query/stream", json={"question": "Too early?"})
+            ready = await ac.get("/readyz")
+            health = await ac.get("/healthz")
+    finally:
+        gate.set()
+
+    assert q.status_code == 503 and s.status_code == 503
+    assert q.headers["Retry-After"] == main.RETRY_AFTER_S
+    assert ready.status_code == 503
+    assert ready.json()["components"]["embedder"]["state"] == "loading"
+    assert health.status_code == 200
+
+
+# ---------- hot reload -----------------------------------------------------
+@pytest.mark.asyncio
+async def test_admin_reload_requires_token_and_reports_version(monkeypatch):
+    from app import main
+
+    calls = []
+
+    def _fake_reload(force=False):
+        calls.append(force)
+        return {"version": "v8", "previous": "v7", "reloaded": True}
+
+    monkeypatch.setattr(main, "reload_index", _fake_reload)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        denied = await ac.post("/admin/reload")
+        ok = await ac.post("/admin/reload?force=true", headers={"X-Admin-Token": "s3cret"})
+
+    assert denied.status_code == 403
+    assert ok.status_code == 200
+    assert ok.json() == {"version": "v8", "previous": "v7", "reloaded": True}
+    assert calls == [True]
+
+
+@pytest.mark.asyncio
+async def test_admin_reload_is_disabled_without_a_token(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "reload_index", lambda force=False: pytest.fail("must not reload"))
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/admin/reload", headers={"X-Admin-Token": ""})
+
+    assert r.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_admin_reload_runs_after_a_failed_start_up(monkeypatch):
+    from app import main
+    from app.loader import BackgroundLoader
+
+    failed = BackgroundLoader()
+    failed.add("index", lambda: (_ for _ in ()).throw(OSError("faiss.idx corrupt")))
+    failed.wait(timeout=2)
+    monkeypatch.setattr(main, "RETRIEVAL_LOADER", failed)
+    monkeypatch.setattr(main, "reload_index", lambda force=False: {"version": "v2", "previous": None, "reloaded": True})
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "s3cret")
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        q = await ac.post("/query", json={"question": "Broken?"})
+        r = await ac.post("/admin/reload", headers={"X-Admin-Token": "s3cret"})
+
+    assert q.status_code == 503
+    assert r.status_code == 200 and r.json()["version"] == "v2"
+
+
+@pytest.mark.asyncio
+async def test_metrics_expose_index_version():
+    from app import retrieval
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/metrics")
+    assert f'index_info{{version="{retrieval.SNAPSHOT.version}"}} 1.0' in r.text
@@ -0,0 +1,62 @@
+# app/tests/test_artifacts.py
+import threading
+
+import pytest
+
+from app import artifacts
+
+
+def _make_version(art_dir, version):
+    d = artifacts.version_dir(art_dir, version)
+    d.mkdir(parents=True)
+    (d / artifacts.INDEX_NAME).write_bytes(version.encode())
+    return d
+
+
+def test_legacy_layout_uses_index_fingerprint(tmp_path):
+    (tmp_path / artifacts.INDEX_NAME).write_bytes(b"idx")
+    version, path = artifacts.current(tmp_path)
+    assert path == tmp_path
+    assert version.endswith("-3")                    # mtime-size
+    with pytest.raises(FileNotFoundError):
+        artifacts.current(tmp_path / "missing")
+
+
+def test_publish_switches_current_and_refuses_incomplete(tmp_path):
+    assert artifacts.next_version(tmp_path) == "v1"
+    _make_version(tmp_path, "v1")
+    artifacts.publish(tmp_path, "v1")
+    assert artifacts.current(tmp_path) == ("v1", tmp_path / "versions" / "v1")
+    assert artifacts.next_version(tmp_path) == "v2"
+
+    artifacts.version_dir(tmp_path, "v2").mkdir()    # half-written: no index yet
+    with pytest.raises(FileNotFoundError):
+        artifacts.publish(tmp_path, "v2")
+    assert artifacts.current(tmp_path)[0] == "v1"
+
+
+def test_prune_keeps_newest_and_current(tmp_path):
+    for n in range(1, 13):
+        _make_version(tmp_path, f"v{n}")
+    artifacts.publish(tmp_path, "v2")                # rolled back to an old version
+
+    removed = artifacts.prune(tmp_path, keep=2)
+    remaining = sorted(d.name for d in (tmp_path / "versions").iterdir())
+    assert remaining == ["v11", "v12", "v2"]
+    assert "v10" in removed and "v2" not in removed
+
+
+def test_watcher_fires_when_current_moves(tmp_path):
+    _make_version(tmp_path, "v1")
+    _make_version(tmp_path, "v2")
+    artifacts.publish(tmp_path, "v1")
+
+    fired = threading.Event()
+    watcher = artifacts.VersionWatcher(tmp_path, 0.01, fired.set)
+    watcher.start()
+    try:
+        assert not fired.wait(0.05)                  # unchanged → no callback
+        artifacts.publish(tmp_path, "v2")
+        assert fired.wait(2)
+    finally:
+        watcher.stop()
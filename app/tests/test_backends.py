@@ -0,0 +1,164 @@
+# app/tests/test_backends.py
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app import ollama_client
+from app.backends import BackendPool
+from app.ollama_client import generate, stream_generate
+
+
+class _Ollama(BaseHTTPRequestHandler):
+    """Stub Ollama: /api/tags plus /api/generate answering with ``name``."""
+
+    name = "stub"
+    tags_status = 200
+    stall_after_first = 0.0   # seconds to hang after the first streamed token
+    hits: list
+
+    def do_GET(self):
+        self.send_response(self.tags_status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"models": []}')
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.hits.append(payload["prompt"])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        if not payload["stream"]:
+            self.wfile.write(json.dumps({"response": self.name, "done": True}).encode())
+            return
+        for i, token in enumerate([self.name, "!"]):
+            self.wfile.write((json.dumps({"response": token}) + "\n").encode())
+            self.wfile.flush()
+            if i == 0 and self.stall_after_first:
+                time.sleep(self.stall_after_first)
+        self.wfile.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_stub():
+    servers = []
+
+    def _start(name, **attrs):
+        handler = type(name, (_Ollama,), {"name": name, "hits": [], **attrs})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", handler
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _dead_url():
+    """A local port nobody listens on (connection refused)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def test_pick_prefers_fewest_outstanding_and_rotates_ties():
+    pool = BackendPool(["http://a", "http://b", "http://c"])
+    a, b, c = pool.backends
+    with pool.track(a), pool.track(a), pool.track(b):
+        assert pool.pick() is c
+    assert {pool.pick().url for _ in range(3)} == {"http://a", "http://b", "http://c"}
+    assert pool.pick(exclude=[a, b, c]) is None
+
+
+def test_circuit_opens_after_failures_and_half_opens_after_cooldown():
+    pool = BackendPool(["http://a", "http://b"], failure_threshold=2, cooldown_s=0.05)
+    a, b = pool.backends
+    pool.failure(a)
+    assert not all(pool.pick() is b for _ in range(4))     # one failure: still routable
+    pool.failure(a)
+    assert all(pool.pick() is b for _ in range(4))         # open
+    time.sleep(0.06)
+    assert any(pool.pick() is a for _ in range(4))         # half-open: trial traffic
+    pool.success(a)
+    assert a.failures == 0 and a.open_until == 0
+
+
+@pytest.mark.asyncio
+async def test_probes_mark_backends_up_and_down(ollama_stub):
+    up, _ = ollama_stub("up")
+    sick, _ = ollama_stub("sick", tags_status=500)
+    pool = BackendPool([up, sick, _dead_url()], failure_threshold=1)
+    pool.failure(pool.backends[0])                          # open circuit …
+    async with httpx.AsyncClient() as client:
+        await pool.probe(client, timeout=1)
+    assert [b.healthy for b in pool.backends] == [True, False, False]
+    assert pool.backends[0].open_until == 0                 # … closed by a healthy probe
+    assert pool.pick().url == up
+
+
+@pytest.mark.asyncio
+async def test_generate_fails_over_from_dead_backend(ollama_stub, monkeypatch):
+    live, handler = ollama_stub("live")
+    pool = BackendPool([_dead_url(), live])
+    monkeypatch.setattr(ollama_client, "POOL", pool)
+    monkeypatch.setattr(pool, "pick", lambda exclude=(), _pick=pool.pick: _pick(exclude) if exclude else pool.backends[0])
+
+    assert await generate("q", retries=1) == "live"
+    assert pool.backends[0].failures == 1 and handler.hits == ["q"]
+
+
+@pytest.mark.asyncio
+async def test_generate_retries_count_rounds_over_the_pool(monkeypatch):
+    pool = BackendPool([_dead_url(), _dead_url()], failure_threshold=99)
+    monkeypatch.setattr(ollama_client, "POOL", pool)
+
+    with pytest.raises(httpx.ConnectError):
+        await generate("q", retries=2, delay_s=0.01)
+    assert [b.failures for b in pool.backends] == [2, 2]     # each backend once per round
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_token(ollama_stub, monkeypatch):
+    live, _ = ollama_stub("live")
+    pool = BackendPool([_dead_url(), live])
+    monkeypatch.setattr(ollama_client, "POOL", pool)
+    monkeypatch.setattr(pool, "pick", lambda exclude=(), _pick=pool.pick: _pick(exclude) if exclude else pool.backends[0])
+
+    assert [t async for t in stream_generate("q")] == ["live", "!"]
+    assert [b.inflight for b in pool.backends] == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_fail_over_after_first_token(ollama_stub, monkeypatch):
+    stalls, _ = ollama_stub("stalls", stall_after_first=1.0)
+    spare, spare_handler = ollama_stub("spare")
+    pool = BackendPool([stalls, spare])
+    monkeypatch.setattr(ollama_client, "POOL", pool)
+    monkeypatch.setattr(ollama_client, "IDLE_TIMEOUT", 0.1)
+    monkeypatch.setattr(pool, "pick", lambda exclude=(): pool.backends[0] if not exclude else None)
+
+    tokens = []
+    with pytest.raises(httpx.ReadTimeout):
+        async for t in stream_generate("q"):
+            tokens.append(t)
+    assert tokens == ["stalls"] and spare_handler.hits == []   # a half-sent answer is not restarted elsewhere
+
+
+@pytest.mark.asyncio
+async def test_requests_spread_over_backends(ollama_stub, monkeypatch):
+    urls, handlers = zip(*(ollama_stub(f"b{i}") for i in range(3)))
+    monkeypatch.setattr(ollama_client, "POOL", BackendPool(urls))
+    await asyncio.gather(*(generate(f"q{i}") for i in range(6)))
+    assert [len(h.hits) for h in handlers] == [2, 2, 2]
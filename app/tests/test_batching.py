@@ -0,0 +1,90 @@
+# app/tests/test_batching.py
+import threading
+
+import pytest
+
+from app.batching import MicroBatcher
+
+
+def _run_concurrently(batcher, items):
+    """Submit every item from its own thread and collect the results."""
+    results = {}
+    start = threading.Barrier(len(items))
+
+    def _worker(item):
+        start.wait()
+        results[item] = batcher.submit(item)
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in items]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    return results
+
+
+def test_concurrent_calls_share_one_batch():
+    calls = []
+
+    def _double(batch):
+        calls.append(list(batch))
+        return [x * 2 for x in batch]
+
+    batcher = MicroBatcher(_double, max_batch_size=8, max_wait_ms=200, name="test")
+    results = _run_concurrently(batcher, list(range(8)))
+
+    # Every caller gets its own result back …
+    assert results == {i: i * 2 for i in range(8)}
+    # … and far fewer forward passes than callers were made.
+    assert len(calls) < 8
+    assert sorted(x for batch in calls for x in batch) == list(range(8))
+
+
+def test_max_batch_size_is_respected():
+    sizes = []
+
+    def _identity(batch):
+        sizes.append(len(batch))
+        return list(batch)
+
+    batcher = MicroBatcher(_identity, max_batch_size=3, max_wait_ms=100, name="test")
+    _run_concurrently(batcher, list(range(7)))
+    assert max(sizes) <= 3
+    assert sum(sizes) == 7
+
+
+def test_single_call_passes_through():
+    batcher = MicroBatcher(lambda b: [x + 1 for x in b], max_batch_size=4, max_wait_ms=0, name="test")
+    assert batcher.submit(41) == 42
+
+
+def test_errors_propagate_to_every_caller():
+    def _boom(batch):
+        raise ValueError("model failed")
+
+    batcher = MicroBatcher(_boom, max_batch_size=4, max_wait_ms=0, name="test")
+    with pytest.raises(ValueError, match="model failed"):
+        batcher.submit("x")
+    # The dispatcher thread survives and keeps serving requests.
+    with pytest.raises(ValueError):
+        batcher.submit("y")
+
+
+def test_result_length_mismatch_is_an_error():
+    batcher = MicroBatcher(lambda b: [], max_batch_size=4, max_wait_ms=0, name="test")
+    with pytest.raises(RuntimeError, match="results"):
+        batcher.submit(1)
+
+
+@pytest.mark.asyncio
+async def test_call_on_event_loop_skips_the_wait():
+    calls = []
+
+    def _double(batch):
+        calls.append(threading.current_thread())
+        return [x * 2 for x in batch]
+
+    # a 5 s window would stall the loop if the call went through the queue
+    batcher = MicroBatcher(_double, max_batch_size=8, max_wait_ms=5000, name="test")
+    assert batcher.submit(21) == 42
+    assert calls == [threading.current_thread()] and batcher._thread is None
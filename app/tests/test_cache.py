@@ -0,0 +1,96 @@
+# app/tests/test_cache.py
+import time
+
+from app.cache import LRUCache, normalize_query, CACHE_REQUESTS
+
+
+def test_normalize_query_folds_case_and_whitespace():
+    assert normalize_query("  How do I   issue a REFUND?\n") == "how do i issue a refund?"
+    assert normalize_query("Refund") == normalize_query("refund ")
+
+
+def test_lru_eviction_order():
+    c = LRUCache("test_lru", maxsize=2)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1          # "a" becomes most recently used
+    c.put("c", 3)                   # evicts "b"
+    assert "b" not in c
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert len(c) == 2
+
+
+def test_ttl_expiry():
+    c = LRUCache("test_ttl", maxsize=4, ttl_s=0.05)
+    c.put("k", "v")
+    assert c.get("k") == "v"
+    time.sleep(0.08)
+    assert c.get("k") is None
+    assert len(c) == 0
+
+
+def test_hit_miss_counters():
+    c = LRUCache("test_counters", maxsize=4)
+    c.get("missing")
+    c.put("k", 1)
+    c.get("k")
+    c.get("k")
+    assert (c.hits, c.misses) == (2, 1)
+    assert CACHE_REQUESTS.labels("test_counters", "hit")._value.get() == 2
+    assert CACHE_REQUESTS.labels("test_counters", "miss")._value.get() == 1
+
+
+def test_zero_size_disables_cache():
+    c = LRUCache("test_disabled", maxsize=0)
+    c.put("k", 1)
+    assert c.get("k") is None
+    assert not c.enabled
+
+
+# ---------- semantic cache ------------------------------------------------
+import numpy as np
+
+from app.cache import SemanticCache
+
+
+def _unit(*xs):
+    v = np.asarray(xs, dtype="float32")
+    return v / np.linalg.norm(v)
+
+
+def test_semantic_cache_matches_above_threshold():
+    c = SemanticCache("test_semantic", threshold=0.9, maxsize=8)
+    c.add(_unit(1, 0, 0), "refund answer")
+    hit = c.lookup(_unit(1, 0.1, 0))        # cos ≈ 0.995
+    assert hit is not None and hit[0] == "refund answer" and hit[1] > 0.9
+    assert c.lookup(_unit(0, 1, 0)) is None  # orthogonal → miss
+    assert (c.hits, c.misses) == (1, 1)
+
+
+def test_semantic_cache_evicts_oldest():
+    c = SemanticCache("test_semantic_evict", threshold=0.99, maxsize=2)
+    c.add(_unit(1, 0, 0), "a")
+    c.add(_unit(0, 1, 0), "b")
+    c.add(_unit(0, 0, 1), "c")
+    assert len(c) == 2
+    assert c.lookup(_unit(1, 0, 0)) is None
+    assert c.lookup(_unit(0, 0, 1))[0] == "c"
+
+
+def test_semantic_cache_disabled_without_threshold():
+    c = SemanticCache("test_semantic_off", threshold=0)
+    c.add(_unit(1, 0), "x")
+    assert not c.enabled and c.lookup(_unit(1, 0)) is None
+
+
+def test_semantic_cache_expired_neighbour_does_not_hide_a_live_match(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    c = SemanticCache("test_semantic_ttl", threshold=0.9, maxsize=8, ttl_s=10)
+    c.add(_unit(1, 0, 0), "old")
+    now[0] += 8
+    c.add(_unit(1, 0.2, 0), "new")           # cos ≈ 0.98 to the query below
+    now[0] += 5                              # "old" expired, "new" still live
+    hit = c.lookup(_unit(1, 0, 0))           # nearest is the expired entry
+    assert hit is not None and hit[0] == "new"
+    assert len(c) == 1
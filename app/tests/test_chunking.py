@@ -0,0 +1,55 @@
+# app/tests/test_chunking.py
+import pytest
+
+from app import chunking
+
+
+def _para(prefix, n):
+    return " ".join(f"{prefix}{i}" for i in range(n)) + "."
+
+
+def test_short_paragraphs_are_merged_per_article():
+    records = [
+        {"url": "u/a", "title": "A", "text": "Refunds take five days."},
+        {"url": "u/a", "title": "A", "text": "Fees are not returned."},
+        {"url": "u/b", "title": "B", "text": "Payouts are daily."},
+    ]
+    chunks = list(chunking.chunk_articles(records, chunking.regex_spans, max_tokens=50))
+    assert [c.text for c in chunks] == ["Refunds take five days.\n\nFees are not returned.", "Payouts are daily."]
+    assert [c.paragraphs for c in chunks] == [range(0, 2), range(2, 3)]
+    assert (chunks[1].start, chunks[1].end) == (0, len("Payouts are daily."))
+
+
+def test_long_article_is_split_at_paragraph_breaks_with_overlap():
+    paras = [_para("a", 30), _para("b", 30), _para("c", 30)]          # 31 tokens each
+    records = [{"url": "u", "title": "T", "text": p} for p in paras]
+    chunks = list(chunking.chunk_articles(records, chunking.regex_spans, max_tokens=40, overlap=5))
+
+    article = chunking.PARAGRAPH_SEP.join(paras)
+    for c in chunks:
+        assert article[c.start:c.end] == c.text
+        assert len(chunking.regex_spans(c.text)) <= 40
+    assert chunks[0].text == paras[0]                                # ended at the paragraph break
+    assert chunks[1].text.startswith("a26 a27 a28 a29.\n\nb0")            # 5 tokens of overlap
+    assert chunks[-1].text.endswith(paras[-1])
+    assert chunks[1].paragraphs == range(0, 2)
+
+
+def test_split_without_breaks_uses_fixed_windows():
+    text = " ".join(str(i) for i in range(100))
+    spans = chunking.split(text, chunking.regex_spans(text), max_tokens=30, overlap=10)
+    tokens = [len(chunking.regex_spans(text[s:e])) for s, e in spans]
+    assert tokens[:-1] == [30] * (len(tokens) - 1)
+    assert text[spans[1][0]:].startswith("20 ")
+    assert spans[-1][1] == len(text)
+    with pytest.raises(ValueError):
+        chunking.split(text, chunking.regex_spans(text), max_tokens=10, overlap=5)
+
+
+def test_tokenizer_spans_use_offset_mapping():
+    class _Tok:
+        def __call__(self, text, **kwargs):
+            assert kwargs["return_offsets_mapping"] and not kwargs["add_special_tokens"]
+            return {"offset_mapping": [(0, 3), (3, 3), (4, 9)]}
+
+    assert chunking.tokenizer_spans(_Tok())("abc defgh") == [(0, 3), (4, 9)]
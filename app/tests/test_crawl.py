@@ -0,0 +1,175 @@
+# app/tests/test_crawl.py
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import crawl
+
+LONG = " ".join(["word"] * 25)
+
+PAGES = {
+    "/topics": '<a href="/topics/payments">Payments</a> <a href="/about">skip</a>',
+    "/topics/payments": (
+        '<a href="/questions/refunds#top">Refunds</a>'
+        '<a href="/questions/payouts">Payouts</a>'
+        '<a href="https://elsewhere.example/questions/x">other host</a>'
+    ),
+    "/questions/refunds": f"<h1>Refunds</h1><p>Refunds take five to ten days. {LONG}</p><p>too short</p>",
+    "/questions/payouts": f"<h1>Payouts</h1><p>Payouts arrive in two days. {LONG}</p>",
+}
+
+
+class _Site(BaseHTTPRequestHandler):
+    """Fixture site honouring If-None-Match; counts full (200) responses per path."""
+
+    pages = PAGES
+    served: dict = {}
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"%s"' % hashlib.md5(body.encode()).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.served[self.path] = self.served.get(self.path, 0) + 1
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    _Site.pages = dict(PAGES)
+    _Site.served = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _crawl(seed, state, out, concurrency=4):
+    sink = crawl.JsonlSink(str(out))
+    try:
+        stats = asyncio.run(crawl.Crawler(seed, state, sink, concurrency=concurrency, rate=0).run())
+    finally:
+        sink.close()
+    return [json.loads(line) for line in out.read_text().splitlines()], stats
+
+
+def test_parse_page_filters_links_and_short_paragraphs():
+    url = "https://support.stripe.com/questions/refunds"
+    paragraphs, links = crawl.parse_page(PAGES["/topics/payments"] + PAGES["/questions/refunds"], url)
+    assert [p["title"] for p in paragraphs] == ["Refunds"]
+    assert links == ["https://support.stripe.com/questions/refunds", "https://support.stripe.com/questions/payouts"]
+    assert crawl.parse_page(PAGES["/questions/refunds"], "https://support.stripe.com/topics/x")[0] == []
+
+
+def test_recrawl_only_fetches_changed_pages(site, tmp_path):
+    state = crawl.CrawlState(str(tmp_path / "state.sqlite"))
+    out = tmp_path / "out.jsonl"
+
+    first, stats = _crawl(site + "/topics", state, out)
+    assert stats == {"pages": 4, "parsed": 4, "not_modified": 0, "unchanged": 0, "errors": 0, "paragraphs": 2}
+    assert sorted(p["title"] for p in first) == ["Payouts", "Refunds"]
+
+    again, stats = _crawl(site + "/topics", state, out)
+    assert stats["not_modified"] == 4 and stats["parsed"] == 0
+    assert sorted(p["text"] for p in again) == sorted(p["text"] for p in first)
+    assert set(_Site.served.values()) == {1}
+
+    _Site.pages["/questions/payouts"] = f"<h1>Payouts</h1><p>Payouts now arrive next day. {LONG}</p>"
+    changed, stats = _crawl(site + "/topics", state, out)
+    assert stats["parsed"] == 1 and stats["not_modified"] == 3
+    assert _Site.served["/questions/payouts"] == 2 and _Site.served["/questions/refunds"] == 1
+    assert len(changed) == 2 and any("next day" in p["text"] for p in changed)
+    state.close()
+
+
+class _Crash(BaseException):
+    pass
+
+
+def test_interrupted_crawl_resumes_without_loss_or_duplicates(site, tmp_path, monkeypatch):
+    """Output is appended per page; a re-run continues from the stored frontier."""
+    state = crawl.CrawlState(str(tmp_path / "state.sqlite"))
+    out = tmp_path / "out.jsonl"
+    real_visit = crawl.Crawler._visit
+
+    async def _crash_on_payouts(self, url):
+        if url.endswith("/questions/payouts"):
+            raise _Crash()
+        return await real_visit(self, url)
+
+    monkeypatch.setattr(crawl.Crawler, "_visit", _crash_on_payouts)
+    with pytest.raises(_Crash):
+        _crawl(site + "/topics", state, out, concurrency=1)      # breadth-first: refunds finishes first
+    partial = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [p["title"] for p in partial] == ["Refunds"]        # written before the crash
+
+    with out.open("a") as f:                                   # a half-written line is rolled back
+        f.write('{"url": "torn')
+    monkeypatch.setattr(crawl.Crawler, "_visit", real_visit)
+    resumed, stats = _crawl(site + "/topics", state, out)
+
+    assert stats["pages"] == 1                                 # only the unfinished page
+    assert sorted(p["title"] for p in resumed) == ["Payouts", "Refunds"]
+    assert _Site.served == {"/topics": 1, "/topics/payments": 1, "/questions/refunds": 1, "/questions/payouts": 1}
+    state.close()
+
+
+def test_resume_restarts_when_the_output_was_replaced(site, tmp_path, monkeypatch):
+    """A frontier whose output file is now shorter is stale: crawl from the seed, never pad."""
+    state = crawl.CrawlState(str(tmp_path / "state.sqlite"))
+    out = tmp_path / "out.jsonl"
+    real_visit = crawl.Crawler._visit
+
+    async def _crash_on_payouts(self, url):
+        if url.endswith("/questions/payouts"):
+            raise _Crash()
+        return await real_visit(self, url)
+
+    monkeypatch.setattr(crawl.Crawler, "_visit", _crash_on_payouts)
+    with pytest.raises(_Crash):
+        _crawl(site + "/topics", state, out, concurrency=1)
+    assert state.output_bytes() > 0
+
+    out.write_text("")                                         # rotated away
+    monkeypatch.setattr(crawl.Crawler, "_visit", real_visit)
+    again, stats = _crawl(site + "/topics", state, out)
+
+    assert b"\0" not in out.read_bytes()
+    assert stats["pages"] == 4
+    assert sorted(p["title"] for p in again) == ["Payouts", "Refunds"]
+    state.close()
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    limiter = crawl.HostRateLimiter(rate=20)        # one slot every 50 ms
+
+    async def _go():
+        t0 = time.monotonic()
+        await asyncio.gather(*(limiter.wait("http://a.test/x") for _ in range(4)),
+                             limiter.wait("http://b.test/x"))
+        return time.monotonic() - t0
+
+    elapsed = asyncio.run(_go())
+    assert 0.14 <= elapsed < 0.5
@@ -0,0 +1,49 @@
+# app/tests/test_dedup.py
+import pytest
+
+from app import dedup
+
+BASE = ("Payouts are sent to your bank account on a rolling basis and usually arrive "
+        "within two business days depending on your country and industry risk level.")
+
+
+def test_exact_duplicates_ignore_case_space_and_punctuation():
+    d = dedup.Deduper()
+    assert d.add(BASE) is None
+    assert d.add("  " + BASE.upper().replace(".", "!") + " ") == 0
+    assert (d.kept, d.exact_dups, d.near_dups) == (1, 1, 0)
+
+
+def test_near_duplicate_maps_to_first_occurrence():
+    d = dedup.Deduper(threshold=0.7)
+    assert d.add("Unrelated paragraph about disputes and chargeback fees for card payments online.") is None
+    assert d.add(BASE) is None
+    assert d.add("However, " + BASE) == 1            # one extra word → same group
+    assert d.near_dups == 1 and d.removed == 1
+
+
+def test_distinct_paragraphs_are_kept():
+    d = dedup.Deduper()
+    texts = [f"Paragraph number {i} explains topic {i * 7} of the Stripe dashboard in detail." for i in range(50)]
+    assert [d.add(t) for t in texts] == [None] * 50
+    assert d.kept == 50 and d.removed == 0
+
+
+def test_exact_only_mode_skips_minhash():
+    d = dedup.Deduper(threshold=None)
+    d.add(BASE)
+    assert d.add("However, " + BASE) is None
+    assert d.add(BASE.lower()) == 0
+
+
+def test_signature_agreement_tracks_jaccard():
+    d = dedup.Deduper(num_perm=128, bands=32)
+    a = d.signature(BASE)
+    assert (a == d.signature(BASE)).mean() == 1.0
+    other = d.signature("Refunds to a customer's card take five to ten business days to appear on the statement.")
+    assert (a == other).mean() < 0.2
+
+
+def test_bands_must_divide_signature():
+    with pytest.raises(ValueError):
+        dedup.Deduper(num_perm=64, bands=10)
@@ -0,0 +1,86 @@
+# app/tests/test_embedding.py
+import json
+
+import numpy as np
+import pytest
+
+from app import embedding
+
+
+class _FakeModel:
+    """Deterministic 4-d 'embedding': text length and a few char codes."""
+
+    def __init__(self, name="fake", fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise KeyboardInterrupt("simulated crash")
+        return np.array([[len(t), ord(t[0]), ord(t[-1]), 1.0] for t in texts], dtype="float32")
+
+
+def _expected(texts):
+    return _FakeModel().encode(texts)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    texts = [f"paragraph {i} about payouts" for i in range(50)]
+    path = tmp_path / "corpus.jsonl"
+    path.write_text("".join(json.dumps({"text": t}) + "\n" for t in texts) + "\n")  # trailing blank line
+    return path, texts
+
+
+def test_scan_read_at_and_select(corpus):
+    path, texts = corpus
+    scanned = list(embedding.scan_jsonl(path))
+    assert [t for _, t in scanned] == texts
+
+    offsets = [scanned[3][0], -1, scanned[0][0]]
+    assert list(embedding.read_at(path, offsets)) == [texts[3], "", texts[0]]
+    records = list(embedding.read_at(path, offsets, field=None))
+    assert records[0]["text"] == texts[3] and records[1] is None
+    assert list(embedding.select(iter(texts), [1, 4, 49])) == [texts[1], texts[4], texts[49]]
+    assert [len(b) for b in embedding.batched(range(10), 4)] == [4, 4, 2]
+
+
+def test_embed_to_shard_in_process(tmp_path, corpus):
+    _, texts = corpus
+    seen = []
+    vecs = embedding.embed_to_shard(
+        iter(texts), n=len(texts), dim=4, shard_dir=tmp_path / "w", fingerprint="f1",
+        model_name="fake", model=_FakeModel(), batch_size=8, on_batch=seen.append,
+    )
+    assert isinstance(vecs, np.memmap) and vecs.shape == (50, 4)
+    assert np.array_equal(vecs, _expected(texts))
+    assert sum(seen) == 50
+
+
+def test_interrupted_build_resumes_from_checkpoint(tmp_path, corpus):
+    _, texts = corpus
+    kwargs = dict(n=len(texts), dim=4, shard_dir=tmp_path / "w", fingerprint="f1",
+                  model_name="fake", batch_size=8, checkpoint_every=1)
+
+    with pytest.raises(KeyboardInterrupt):
+        embedding.embed_to_shard(iter(texts), model=_FakeModel(fail_after=3), **kwargs)
+
+    resumed = _FakeModel()
+    vecs = embedding.embed_to_shard(iter(texts), model=resumed, **kwargs)
+    assert resumed.calls == 7 - 3                  # 7 batches, 3 already on disk
+    assert np.array_equal(vecs, _expected(texts))
+
+    # A different input fingerprint must not reuse the old checkpoint
+    fresh = _FakeModel()
+    embedding.embed_to_shard(iter(texts), model=fresh, **{**kwargs, "fingerprint": "f2"})
+    assert fresh.calls == 7
+
+
+def test_worker_processes_fill_the_shard(tmp_path, corpus):
+    _, texts = corpus
+    vecs = embedding.embed_to_shard(
+        iter(texts), n=len(texts), dim=4, shard_dir=tmp_path / "w", fingerprint="f1",
+        model_name="fake", model_factory=_FakeModel, workers=2, batch_size=8,
+    )
+    assert np.array_equal(vecs, _expected(texts))
@@ -0,0 +1,113 @@
+# app/tests/test_executor.py
+import asyncio
+import os
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.executor import RetrievalExecutor, QUEUE_DEPTH
+from app.main import app
+
+
+def _slow_square(x, delay=0.2):
+    time.sleep(delay)
+    return x * x
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_without_blocking_loop():
+    ex = RetrievalExecutor("thread", max_workers=2)
+    ticks = 0
+
+    async def _ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(_ticker())
+    try:
+        assert await ex.run(_slow_square, 7) == 49
+    finally:
+        ticker.cancel()
+        ex.shutdown()
+    # The loop kept running while the blocking call was in the pool.
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_and_queue_depth_reported():
+    ex = RetrievalExecutor("thread", max_workers=4, max_concurrency=1)
+    before = QUEUE_DEPTH._value.get()
+    tasks = [asyncio.create_task(ex.run(_slow_square, i, 0.1)) for i in range(3)]
+    await asyncio.sleep(0.05)
+    # One call runs, the other two wait for a slot on the event loop.
+    assert QUEUE_DEPTH._value.get() - before == 2
+    assert await asyncio.gather(*tasks) == [0, 1, 4]
+    assert QUEUE_DEPTH._value.get() == before
+    ex.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_pool_runs_in_another_process():
+    ex = RetrievalExecutor("process", max_workers=1)
+    try:
+        assert await ex.run(os.getpid) != os.getpid()
+    finally:
+        ex.shutdown()
+
+
+_STATE = {"version": "v1"}
+
+
+def _version():
+    return _STATE["version"]
+
+
+@pytest.mark.asyncio
+async def test_recycle_forks_workers_with_the_current_state():
+    """Forked workers keep the state they were forked with until recycled."""
+    import multiprocessing
+
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("needs fork-based process pools")
+    ex = RetrievalExecutor("process", max_workers=1)
+    try:
+        assert await ex.run(_version) == "v1"
+        _STATE["version"] = "v2"
+        assert await ex.run(_version) == "v1"       # stale worker
+        ex.recycle()
+        assert await ex.run(_version) == "v2"
+    finally:
+        _STATE["version"] = "v1"
+        ex.shutdown()
+
+
+def test_unknown_kind_rejected():
+    with pytest.raises(ValueError):
+        RetrievalExecutor("fiber")
+
+
+@pytest.mark.asyncio
+async def test_healthz_responsive_during_slow_retrieval(monkeypatch):
+    """A slow _search must not hold up /healthz on the same worker."""
+    from app import retrieval as retr
+
+    def _slow_search(query, k=4, overfetch=5):
+        time.sleep(0.5)
+        return [{"text": "slow", "score": 1.0}]
+
+    monkeypatch.setattr(retr, "_search", _slow_search)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        query_task = asyncio.create_task(ac.post("/query", json={"question": "slow?"}))
+        await asyncio.sleep(0.05)
+        t0 = time.perf_counter()
+        health = await ac.get("/healthz")
+        health_latency = time.perf_counter() - t0
+        r = await query_task
+
+    assert health.status_code == 200
+    assert health_latency < 0.3
+    assert r.status_code == 200
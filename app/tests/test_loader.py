@@ -0,0 +1,87 @@
+# app/tests/test_loader.py
+import threading
+import time
+
+import pytest
+
+from app.loader import BackgroundLoader
+
+
+def test_components_load_in_background_with_timings():
+    loaded = {}
+    release = threading.Event()
+
+    def _slow():
+        release.wait(2)
+        loaded["slow"] = True
+
+    loader = BackgroundLoader()
+    loader.add("fast", lambda: loaded.setdefault("fast", True))
+    loader.add("slow", _slow)
+
+    loader.start()
+    time.sleep(0.05)
+    status = loader.status()
+    assert status["status"] == "loading" and not loader.ready
+    assert status["components"]["fast"]["state"] == "ready"
+    assert status["components"]["slow"]["state"] == "loading"
+
+    release.set()
+    loader.load(timeout=2)
+    status = loader.status()
+    assert loader.ready and status["status"] == "ready"
+    assert all("seconds" in c for c in status["components"].values())
+    assert loaded == {"fast": True, "slow": True}
+
+
+def test_components_load_concurrently():
+    barrier = threading.Barrier(2, timeout=2)   # deadlocks if run one by one
+    loader = BackgroundLoader()
+    loader.add("a", barrier.wait)
+    loader.add("b", barrier.wait)
+    loader.load(timeout=3)
+    assert loader.ready
+
+
+def test_failure_is_reported():
+    def _boom():
+        raise OSError("faiss.idx missing")
+
+    loader = BackgroundLoader()
+    loader.add("ok", lambda: None)
+    loader.add("index", _boom)
+    with pytest.raises(RuntimeError, match="faiss.idx missing"):
+        loader.load(timeout=2)
+    status = loader.status()
+    assert status["status"] == "failed"
+    assert status["components"]["index"]["state"] == "failed"
+    assert "OSError" in status["components"]["index"]["error"]
+
+
+def test_pending_before_start():
+    loader = BackgroundLoader()
+    loader.add("x", lambda: None)
+    assert loader.status()["status"] == "pending"
+
+
+def test_retry_recovers_failed_components():
+    runs = {"index": 0, "model": 0}
+    broken = [True]
+
+    def _index():
+        runs["index"] += 1
+        if broken[0]:
+            raise OSError("faiss.idx corrupt")
+
+    loader = BackgroundLoader()
+    loader.add("index", _index)
+    loader.add("model", lambda: runs.__setitem__("model", runs["model"] + 1))
+    loader.wait(timeout=2)
+    assert loader.failed
+
+    broken[0] = False
+    loader.retry()
+    assert loader.ready and loader.status()["components"]["index"].get("error") is None
+    assert runs == {"index": 2, "model": 1}          # only the failed one ran again
+    loader.retry(["model"])
+    assert runs["model"] == 2
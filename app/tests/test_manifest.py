@@ -0,0 +1,72 @@
+# app/tests/test_manifest.py
+import json
+
+import numpy as np
+
+from app import manifest
+
+
+def test_first_build_embeds_everything():
+    delta = manifest.plan(["a", "b", "c"])
+    assert delta.ids == [0, 1, 2]
+    assert delta.added == [0, 1, 2] and delta.removed == []
+    assert delta.next_id == 3
+
+
+def test_plan_keeps_labels_of_unchanged_paragraphs():
+    texts = ["a", "b", "c"]
+    previous = manifest.build(texts, manifest.plan(texts))
+
+    delta = manifest.plan(["c", "b edited", "a", "d"], previous)
+    assert delta.ids == [2, 3, 0, 4]          # reordering costs nothing
+    assert delta.added == [1, 3]              # only edited / new paragraphs embed
+    assert delta.removed == [1]               # old "b"
+    assert delta.unchanged == 2
+    assert delta.holes == 1                   # label 1 stays empty until compacted
+
+
+def test_duplicates_each_keep_one_label():
+    texts = ["x", "x", "y"]
+    previous = manifest.build(texts, manifest.plan(texts))
+
+    delta = manifest.plan(["x", "y"], previous)
+    assert delta.ids == [0, 2] and delta.added == []
+    assert delta.removed == [1]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    assert manifest.load(tmp_path) is None
+    texts = ["refund", "payout"]
+    data = manifest.build(texts, manifest.plan(texts), version=1, model="m", index="flat")
+    manifest.save(data, tmp_path)
+
+    loaded = manifest.load(tmp_path)
+    assert {k: v for k, v in loaded.items() if k != "hashes"} == {k: v for k, v in data.items() if k != "hashes"}
+    assert isinstance(loaded["hashes"], np.memmap)
+    assert loaded["hashes"].tolist() == data["hashes"].tolist()
+    assert loaded["count"] == 2 and loaded["next_id"] == 2
+    assert manifest.plan(texts, loaded).added == []
+
+
+def test_replanning_without_manifest_compacts_labels():
+    texts = ["a", "b", "c", "d"]
+    previous = manifest.build(texts, manifest.plan(texts))
+    delta = manifest.plan(["a", "d"], previous)
+    assert delta.ids == [0, 3] and delta.holes == 2
+
+    compact = manifest.plan(["a", "d"])       # what the build script does past --compact-ratio
+    assert compact.ids == [0, 1] and compact.holes == 0
+
+
+def test_legacy_inline_hashes_still_load(tmp_path):
+    legacy = {"next_id": 3, "count": 3, "model": "m",
+              "hashes": {manifest.content_hash("refund"): [0, 2], manifest.content_hash("payout"): [1]}}
+    (tmp_path / manifest.MANIFEST_NAME).write_text(json.dumps(legacy))
+    delta = manifest.plan(["payout", "refund"], manifest.load(tmp_path))
+    assert delta.ids == [1, 0] and delta.added == [] and delta.removed == [2]
+
+
+def test_hashes_ending_in_nul_bytes_match():
+    text = next(t for t in (f"p{i}" for i in range(5000)) if manifest._digest(t).endswith(b"\0"))
+    previous = manifest.build([text], manifest.plan([text]))
+    assert manifest.plan([text], previous).added == []
@@ -0,0 +1,30 @@
+# app/tests/test_metadata.py
+from app import metadata
+
+RECORDS = [
+    {"url": "https://support.stripe.com/questions/refunds", "title": "Refunds", "text": "Refunds take 5-10 days."},
+    None,                                                               # label of a removed paragraph
+    {"url": "https://support.stripe.com/questions/payouts", "title": "Payouts", "text": "Payouts arrive daily."},
+    {"url": "https://support.stripe.com/questions/refunds", "title": "Refunds", "text": "Partial refunds are free."},
+]
+
+
+def test_build_interns_articles_and_marks_holes():
+    meta = metadata.PassageMetadata.build(RECORDS)
+    assert len(meta) == 4
+    assert meta.article.tolist() == [0, -1, 1, 0]
+    assert meta.url.tolist()[:2] == [RECORDS[0]["url"], RECORDS[2]["url"]]
+    assert meta.tokens.tolist() == [metadata.count_tokens(r["text"]) if r else 0 for r in RECORDS]
+    assert meta.tokens[0] == 7                                          # Refunds take 5 - 10 days .
+
+
+def test_columns_roundtrip(tmp_path):
+    metadata.PassageMetadata.build(RECORDS).save(tmp_path)
+    assert metadata.exists(tmp_path)
+    meta = metadata.PassageMetadata.load(tmp_path)
+
+    cols = meta.columns([3, 2, 1])
+    assert cols["title"] == ["Refunds", "Payouts", ""]
+    assert cols["article"] == ["refunds", "payouts", ""]
+    assert cols["url"][0].endswith("/questions/refunds")
+    assert cols["tokens"][2] == 0
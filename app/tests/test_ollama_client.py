@@ -1,9 +1,14 @@
 # app/tests/test_ollama_client.py
+import asyncio
+import json
+
 import pytest
 import httpx
+from prometheus_client import REGISTRY
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.ollama_client import generate, OLLAMA_URL, OLLAMA_MODEL
+from app import ollama_client
+from app.ollama_client import generate, stream_generate, OLLAMA_URL, OLLAMA_MODEL
 
 
 @pytest.mark.asyncio
@@ -78,4 +83,105 @@ async def test_generate_all_retries_fail():
     with patch("httpx.AsyncClient", return_value=mock_acm):
         with pytest.raises(httpx.HTTPStatusError):
             await generate("test prompt", retries=2, delay_s=0.01)
-        assert mock_client.post.call_count == 2
\ No newline at end of file
+        assert mock_client.post.call_count == 2
+
+def _stream_client(lines_with_delays):
+    """Shared-client stand-in streaming ``(delay_s, line)`` pairs as NDJSON."""
+
+    async def _body():
+        for delay, line in lines_with_delays:
+            await asyncio.sleep(delay)
+            yield (line + "\n").encode()
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=_body())))
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused_and_closed(monkeypatch):
+    calls = []
+
+    def _handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"response": "pooled"})
+
+    monkeypatch.setattr(ollama_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+    shared = ollama_client.open_client()               # already open: returned as is
+    with patch("httpx.AsyncClient", side_effect=AssertionError("no per-call client")):
+        assert [await generate("a"), await generate("b")] == ["pooled", "pooled"]
+    assert len(calls) == 2
+
+    await ollama_client.close_client()
+    assert shared.is_closed and ollama_client._client is None
+
+
+@pytest.mark.asyncio
+async def test_stream_times_out_before_first_token(monkeypatch):
+    monkeypatch.setattr(ollama_client, "FIRST_TOKEN_TIMEOUT", 0.05)
+    monkeypatch.setattr(ollama_client, "_client", _stream_client([(1.0, json.dumps({"response": "late"}))]))
+    with pytest.raises(httpx.ReadTimeout, match="first_token"):
+        [t async for t in stream_generate("q")]
+
+
+@pytest.mark.asyncio
+async def test_stream_times_out_on_idle_gap(monkeypatch):
+    monkeypatch.setattr(ollama_client, "IDLE_TIMEOUT", 0.05)
+    monkeypatch.setattr(ollama_client, "_client", _stream_client([
+        (0.0, json.dumps({"response": "Hel"})),
+        (0.01, json.dumps({"response": "lo"})),
+        (1.0, json.dumps({"response": "!", "done": True})),
+    ]))
+    tokens = []
+    with pytest.raises(httpx.ReadTimeout, match="idle"):
+        async for t in stream_generate("q"):
+            tokens.append(t)
+    assert tokens == ["Hel", "lo"]
+
+
+def _capture_client(requests, reply):
+    def _handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, content=reply.encode())
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+
+
+@pytest.mark.asyncio
+async def test_options_and_keep_alive_are_merged_and_omitted_when_empty(monkeypatch):
+    sent = []
+    monkeypatch.setattr(ollama_client, "_client", _capture_client(sent, json.dumps({"response": "ok"})))
+    monkeypatch.setattr(ollama_client, "OLLAMA_KEEP_ALIVE", None)
+    monkeypatch.setattr(ollama_client, "OLLAMA_OPTIONS", {})
+
+    await generate("p")
+    assert set(sent[-1]) == {"model", "prompt", "stream"}
+
+    monkeypatch.setattr(ollama_client, "OLLAMA_OPTIONS", {"num_ctx": 4096, "temperature": 0.7})
+    monkeypatch.setattr(ollama_client, "OLLAMA_KEEP_ALIVE", "30m")
+    await generate("p", options={"temperature": 0, "num_predict": 32})
+    assert sent[-1]["options"] == {"num_ctx": 4096, "temperature": 0, "num_predict": 32}
+    assert sent[-1]["keep_alive"] == "30m"
+    await generate("p", keep_alive="-1")
+    assert sent[-1]["keep_alive"] == "-1"
+
+
+@pytest.mark.asyncio
+async def test_stream_records_first_token_and_ollama_timings(monkeypatch):
+    def _count(name, labels=None):
+        return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+    lines = [
+        json.dumps({"response": ""}),
+        json.dumps({"response": "Hi"}),
+        json.dumps({"response": "", "done": True, "load_duration": 0, "prompt_eval_count": 12,
+                    "prompt_eval_duration": 250_000_000, "total_duration": 900_000_000}),
+    ]
+    monkeypatch.setattr(ollama_client, "_client", _capture_client([], "\n".join(lines) + "\n"))
+    before = (_count("ollama_time_to_first_token_seconds_count", {"mode": "stream"}),
+              _count("ollama_prompt_eval_tokens_sum"), _count("ollama_prompt_eval_seconds_sum"))
+
+    assert [t async for t in stream_generate("p")] == ["Hi"]
+    after = (_count("ollama_time_to_first_token_seconds_count", {"mode": "stream"}),
+             _count("ollama_prompt_eval_tokens_sum"), _count("ollama_prompt_eval_seconds_sum"))
+    assert after[0] - before[0] == 1
+    assert after[1] - before[1] == 12
+    assert after[2] - before[2] == pytest.approx(0.25)
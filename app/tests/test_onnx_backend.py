@@ -0,0 +1,90 @@
+# app/tests/test_onnx_backend.py
+import json
+
+import numpy as np
+import pytest
+
+from app import onnx_backend as ob
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "refund", "payout", "stripe", "fee", "card", "days"]
+
+
+# ---------- parity helpers -------------------------------------------------
+def test_embedding_parity_identical_and_perturbed():
+    rng = np.random.default_rng(0)
+    a = rng.standard_normal((8, 16)).astype("float32")
+    assert ob.embedding_parity(a, a) == pytest.approx(1.0, abs=1e-6)
+    assert ob.embedding_parity(a, a + 1e-3) > 0.999
+    assert ob.embedding_parity(a, -a) == pytest.approx(-1.0, abs=1e-6)
+
+
+def test_ranking_agreement():
+    ref = np.array([0.9, 0.8, 0.1, 0.0])
+    assert ob.ranking_agreement(ref, ref * 2, k=2) == 1.0
+    assert ob.ranking_agreement(ref, np.array([0.9, 0.0, 0.8, 0.1]), k=2) == 0.5
+
+
+# ---------- runtime wrappers against tiny hand-built graphs ----------------
+def _tiny_model_dir(tmp_path, name, output, config):
+    """Write a BERT tokenizer plus a Gather-based ONNX graph into *tmp_path/name*."""
+    onnx = pytest.importorskip("onnx", reason="onnx not installed")
+    pytest.importorskip("onnxruntime", reason="onnxruntime not installed")
+    transformers = pytest.importorskip("transformers", reason="transformers not installed")
+    from onnx import TensorProto, helper, numpy_helper
+
+    d = tmp_path / name
+    d.mkdir()
+    (d / "vocab.txt").write_text("\n".join(VOCAB))
+    transformers.BertTokenizerFast(str(d / "vocab.txt")).save_pretrained(str(d))
+
+    dim = 1 if output == "logits" else 4
+    table = np.arange(len(VOCAB) * dim, dtype="float32").reshape(len(VOCAB), dim) / 10
+    nodes = [helper.make_node("Gather", ["table", "input_ids"], ["hidden"])]
+    if output == "logits":   # score = sum of per-token weights → (batch, 1)
+        nodes.append(helper.make_node("ReduceSum", ["hidden", "axis"], ["logits"], keepdims=0))
+        inits = [numpy_helper.from_array(table, "table"), numpy_helper.from_array(np.array([1], dtype="int64"), "axis")]
+        out = helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", 1])
+    else:
+        nodes.append(helper.make_node("Identity", ["hidden"], ["last_hidden_state"]))
+        inits = [numpy_helper.from_array(table, "table")]
+        out = helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "tokens", dim])
+    inputs = [
+        helper.make_tensor_value_info(n, TensorProto.INT64, ["batch", "tokens"])
+        for n in ("input_ids", "attention_mask")
+    ]
+    graph = helper.make_graph(nodes, name, inputs, [out], initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(d / ob.FP32_NAME))
+    (d / ob.CONFIG_NAME).write_text(json.dumps(config))
+    return d
+
+
+def test_onnx_embedder_mean_pools_and_normalises(tmp_path):
+    d = _tiny_model_dir(tmp_path, "embedder", "last_hidden_state", {"pooling": "mean", "max_length": 16, "dim": 4})
+    emb = ob.OnnxEmbedder(d)
+
+    vecs = emb.encode(["refund", "payout stripe fee"], normalize_embeddings=True)
+    assert vecs.shape == (2, 4) and vecs.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vecs, axis=1), 1.0, atol=1e-5)
+
+    # Padding must not change a sentence's embedding
+    alone = emb.encode("refund", normalize_embeddings=True)
+    assert alone.shape == (4,)
+    assert np.allclose(alone, vecs[0], atol=1e-6)
+
+
+def test_onnx_cross_encoder_scores_pairs(tmp_path):
+    d = _tiny_model_dir(tmp_path, "reranker", "logits", {"activation": "identity", "max_length": 32})
+    ce = ob.OnnxCrossEncoder(d)
+    scores = ce.predict([["refund", "days"], ["refund", "fee"], ["refund", "card"]], batch_size=2)
+    assert scores.shape == (3,)
+    # Higher vocab ids carry larger weights in the toy graph
+    assert list(np.argsort(-scores)) == [0, 2, 1]
+
+
+def test_missing_export_is_reported(tmp_path):
+    pytest.importorskip("onnxruntime", reason="onnxruntime not installed")
+    pytest.importorskip("transformers", reason="transformers not installed")
+    with pytest.raises(FileNotFoundError, match="export_onnx"):
+        ob.OnnxEmbedder(tmp_path, quantized=True)
@@ -1,7 +1,8 @@
 # app/tests/test_prompt.py
 import pytest
 
-from app.prompt import build_prompt, SYSTEM_MSG
+from app.metadata import count_tokens
+from app.prompt import build_prompt, pack_context, PROMPT_PREFIX, SYSTEM_MSG
 
 
 def _fake_ctx(n=2):
@@ -67,4 +68,48 @@ def test_build_prompt_no_context():
     # Question appears
     assert q in prompt
     # No "Based on these" section
-    assert "Based on these" not in prompt 
\ No newline at end of file
+    assert "Based on these" not in prompt 
+
+def test_pack_context_fills_budget_by_score():
+    weak = {"text": "Weak filler sentence about something else entirely.", "score": 0.1}
+    strong = {"text": "Payouts arrive in two business days. Instant payouts cost one percent.", "score": 0.9}
+    packed = pack_context([weak, strong], budget=16, count=count_tokens)
+    assert packed == ["Payouts arrive in two business days. Instant payouts cost one percent."]
+    assert pack_context([weak, strong], budget=None, count=count_tokens)[1] == weak["text"]
+
+
+def test_pack_context_drops_redundant_sentences():
+    ctx = [
+        {"text": "Refunds take 5-10 days. They go back to the original card.", "score": 0.9},
+        # the next chunk overlaps the previous one and repeats its last sentence
+        {"text": "back to the original card. Disputes are separate.", "score": 0.8},
+        {"text": "refunds take 5-10  days.", "score": 0.7},
+    ]
+    assert pack_context(ctx, budget=None, count=count_tokens) == [
+        "Refunds take 5-10 days. They go back to the original card.",
+        "Disputes are separate.",
+    ]
+
+
+def test_build_prompt_respects_token_budget():
+    ctx = [{"text": " ".join(f"Snippet {i} covers payout rule {j}." for j in range(40)), "score": 1 - i / 10}
+           for i in range(5)]
+    prompt = build_prompt("How do payouts work?", ctx, budget=200)
+    assert count_tokens(prompt) <= 200
+    assert count_tokens(prompt) > 150                   # filled, not just the first sentences
+    assert "Snippet 0 covers payout rule 0." in prompt and "Snippet 1" not in prompt   # best snippet first
+    assert prompt.endswith("### Answer (markdown):")
+
+
+def test_best_snippet_is_truncated_rather_than_dropped():
+    ctx = [{"text": " ".join(f"w{i}" for i in range(100)) + ".", "score": 0.9}]
+    (only,) = pack_context(ctx, budget=11, count=count_tokens)
+    assert only.startswith("w0 w1") and only.endswith("…")
+    assert count_tokens(only) <= 10
+
+
+def test_prompts_share_a_byte_stable_prefix():
+    a = build_prompt("How do refunds work?", _fake_ctx(3))
+    b = build_prompt("Payout schedule?", [{"text": "Other context.", "score": 0.2}])
+    assert a.startswith(PROMPT_PREFIX) and b.startswith(PROMPT_PREFIX)
+    assert PROMPT_PREFIX.startswith(SYSTEM_MSG)
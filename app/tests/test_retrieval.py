@@ -79,3 +79,333 @@ async def test_get_answer_no_context(monkeypatch):
     answer, sources = result
     assert answer == "answer"
     assert sources == []
+
+
+def test_repeated_query_hits_cache(monkeypatch):
+    """Case / whitespace variants of a question skip embed + rerank entirely."""
+    retrieval.invalidate_caches()
+    calls = {"embed": 0, "rerank": 0}
+    real_embed, real_rerank = retrieval.EMBED, retrieval.RERANK
+
+    class _CountingEmbed:
+        def encode(self, *args, **kwargs):
+            calls["embed"] += 1
+            return real_embed.encode(*args, **kwargs)
+
+    class _CountingRerank:
+        def predict(self, *args, **kwargs):
+            calls["rerank"] += 1
+            return real_rerank.predict(*args, **kwargs)
+
+    monkeypatch.setattr(retrieval, "EMBED", _CountingEmbed())
+    monkeypatch.setattr(retrieval, "RERANK", _CountingRerank())
+
+    first = retrieval._search("How do refunds work on Stripe?")
+    again = retrieval._search("  how do REFUNDS work on stripe?  ")
+
+    assert again == first
+    assert calls == {"embed": 1, "rerank": 1}
+    assert retrieval.CTX_CACHE.hits >= 1
+
+
+def test_invalidate_caches_forces_recompute():
+    retrieval._search("payout schedule cache test")
+    assert len(retrieval.CTX_CACHE) > 0
+    retrieval.invalidate_caches()
+    assert len(retrieval.CTX_CACHE) == 0 and len(retrieval.QVEC_CACHE) == 0
+
+
+@pytest.mark.asyncio
+async def test_semantic_answer_cache_skips_llm(monkeypatch):
+    """A repeat of an answered question is served without calling Ollama."""
+    from app.cache import SemanticCache
+
+    monkeypatch.setattr(retrieval, "ANSWER_CACHE", SemanticCache("answer_test", threshold=0.95))
+    calls = []
+
+    async def _fake_call_ollama(prompt):
+        calls.append(prompt)
+        return "Refunds take 5-10 days."
+
+    monkeypatch.setattr(retrieval, "call_ollama", _fake_call_ollama)
+
+    first = await retrieval.get_answer("How long do refunds take?")
+    second = await retrieval.get_answer("how long do refunds take?")
+
+    assert len(calls) == 1
+    assert second == first
+
+    chunks = [c async for c in retrieval.stream_answer("How long do refunds take?")]
+    assert chunks[0] == "Refunds take 5-10 days."
+    assert "[SOURCES]" in chunks[-1]
+    assert len(calls) == 1
+
+
+def test_rerank_cache_scores_only_new_pairs(monkeypatch):
+    """Pairs scored once are served from the rerank cache on the next search."""
+    retrieval.invalidate_caches()
+    predicted = []
+    real_rerank = retrieval.RERANK
+
+    class _RecordingRerank:
+        def predict(self, pairs, *args, **kwargs):
+            predicted.append(len(pairs))
+            return real_rerank.predict(pairs, *args, **kwargs)
+
+    monkeypatch.setattr(retrieval, "RERANK", _RecordingRerank())
+
+    query = "instant payout fee rerank cache"
+    wide = retrieval._search(query, k=4, overfetch=5)     # 20 candidates scored
+    narrow = retrieval._search(query, k=2, overfetch=5)   # 10 candidates, all cached
+
+    assert predicted == [20]
+    assert len(wide) == 4 and len(narrow) == 2
+    assert narrow[0]["score"] >= narrow[1]["score"]
+    assert retrieval.RERANK_CACHE.hits >= 10
+
+    retrieval.invalidate_caches()
+    retrieval._search(query, k=2, overfetch=5)
+    assert predicted == [20, 10]
+
+
+def test_plan_rerank_paths():
+    """Dense-score shape decides how much of the candidate set gets reranked."""
+    import numpy as np
+
+    k, overfetch = 2, 5
+    clear_winner = np.array([0.90, 0.88, 0.60] + [0.55] * 17)
+    assert retrieval._plan_rerank(clear_winner, k, overfetch) == ("skip", 0)
+
+    confident = np.array([0.90, 0.88, 0.80] + [0.70] * 17)
+    assert retrieval._plan_rerank(confident, k, overfetch) == ("shrink", 2 * k)
+
+    flat = np.linspace(0.81, 0.80, 40)
+    assert retrieval._plan_rerank(flat, k, overfetch) == ("widen", 40)
+
+    ordinary = np.linspace(0.90, 0.60, 20)
+    assert retrieval._plan_rerank(ordinary, k, overfetch) == ("full", k * overfetch)
+
+
+def test_adaptive_retrieve_skips_rerank_on_clear_margin(monkeypatch):
+    """A 'skip' plan returns the dense top-k without calling the cross-encoder."""
+    retrieval.invalidate_caches()
+    monkeypatch.setattr(retrieval, "_plan_rerank", lambda dense, k, overfetch: ("skip", 0))
+
+    class _NoRerank:
+        def predict(self, *args, **kwargs):
+            raise AssertionError("cross-encoder must not run on the skip path")
+
+    monkeypatch.setattr(retrieval, "RERANK", _NoRerank())
+
+    ctx, path = retrieval._retrieve("when is my first payout", k=3, adaptive=True)
+    assert path == "skip" and len(ctx) == 3
+    assert [s["score"] for s in ctx] == sorted((s["score"] for s in ctx), reverse=True)
+
+    _, path = retrieval._retrieve("When is my  first payout", k=3, adaptive=True)
+    assert path == "cached"
+    retrieval.invalidate_caches()
+
+
+def _write_version(art_dir, version, texts, bm25=False):
+    import faiss
+    import numpy as np
+    from app import artifacts, sparse, store
+
+    d = artifacts.version_dir(art_dir, version)
+    vecs = np.asarray(retrieval.EMBED.encode(texts, normalize_embeddings=True), dtype="float32")
+    index = faiss.IndexFlatIP(vecs.shape[1])
+    index.add(vecs)
+    d.mkdir(parents=True)
+    faiss.write_index(index, str(d / artifacts.INDEX_NAME))
+    store.write_store(texts, d)
+    if bm25:
+        sparse.BM25Index.build(texts).save(d)
+    artifacts.publish(art_dir, version)
+
+
+@pytest.fixture
+def versioned_artifacts(tmp_path, monkeypatch):
+    """Point retrieval at an empty versioned ART_DIR; restore the live snapshot afterwards."""
+    original = retrieval.SNAPSHOT
+    monkeypatch.setattr(retrieval, "SNAPSHOT", original)
+    monkeypatch.setattr(retrieval, "ART_DIR", tmp_path)
+    yield tmp_path
+    retrieval.INDEX_INFO.info({"version": original.version})
+    retrieval.invalidate_caches()
+
+
+def test_reload_index_swaps_snapshot_atomically(versioned_artifacts):
+    """A reload swaps in the new version; holders of the old snapshot are unaffected."""
+    tmp_path = versioned_artifacts
+
+    v1 = ["Refunds take 5-10 days.", "Payouts arrive in 2 days.", "Disputes cost $15."]
+    _write_version(tmp_path, "v1", v1)
+    first = retrieval.reload_index()
+    assert first["version"] == "v1" and first["reloaded"] is True
+    assert retrieval.reload_index()["reloaded"] is False       # already current
+
+    in_flight = retrieval.SNAPSHOT
+    _write_version(tmp_path, "v2", ["Instant Payouts cost 1%.", "Refunds are free."])
+    result = retrieval.reload_index()
+
+    assert result == {"version": "v2", "previous": "v1", "reloaded": True}
+    assert retrieval.SNAPSHOT.version == "v2" and retrieval.SNAPSHOT.index.ntotal == 2
+    assert in_flight.version == "v1" and in_flight.texts[0] == v1[0]
+    assert all(s["text"] in ("Instant Payouts cost 1%.", "Refunds are free.")
+               for s in retrieval._search("refund fee", k=2, overfetch=1))
+
+
+def test_failed_reload_keeps_serving_old_version(versioned_artifacts):
+    from app import artifacts
+
+    tmp_path = versioned_artifacts
+    before = retrieval.SNAPSHOT
+
+    d = artifacts.version_dir(tmp_path, "v1")
+    d.mkdir(parents=True)
+    (d / artifacts.INDEX_NAME).write_bytes(b"not a faiss index")
+    artifacts.publish(tmp_path, "v1")
+
+    with pytest.raises(Exception):
+        retrieval.reload_index()
+    assert retrieval.SNAPSHOT is before
+
+
+def test_reload_recovers_from_a_failed_start_up(versioned_artifacts, monkeypatch):
+    """A broken artefact at start-up is replaced and loaded without a restart."""
+    from app import artifacts
+    from app.loader import BackgroundLoader
+
+    tmp_path = versioned_artifacts
+    d = artifacts.version_dir(tmp_path, "v1")
+    d.mkdir(parents=True)
+    (d / artifacts.INDEX_NAME).write_bytes(b"not a faiss index")
+    artifacts.publish(tmp_path, "v1")
+
+    loader = BackgroundLoader()
+    for name in retrieval.SNAPSHOT_COMPONENTS:
+        loader.add(name, getattr(retrieval, f"_load_{name}"))
+    monkeypatch.setattr(retrieval, "LOADER", loader)
+    monkeypatch.setattr(retrieval, "SNAPSHOT", None)
+    loader.wait(timeout=10)
+    assert loader.failed
+
+    _write_version(tmp_path, "v2", ["Refunds are free.", "Payouts arrive in 2 days."])
+    result = retrieval.reload_index()
+
+    assert result == {"version": "v2", "previous": "v1", "reloaded": True}
+    assert loader.ready and retrieval.SNAPSHOT.index.ntotal == 2
+    assert retrieval._search("refund", k=1, overfetch=1)[0]["text"] == "Refunds are free."
+
+
+@pytest.mark.asyncio
+async def test_answers_from_a_replaced_index_are_not_cached(monkeypatch):
+    """An answer finished after a reload must not be served on the new version."""
+    from app.cache import SemanticCache
+
+    monkeypatch.setattr(retrieval, "ANSWER_CACHE", SemanticCache("answer_reload_test", threshold=0.95))
+    new_version = retrieval.IndexSnapshot("v-next", retrieval.SNAPSHOT.path)
+
+    async def _reload_mid_generation(prompt):
+        monkeypatch.setattr(retrieval, "SNAPSHOT", new_version)
+        return "Answer from the old index."
+
+    monkeypatch.setattr(retrieval, "call_ollama", _reload_mid_generation)
+    await retrieval.get_answer("Does a reload drop in-flight answers?")
+    assert len(retrieval.ANSWER_CACHE) == 0
+
+
+def test_hybrid_search_fuses_bm25_hits_into_rerank_candidates(versioned_artifacts, monkeypatch):
+    """An exact-token match reaches the cross-encoder even if dense search misses it."""
+    texts = [f"General note number {i} about Stripe accounts and settings." for i in range(40)]
+    texts[23] = "The API returns resource_missing when the object id does not exist."
+    _write_version(versioned_artifacts, "v1", texts, bm25=True)
+    retrieval.reload_index()
+    assert retrieval.SNAPSHOT.sparse is not None
+
+    seen = []
+
+    class _PreferExact:
+        def predict(self, pairs, *args, **kwargs):
+            seen.extend(p for _, p in pairs)
+            return [1.0 if "resource_missing" in p else 0.0 for _, p in pairs]
+
+    monkeypatch.setattr(retrieval, "RERANK", _PreferExact())
+    ctx = retrieval._search("what does resource_missing mean", k=2, overfetch=1)
+
+    assert len(seen) == 2 and texts[23] in seen              # fused head, same candidate budget
+    assert ctx[0]["id"] == 23 and ctx[0]["text"] == texts[23]
+
+
+def test_adaptive_skip_keeps_bm25_hits(versioned_artifacts, monkeypatch):
+    """The skip path returns the fused top-k, so a lexical-only hit is not dropped."""
+    import numpy as np
+
+    texts = [f"General note number {i} about Stripe accounts and settings." for i in range(40)]
+    texts[23] = "The API returns resource_missing when the object id does not exist."
+    _write_version(versioned_artifacts, "v1", texts, bm25=True)
+    retrieval.reload_index()
+    monkeypatch.setattr(retrieval, "_plan_rerank", lambda dense, k, overfetch: ("skip", 0))
+
+    class _DenseMisses:                   # dense ranking that never contains passage 23
+        def search(self, q, n):
+            return np.linspace(0.9, 0.5, n, dtype="float32")[None, :], np.arange(n, dtype="int64")[None, :]
+
+    monkeypatch.setattr(retrieval.SNAPSHOT, "index", _DenseMisses())
+
+    class _NoRerank:
+        def predict(self, *args, **kwargs):
+            raise AssertionError("cross-encoder must not run on the skip path")
+
+    monkeypatch.setattr(retrieval, "RERANK", _NoRerank())
+    ctx, path = retrieval._retrieve("what does resource_missing mean", k=2, overfetch=1, adaptive=True)
+
+    assert path == "skip" and len(ctx) == 2
+    assert 23 in [s["id"] for s in ctx]
+    assert [s["score"] for s in ctx] == sorted((s["score"] for s in ctx), reverse=True)
+
+
+def test_search_returns_passage_metadata_columns(versioned_artifacts):
+    from app import artifacts, metadata
+
+    texts = ["Refunds take 5-10 days to appear.", "Payouts arrive in 2 business days."]
+    _write_version(versioned_artifacts, "v1", texts)
+    metadata.PassageMetadata.build(
+        {"url": f"https://support.stripe.com/questions/{slug}", "title": title, "text": t}
+        for slug, title, t in zip(("refunds", "payouts"), ("Refunds", "Payouts"), texts)
+    ).save(artifacts.version_dir(versioned_artifacts, "v1"))
+    retrieval.reload_index()
+
+    ctx = retrieval._search("refunds", k=2, overfetch=1)
+    by_id = {s["id"]: s for s in ctx}
+    assert by_id[0]["url"] == "https://support.stripe.com/questions/refunds"
+    assert by_id[0]["title"] == "Refunds" and by_id[0]["article"] == "refunds"
+    assert by_id[1]["tokens"] == metadata.count_tokens(texts[1])
+    assert (by_id[1]["start"], by_id[1]["end"]) == (0, len(texts[1]))   # no chunking: the whole passage
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_questions_are_coalesced(monkeypatch):
+    import asyncio
+
+    calls = {"search": 0, "ollama": 0}
+
+    def _fake_search(query, k=4, overfetch=5):
+        calls["search"] += 1
+        return [{"id": 1, "text": "Refunds take 5-10 days.", "score": 0.9}]
+
+    async def _fake_call_ollama(prompt):
+        calls["ollama"] += 1
+        await asyncio.sleep(0.02)
+        return "5-10 days."
+
+    monkeypatch.setattr(retrieval, "_search", _fake_search)
+    monkeypatch.setattr(retrieval, "call_ollama", _fake_call_ollama)
+    monkeypatch.setattr(retrieval, "COALESCE_REQUESTS", True)
+
+    results = await asyncio.gather(*(retrieval.get_answer(q) for q in
+                                     ["How long do refunds take?", "how long do  refunds take?"] * 3))
+    assert calls == {"search": 1, "ollama": 1}
+    assert all(r == ("5-10 days.", [{"id": 1, "text": "Refunds take 5-10 days.", "score": 0.9}]) for r in results)
+    results[0][1][0]["score"] = 0                     # callers get their own source dicts
+    assert results[1][1][0]["score"] == 0.9
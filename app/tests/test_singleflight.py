@@ -0,0 +1,83 @@
+# app/tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight, StreamFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    flights, runs = SingleFlight("test"), []
+
+    async def _work(tag):
+        runs.append(tag)
+        await asyncio.sleep(0.02)
+        return {"answer": tag}
+
+    results = await asyncio.gather(*(flights.do("q", lambda i=i: _work(i)) for i in range(5)),
+                                   flights.do("other", lambda: _work("other")))
+    assert runs == [0, "other"]
+    assert results[:5] == [{"answer": 0}] * 5 and results[5] == {"answer": "other"}
+    assert len(flights) == 0                          # forgotten once done, not cached
+    assert await flights.do("q", lambda: _work("again")) == {"answer": "again"}
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    flights = SingleFlight("test")
+
+    async def _boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("ollama down")
+
+    results = await asyncio.gather(*(flights.do("q", _boom) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_leader_disconnect_does_not_cancel_followers():
+    flights, started = SingleFlight("test"), asyncio.Event()
+
+    async def _work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.ensure_future(flights.do("q", _work))
+    await started.wait()
+    follower = asyncio.ensure_future(flights.do("q", _work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "done"
+
+
+async def _tokens(log, n=4, delay=0.01):
+    log.append("run")
+    for i in range(n):
+        await asyncio.sleep(delay)
+        yield f"t{i} "
+
+
+@pytest.mark.asyncio
+async def test_stream_followers_replay_buffer_and_follow_live():
+    flights, log = StreamFlight("test"), []
+
+    async def _collect(delay=0.0):
+        await asyncio.sleep(delay)
+        return [c async for c in flights.subscribe("q", lambda: _tokens(log))]
+
+    first, late = await asyncio.gather(_collect(), _collect(delay=0.025))   # joins after ~2 tokens
+    assert log == ["run"]
+    assert first == late == ["t0 ", "t1 ", "t2 ", "t3 "]
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_is_cancelled_when_every_subscriber_leaves():
+    flights, log = StreamFlight("test"), []
+    stream = flights.subscribe("q", lambda: _tokens(log, n=100))
+    assert await anext(stream) == "t0 "
+    await stream.aclose()
+    await asyncio.sleep(0.02)
+    assert len(flights) == 0
@@ -0,0 +1,52 @@
+# app/tests/test_sparse.py
+import numpy as np
+
+from app import sparse
+
+DOCS = [
+    "Your card was declined with the code card_declined.",
+    "Payouts to a bank account in Germany take two business days.",
+    "",                                                   # hole left by a removed paragraph
+    "Refunds return the payment to the customer's card.",
+]
+
+
+def test_bm25_ranks_exact_tokens_and_skips_holes():
+    index = sparse.BM25Index.build(DOCS)
+    assert index.n_docs == 4
+
+    labels, scores = index.search("Why card_declined?", 5)
+    assert labels.tolist() == [0]
+
+    labels, scores = index.search("card refunds", 5)
+    assert labels.tolist() == [3, 0]                     # 3 matches both terms
+    assert scores[0] > scores[1] > 0
+
+    assert index.search("germany", 1)[0].tolist() == [1]
+    assert index.search("nothing matches", 5)[0].size == 0
+    assert 2 not in index.search("the a to", 10)[0]
+
+
+def test_bm25_weights_match_reference_formula():
+    index = sparse.BM25Index.build(DOCS, k1=1.2, b=0.75)
+    tokens = [sparse.tokenize(d) for d in DOCS]
+    n, avg = sum(1 for t in tokens if t), np.mean([len(t) for t in tokens if t])   # the hole is no document
+    df = sum("card" in t for t in tokens)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    tf, dl = tokens[3].count("card"), len(tokens[3])
+    expected = idf * tf * 2.2 / (tf + 1.2 * (1 - 0.75 + 0.75 * dl / avg))
+    labels, scores = index.search("card", 4)
+    assert abs(scores[labels.tolist().index(3)] - expected) < 1e-5
+
+
+def test_save_load_roundtrip(tmp_path):
+    sparse.BM25Index.build(DOCS).save(tmp_path)
+    assert sparse.exists(tmp_path)
+    loaded = sparse.BM25Index.load(tmp_path)
+    assert loaded.search("refunds card", 2)[0].tolist() == [3, 0]
+
+
+def test_rrf_rewards_agreement_and_keeps_first_ranking_on_ties():
+    fused = sparse.rrf([[1, 2, 3], [3, 4]], k=60)
+    assert [doc for doc, _ in fused][:2] == [3, 1]       # in both lists beats a single top-1
+    assert [doc for doc, _ in sparse.rrf([[7, 8], [8, 7]])] == [7, 8]
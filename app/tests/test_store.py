@@ -0,0 +1,47 @@
+# app/tests/test_store.py
+import numpy as np
+import pytest
+
+from app import store
+
+
+def test_round_trip_preserves_text(tmp_path):
+    texts = ["Refunds take 5–10 days.", "Payouts: ¥, €, £ all supported.", ""]
+    assert store.write_store(texts, tmp_path) == 3
+    s = store.PassageStore(tmp_path)
+    assert len(s) == 3
+    assert [s[i] for i in range(3)] == texts
+    assert s[np.int64(1)] == texts[1]      # FAISS returns numpy ints
+    assert s[-1] == texts[-1]
+    s.close()
+
+
+def test_out_of_range_raises(tmp_path):
+    store.write_store(["only one"], tmp_path)
+    s = store.PassageStore(tmp_path)
+    with pytest.raises(IndexError):
+        s[1]
+    s.close()
+
+
+def test_empty_store(tmp_path):
+    store.write_store([], tmp_path)
+    s = store.PassageStore(tmp_path)
+    assert len(s) == 0
+    s.close()
+
+
+def test_offsets_are_memory_mapped(tmp_path):
+    store.write_store(["a", "b"], tmp_path)
+    s = store.PassageStore(tmp_path)
+    assert isinstance(s.offsets, np.memmap)
+    s.close()
+
+
+def test_convert_legacy_meta(tmp_path):
+    meta = tmp_path / "meta.npy"
+    np.save(meta, np.array(["first", "second"], dtype=object))
+    assert not store.exists(tmp_path)
+    store.convert_meta(meta, tmp_path)
+    assert store.exists(tmp_path)
+    assert store.PassageStore(tmp_path)[1] == "second"
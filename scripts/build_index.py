@@ -1,12 +1,21 @@
-import json, pathlib, numpy as np, faiss, warnings, time
+import argparse, array, json, pathlib, shutil, sys, numpy as np, faiss, warnings, time
 from tqdm.auto import tqdm
 from sentence_transformers import SentenceTransformer, util
 
-# -------- paths -----------------------------------------------------------
-DATA_PATH = pathlib.Path("data/raw/stripe_faqs_full.jsonl")
-ART_DIR   = pathlib.Path("artifacts"); ART_DIR.mkdir(exist_ok=True)
-IDX_FILE  = ART_DIR / "faiss.idx"
-META_FILE = ART_DIR / "meta.npy"
+# ensure project root is on sys.path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import ann    # index factory + recall / latency benchmark
+from app import store  # mmap-able passage store
+from app import manifest  # content hashes → FAISS labels, for incremental builds
+from app import embedding  # lazy corpus reads + multi-process, resumable encoding
+from app import artifacts  # versions/<v>/ directories + CURRENT pointer
+from app import dedup      # exact + MinHash near-duplicate removal
+from app import sparse     # BM25 inverted index for hybrid search
+from app import metadata   # url / title / article / token columns per label
+from app import chunking   # token-bounded chunks of whole articles
 
 # -------- choose an available embedding model ----------------------------
 CANDIDATES = [
@@ -15,44 +24,412 @@ CANDIDATES = [
     "thenlper/gte-base",
 ]
 
-model = None
-for name in CANDIDATES:
+
+def load_model(names):
+    for name in names:
+        try:
+            t0 = time.time()
+            model = SentenceTransformer(name)
+            print(f"✅  Loaded '{name}' in {time.time()-t0:.1f}s")
+            return name, model
+        except Exception as e:
+            warnings.warn(f"Model '{name}' failed: {e}")
+    raise RuntimeError("No embedding model could be loaded. Check internet / HF token.")
+
+
+def main():
+    # -------- CLI ---------------------------------------------------------------
+    parser = argparse.ArgumentParser(description="Embed the FAQ corpus and build the FAISS index.")
+    parser.add_argument("--input", default="data/raw/stripe_faqs_full.jsonl", help="JSONL with a 'text' field per line")
+    parser.add_argument("--output_dir", default="artifacts", help="where faiss.idx / passages.bin are written")
+    parser.add_argument("--index", choices=ann.INDEX_TYPES, default="flat", help="FAISS index structure")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF clusters (default ≈ 4·√n)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF clusters probed per query")
+    parser.add_argument("--pq-m", type=int, default=16, help="IVF-PQ sub-quantisers (must divide dim)")
+    parser.add_argument("--pq-bits", type=int, default=8, help="IVF-PQ bits per sub-quantiser")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW neighbours per node")
+    parser.add_argument("--ef-construction", type=int, default=200, help="HNSW build-time beam width")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW query-time beam width")
+    parser.add_argument("--storage", choices=ann.STORAGE_TYPES, default="fp32",
+                        help="stored vector precision: fp16 / int8 scalar quantisation (flat, ivf, hnsw)")
+    parser.add_argument("--reduce", choices=ann.REDUCE_TYPES, default=None,
+                        help="reduce dimensionality before indexing: pca, or truncate (Matryoshka embedders only)")
+    parser.add_argument("--reduce-dim", type=int, default=None, help="target dimension for --reduce")
+    parser.add_argument("--report-k", type=int, default=10, help="k for the recall@k report")
+    parser.add_argument("--bench-queries", type=int, default=200, help="benchmark queries per report (0 = skip)")
+    parser.add_argument("--bench-questions", default="data/eval/dev_set.jsonl",
+                        help="JSONL of held-out questions embedded as benchmark queries; "
+                             "without it, corpus vectors are sampled (optimistic recall)")
+    parser.add_argument("--sweep", type=int, nargs="*", default=[1, 2, 4, 8, 16, 32, 64, 128],
+                        help="nprobe / efSearch values to report for IVF / HNSW indexes")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest: re-embed everything, retrain and compact labels")
+    parser.add_argument("--compact-ratio", type=float, default=0.2,
+                        help="do a full rebuild once this share of labels is left empty by removals (0 = never)")
+    parser.add_argument("--workers", type=int, default=1, help="embedding worker processes (each loads the model)")
+    parser.add_argument("--batch-size", type=int, default=256, help="paragraphs per checkpointed batch")
+    parser.add_argument("--keep-versions", type=int, default=3, help="artefact versions kept for rollback")
+    parser.add_argument("--dedup", choices=("minhash", "exact", "none"), default="minhash",
+                        help="drop exact and/or near-duplicate paragraphs before embedding")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8,
+                        help="estimated shingle Jaccard at which paragraphs count as near duplicates")
+    parser.add_argument("--chunk-tokens", type=int, default=0,
+                        help="re-cut articles into chunks of at most this many embedder tokens, e.g. 256 "
+                             "(0 = index raw paragraphs)")
+    parser.add_argument("--chunk-overlap", type=int, default=32,
+                        help="tokens shared by consecutive chunks of an article (with --chunk-tokens)")
+    parser.add_argument("--bm25", action=argparse.BooleanOptionalAction, default=True,
+                        help="also write a BM25 index for hybrid (dense + lexical) search")
+    args = parser.parse_args()
+    if args.chunk_tokens <= 0:
+        args.chunk_tokens, args.chunk_overlap = 0, 0   # overlap means nothing without chunking
+    if (args.reduce is None) != (args.reduce_dim is None):
+        parser.error("--reduce and --reduce-dim go together")
+    if args.index == "ivfpq" and args.storage != "fp32":
+        parser.error("--index ivfpq already stores compressed codes; leave --storage at fp32")
+    layout = dict(storage=args.storage, reduce=args.reduce, reduce_dim=args.reduce_dim)
+
+    # -------- paths -----------------------------------------------------------
+    # Each build goes to ART_DIR/versions/<v>/ and only then becomes CURRENT,
+    # so a running server (hot reload) never sees a half-written version.
+    DATA_PATH  = pathlib.Path(args.input)
+    ART_DIR    = pathlib.Path(args.output_dir); ART_DIR.mkdir(parents=True, exist_ok=True)
+    WORK_DIR   = ART_DIR / ".build"   # vector shard + checkpoint of an unfinished build
     try:
+        _, CUR_DIR = artifacts.current(ART_DIR)
+    except FileNotFoundError:         # first build
+        CUR_DIR = ART_DIR
+    version    = artifacts.next_version(ART_DIR)
+    OUT_DIR    = artifacts.version_dir(ART_DIR, version)
+    IDX_FILE   = OUT_DIR / artifacts.INDEX_NAME
+    INFO_FILE  = OUT_DIR / "index.json"
+
+    # -------- scan texts lazily, dropping duplicates --------------------------
+    # Only byte offsets of kept paragraphs are held, never the corpus itself.
+    # Each kept paragraph remembers the URLs of all its duplicates.
+    offsets = array.array("q")   # byte offset of every kept paragraph
+    members = array.array("q")   # paragraphs folded into it (itself included)
+    urls    = []                 # source URLs behind it
+    size    = {"all": 0, "kept": 0}
+    deduper = None
+    if args.dedup != "none":
+        deduper = dedup.Deduper(threshold=args.dedup_threshold if args.dedup == "minhash" else None)
+
+    def kept_texts():
+        return embedding.read_at(DATA_PATH, offsets)
+
+    def scan_texts():
+        for off, rec in embedding.scan_jsonl(DATA_PATH, field=None):
+            text, url = rec["text"], rec.get("url")
+            size["all"] += len(text.encode("utf-8"))
+            group = deduper.add(text) if deduper else None
+            if group is None:
+                offsets.append(off)
+                members.append(1)
+                urls.append([url] if url else [])
+                size["kept"] += len(text.encode("utf-8"))
+                yield text
+            else:
+                members[group] += 1
+                if url and url not in urls[group]:
+                    urls[group].append(url)
+
+    # -------- diff against the previous build's manifest ----------------------
+    # An incremental update needs the same model and index type, and an index
+    # whose size matches the manifest (i.e. the last build finished cleanly).
+    previous = None if args.full else manifest.load(CUR_DIR)
+    old_file = CUR_DIR / artifacts.INDEX_NAME
+    old_index = faiss.read_index(str(old_file)) if previous is not None and old_file.exists() else None
+    if previous is not None:
+        stale = (
+            previous.get("index") != args.index
+            or old_index is None
+            or old_index.ntotal != previous.get("count")
+            or previous.get("chunk_tokens", 0) != args.chunk_tokens
+            or previous.get("chunk_overlap", 0) != args.chunk_overlap
+            or previous.get("storage", "fp32") != args.storage
+            or previous.get("reduce") != args.reduce
+            or previous.get("reduce_dim") != args.reduce_dim
+        )
+        if stale:
+            print("Manifest does not match the requested index – doing a full build.")
+            previous = None
+    models = [previous["model"]] if previous else CANDIDATES
+
+    # -------- re-cut kept paragraphs into token-bounded chunks ---------------
+    # Needs the embedder's own tokenizer, so the model is loaded up front.
+    # Chunks go to WORK_DIR/chunks.jsonl and replace paragraphs as index units
+    # from here on; each inherits the URLs of the paragraphs it covers.
+    name, model = None, None
+    n_paragraphs = None
+    chunk_file = WORK_DIR / "chunks.jsonl"
+    if args.chunk_tokens > 0:
+        for _ in scan_texts():         # dedup pass: fills offsets / members / urls
+            pass
+        name, model = load_model(models)
+        max_tokens = min(args.chunk_tokens, model.max_seq_length - 2)   # room for [CLS] / [SEP]
+        tokenizer  = model.tokenizer
+        span_fn    = chunking.tokenizer_spans(tokenizer) if getattr(tokenizer, "is_fast", False) else chunking.regex_spans
+        WORK_DIR.mkdir(parents=True, exist_ok=True)
+        c_offsets, c_members, c_urls = array.array("q"), array.array("q"), []
+        unclaimed = 0   # first paragraph whose duplicates no chunk carries yet (overlap repeats paragraphs)
+        with chunk_file.open("wb") as f:
+            paragraphs = embedding.read_at(DATA_PATH, offsets, field=None)
+            for chunk in chunking.chunk_articles(paragraphs, span_fn, max_tokens, args.chunk_overlap):
+                c_offsets.append(f.tell())
+                own = range(max(chunk.paragraphs.start, unclaimed), chunk.paragraphs.stop)
+                unclaimed = max(unclaimed, chunk.paragraphs.stop)
+                c_members.append(1 + sum(members[g] - 1 for g in own))
+                c_urls.append(list(dict.fromkeys(u for g in chunk.paragraphs for u in urls[g])))
+                f.write((json.dumps(chunk.record(), ensure_ascii=False) + "\n").encode("utf-8"))
+        n_paragraphs = len(offsets)
+        DATA_PATH, offsets, members, urls = chunk_file, c_offsets, c_members, c_urls
+        delta = manifest.plan(kept_texts(), previous)
+    else:
+        delta = manifest.plan(scan_texts(), previous)
+
+    # -------- compact labels once removals leave too many holes ----------------
+    # Empty labels still cost a passage-store / metadata / BM25 slot each; a
+    # full rebuild re-embeds everything but hands out dense labels again.
+    if previous is not None and args.compact_ratio > 0 and delta.holes > args.compact_ratio * delta.next_id:
+        print(f"🗜️  {delta.holes:,} of {delta.next_id:,} labels are empty – compacting with a full build.")
+        previous = None
+        delta = manifest.plan(kept_texts())
+
+    if deduper is not None:
+        kept  = n_paragraphs if n_paragraphs is not None else len(offsets)   # offsets may hold chunks by now
+        total = kept + deduper.removed
+        print(f"🧹  Dedup ({args.dedup}): {total:,} → {kept:,} paragraphs "
+              f"(−{deduper.removed / max(total, 1):.1%}: {deduper.exact_dups:,} exact, {deduper.near_dups:,} near) "
+              f"| text {size['all'] / 1e6:.2f} → {size['kept'] / 1e6:.2f} MB")
+    if n_paragraphs is not None:
+        print(f"✂️  Chunking: {n_paragraphs:,} paragraphs → {len(offsets):,} chunks of ≤ {max_tokens} tokens "
+              f"(overlap {args.chunk_overlap})")
+    print(f"{'Chunks' if n_paragraphs is not None else 'Paragraphs'}: {len(offsets):,} | new/changed {len(delta.added):,} "
+          f"| removed {len(delta.removed):,} | unchanged {delta.unchanged:,}")
+    if previous is not None and not delta.added and not delta.removed:
+        print(f"✅  Index {previous.get('version')} is up to date – nothing to do.")
+        chunk_file.unlink(missing_ok=True)   # WORK_DIR is otherwise only cleared after a build
+        return
+
+    # -------- embed only what changed ----------------------------------------
+    # Vectors stream into a memory-mapped shard; re-running an interrupted
+    # build with the same corpus resumes from the checkpoint.
+    t_build = time.time()
+    name = name or (previous["model"] if previous else None)
+    if delta.added:
+        if model is None:
+            name, model = load_model(models)
+        dim = model.get_sentence_embedding_dimension()
+        if args.workers > 1:
+            model = None   # workers load their own copy
+        print(f"Embedding {len(delta.added):,} paragraphs on {max(args.workers, 1)} worker(s) …")
+        with tqdm(total=len(delta.added)) as bar:
+            vecs = embedding.embed_to_shard(
+                embedding.select(kept_texts(), delta.added),
+                n=len(delta.added),
+                dim=dim,
+                shard_dir=WORK_DIR,
+                fingerprint=delta.fingerprint,
+                model_name=name,
+                model=model,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                on_batch=bar.update,
+            )
+        print("Vector matrix:", vecs.shape)
+    else:
+        vecs = np.zeros((0, 0), dtype="float32")
+
+    # -------- build / update & save FAISS -------------------------------------
+    t0 = time.time()
+    if previous is None:
+        index = ann.build_index(
+            vecs,
+            kind=args.index,
+            nlist=args.nlist,
+            nprobe=args.nprobe,
+            pq_m=args.pq_m,
+            pq_bits=args.pq_bits,
+            hnsw_m=args.hnsw_m,
+            ef_construction=args.ef_construction,
+            ef_search=args.ef_search,
+            ids=np.asarray(delta.ids, dtype="int64"),
+            **layout,
+        )
+        print(f"🏗️  Built '{args.index}' index in {time.time()-t0:.1f}s")
+    else:
+        index = ann.apply_delta(
+            old_index,
+            vecs,
+            np.asarray([delta.ids[i] for i in delta.added], dtype="int64"),
+            np.asarray(delta.removed, dtype="int64"),
+            **layout,
+        )
+        print(f"🔁  Updated '{args.index}' index in {time.time()-t0:.1f}s")
+
+    # Passages are addressed by label; labels of removed paragraphs stay empty
+    label_offsets = np.full(delta.next_id, -1, dtype="int64")
+    label_offsets[np.asarray(delta.ids, dtype="int64")] = np.frombuffer(offsets, dtype="int64")
+
+    shutil.rmtree(OUT_DIR, ignore_errors=True)   # leftovers of a crashed attempt
+    OUT_DIR.mkdir(parents=True)
+    faiss.write_index(index, str(IDX_FILE))
+    store.write_store(embedding.read_at(DATA_PATH, label_offsets), OUT_DIR)
+    metadata.PassageMetadata.build(embedding.read_at(DATA_PATH, label_offsets, field=None)).save(OUT_DIR)
+    # BM25 is rebuilt over all passages each time: idf depends on the whole corpus
+    bm25 = None
+    if args.bm25:
         t0 = time.time()
-        model = SentenceTransformer(name)
-        print(f"✅  Loaded '{name}' in {time.time()-t0:.1f}s")
-        break
-    except Exception as e:
-        warnings.warn(f"Model '{name}' failed: {e}")
+        bm25 = sparse.BM25Index.build(embedding.read_at(DATA_PATH, label_offsets))
+        bm25.save(OUT_DIR)
+        print(f"🔤  BM25 index: {len(bm25.terms):,} terms, {bm25.matrix.nnz:,} postings in {time.time()-t0:.1f}s")
+    # sources.jsonl: line i lists every URL whose paragraph was folded into label i
+    sources = [[] for _ in range(delta.next_id)]
+    for i, u in zip(delta.ids, urls):
+        sources[i] = u
+    with (OUT_DIR / "sources.jsonl").open("w", encoding="utf-8") as f:
+        f.writelines(json.dumps(u, ensure_ascii=False) + "\n" for u in sources)
+    INFO_FILE.write_text(json.dumps({
+        "type": args.index,
+        "model": name,
+        "dim": int(index.d),
+        "storage": args.storage,
+        "reduce": args.reduce,
+        "reduce_dim": args.reduce_dim,
+        "ntotal": int(index.ntotal),
+        "nprobe": args.nprobe,
+        "ef_search": args.ef_search,
+        "version": version,
+        "dedup": args.dedup,
+        "dedup_threshold": args.dedup_threshold if args.dedup == "minhash" else None,
+        "bm25": bm25 is not None,
+        "chunk_tokens": max_tokens if n_paragraphs is not None else None,
+        "chunk_overlap": args.chunk_overlap if n_paragraphs is not None else None,
+    }, indent=2))
+    manifest.save(manifest.build(kept_texts(), delta, version=version, model=name, index=args.index,
+                                 chunk_tokens=args.chunk_tokens, chunk_overlap=args.chunk_overlap, **layout), OUT_DIR)
+    artifacts.publish(ART_DIR, version)
+    pruned = artifacts.prune(ART_DIR, args.keep_versions)
+
+    print(f"🎉  Index {version} saved in {time.time()-t_build:.1f}s →", OUT_DIR,
+          f"(now CURRENT{'; pruned ' + ', '.join(pruned) if pruned else ''})")
+    print("    A running server picks it up via POST /admin/reload or INDEX_WATCH_S.")
+
+    # -------- recall / latency report vs. exact search ------------------------
+    if previous is not None and args.bench_queries > 0:
+        print("ANN report skipped on incremental builds (run with --full to benchmark).")
+    elif args.bench_queries > 0:
+        # Real questions are not in the corpus; a sampled corpus vector always
+        # finds itself, which flatters recall, so it is only the fallback.
+        bench_file = pathlib.Path(args.bench_questions)
+        questions  = []
+        if bench_file.exists():
+            with bench_file.open(encoding="utf-8") as f:
+                questions = [q for q in (json.loads(line).get("question") for line in f if line.strip()) if q]
+            questions = questions[:args.bench_queries]
+        if questions:
+            if model is None:
+                _, model = load_model([name])
+            queries = np.asarray(model.encode(questions, normalize_embeddings=True, show_progress_bar=False),
+                                 dtype="float32")
+            source  = f"held-out questions from {bench_file}"
+        else:
+            rng     = np.random.default_rng(0)
+            sample  = rng.choice(len(vecs), size=min(args.bench_queries, len(vecs)), replace=False)
+            queries = vecs[sample]
+            source  = "corpus vectors – recall is optimistic"
+        exact   = args.index == "flat" and args.storage == "fp32" and args.reduce is None
+        flat    = index if exact else ann.build_index(vecs, kind="flat", ids=np.asarray(delta.ids))
+
+        rows = {"flat (exact)": ann.benchmark(flat, flat, queries, args.report_k)}
+        if args.index in ("ivf", "ivfpq"):
+            nlist = faiss.extract_index_ivf(index).nlist
+            for nprobe in sorted(set(args.sweep) | {args.nprobe}):
+                if nprobe > nlist:
+                    continue
+                ann.set_search_params(index, nprobe=nprobe)
+                rows[f"{args.index} nlist={nlist} nprobe={nprobe}"] = ann.benchmark(index, flat, queries, args.report_k)
+            ann.set_search_params(index, nprobe=args.nprobe)
+        elif args.index == "hnsw":
+            for ef in sorted(set(args.sweep) | {args.ef_search}):
+                ann.set_search_params(index, ef_search=ef)
+                rows[f"hnsw M={args.hnsw_m} efSearch={ef}"] = ann.benchmark(index, flat, queries, args.report_k)
+            ann.set_search_params(index, ef_search=args.ef_search)
+
+        print(f"\n── ANN report ({len(queries)} {source}, one at a time) ──")
+        print(ann.format_report(rows, args.report_k))
+        print("Saved index uses nprobe / efSearch from the CLI; override at serve time with FAISS_NPROBE / FAISS_EF_SEARCH.")
+
+        # -------- stored precision / dimension vs. the float32 layout ---------
+        # Same index type and search knobs, only the vector layout differs.
+        if args.storage != "fp32" or args.reduce is not None:
+            rows = {}
+            for storage in ann.STORAGE_TYPES if args.index != "ivfpq" else ("fp32",):
+                if storage == args.storage and args.reduce is None:
+                    variant = index
+                else:
+                    variant = ann.build_index(
+                        vecs,
+                        kind=args.index,
+                        nlist=args.nlist,
+                        nprobe=args.nprobe,
+                        pq_m=args.pq_m,
+                        pq_bits=args.pq_bits,
+                        hnsw_m=args.hnsw_m,
+                        ef_construction=args.ef_construction,
+                        ef_search=args.ef_search,
+                        ids=np.asarray(delta.ids, dtype="int64"),
+                        storage=storage,
+                    )
+                rows[f"{args.index} {storage} d={vecs.shape[1]}"] = ann.benchmark(variant, flat, queries, args.report_k)
+            if args.reduce is not None:
+                rows[f"{args.index} {args.storage} {args.reduce} d={args.reduce_dim}"] = \
+                    ann.benchmark(index, flat, queries, args.report_k)
+            print("\n── Vector storage report (recall vs. exact float32) ──")
+            print(ann.format_report(rows, args.report_k))
+
+        # -------- BM25 side of hybrid search: the same questions, else the first
+        # words of the sampled passages
+        if bm25 is not None:
+            probes = questions or [" ".join(sparse.tokenize(t)[:8])
+                                   for t in embedding.select(kept_texts(), sorted(sample))]
+            ms = []
+            for q in probes:
+                t0 = time.perf_counter()
+                bm25.search(q, args.report_k)
+                ms.append((time.perf_counter() - t0) * 1e3)
+            print(f"BM25 query latency ({len(probes)} queries): mean {np.mean(ms):.3f} ms | p95 {np.percentile(ms, 95):.3f} ms")
+
+        # -------- what dedup bought: the same index with duplicates put back ---
+        # Dropped paragraphs were never embedded, so each is stood in for by a
+        # copy of the vector it was folded into.
+        if deduper is not None and deduper.removed:
+            copies = np.repeat(np.arange(len(vecs)), np.frombuffer(members, dtype="int64") - 1)
+            undup  = ann.build_index(
+                np.vstack([vecs, vecs[copies]]),
+                kind=args.index,
+                nlist=args.nlist,
+                nprobe=args.nprobe,
+                pq_m=args.pq_m,
+                pq_bits=args.pq_bits,
+                hnsw_m=args.hnsw_m,
+                ef_construction=args.ef_construction,
+                ef_search=args.ef_search,
+                **layout,
+            )
+            before = ann.benchmark(undup, undup, queries, args.report_k)
+            after  = ann.benchmark(index, flat, queries, args.report_k)
+            print(f"\n── Dedup impact on '{args.index}' search ──")
+            print(f"vectors  : {undup.ntotal:>10,} → {index.ntotal:,}")
+            print(f"size MB  : {before['bytes'] / 1e6:>10.2f} → {after['bytes'] / 1e6:.2f}")
+            print(f"mean ms  : {before['mean_ms']:>10.3f} → {after['mean_ms']:.3f}")
+            print(f"p95 ms   : {before['p95_ms']:>10.3f} → {after['p95_ms']:.3f}")
+
+    # The shard only matters for resuming; the index now holds the vectors
+    vecs = None
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
 
-if model is None:
-    raise RuntimeError("No embedding model could be loaded. Check internet / HF token.")
 
-# -------- load texts ------------------------------------------------------
-texts = []
-with DATA_PATH.open() as f:
-    for line in f:
-        texts.append(json.loads(line)["text"])
-
-print(f"Embedding {len(texts):,} paragraphs …")
-
-# -------- embed in batches -----------------------------------------------
-vecs = []
-for start in tqdm(range(0, len(texts), 256)):
-    batch = texts[start:start+256]
-    vec   = model.encode(batch,
-                         batch_size=64,
-                         normalize_embeddings=True,
-                         show_progress_bar=False)
-    vecs.append(vec.astype("float32"))
-
-vecs = np.vstack(vecs)
-print("Vector matrix:", vecs.shape)
-
-# -------- build & save FAISS ---------------------------------------------
-index = faiss.IndexFlatIP(vecs.shape[1])
-index.add(vecs)
-faiss.write_index(index, str(IDX_FILE))
-np.save(META_FILE, np.array(texts, dtype=object))
-
-print("🎉  FAISS index saved →", IDX_FILE, "| meta →", META_FILE)
+if __name__ == "__main__":  # guard needed: --workers spawns processes that import this file
+    main()
@@ -9,12 +9,19 @@ that powers the FastAPI endpoint, then prints:
 • per-query latency + pass/fail (all keywords found?)
 • aggregate hit-rate & latency stats
 
+With ``--adaptive-report`` it skips the LLM and instead compares adaptive
+rerank (``ADAPTIVE_RERANK``) against the full rerank for every question:
+how often each path (full / shrink / widen / skip) was taken, recall@k of
+the adaptive top-k relative to the full rerank, and retrieval latency.
+
 Intended for local regression checks or lightweight CI gating.
 """
 
 from __future__ import annotations
 
+import argparse
 import asyncio
+import collections
 import json
 import pathlib
 import statistics
@@ -41,16 +48,71 @@ async def _one_pass(question: str, keywords: List[str]):
     return latency, hit, answer, ctx
 
 
+def _drop_caches() -> None:
+    """Forget query vectors, ctx and rerank scores so each variant does real work."""
+    retrieval.QVEC_CACHE.clear()
+    retrieval.CTX_CACHE.clear()
+    retrieval.RERANK_CACHE.clear()
+
+
+def adaptive_report(rows: List[dict], k: int = 4) -> None:
+    """Path frequency and recall@k of adaptive rerank vs. the full rerank."""
+    retrieval.LOADER.load()
+    paths: collections.Counter = collections.Counter()
+    recall_by_path: dict[str, list[float]] = collections.defaultdict(list)
+    lat_full: list[float] = []
+    lat_adapt: list[float] = []
+
+    for row in rows:
+        q = row["question"]
+        _drop_caches()
+        t0 = time.perf_counter()
+        full, _ = retrieval._retrieve(q, k=k, adaptive=False)
+        lat_full.append(time.perf_counter() - t0)
+
+        _drop_caches()
+        t0 = time.perf_counter()
+        adapt, path = retrieval._retrieve(q, k=k, adaptive=True)
+        lat_adapt.append(time.perf_counter() - t0)
+
+        recall = len({s["id"] for s in adapt} & {s["id"] for s in full}) / max(len(full), 1)
+        paths[path] += 1
+        recall_by_path[path].append(recall)
+        print(f"{path:<7} recall@{k}={recall:.2f}  {q[:52]}")
+
+    n = len(rows)
+    print("\n── Adaptive rerank ─────────")
+    for path in ("full", "shrink", "widen", "skip"):
+        if paths[path]:
+            print(f"{path:<7}: {paths[path]:>4} ({paths[path] / n * 100:4.0f}%)  "
+                  f"mean recall@{k} {statistics.mean(recall_by_path[path]):.2f}")
+    all_recalls = [r for rs in recall_by_path.values() for r in rs]
+    print(f"Overall recall@{k} vs full rerank : {statistics.mean(all_recalls):.3f}")
+    print(f"Avg retrieval latency (full)     : {statistics.mean(lat_full) * 1000:.1f} ms")
+    print(f"Avg retrieval latency (adaptive) : {statistics.mean(lat_adapt) * 1000:.1f} ms")
+
+
 async def main():
-    assert DEV_SET.exists(), (
+    parser = argparse.ArgumentParser(description="Evaluate the RAG pipeline on a dev set.")
+    parser.add_argument("--dataset", type=pathlib.Path, default=DEV_SET)
+    parser.add_argument("--adaptive-report", action="store_true",
+                        help="retrieval only: compare adaptive rerank against the full rerank")
+    parser.add_argument("-k", type=int, default=4, help="top-k used by --adaptive-report")
+    args = parser.parse_args()
+
+    assert args.dataset.exists(), (
         "Create a tiny dev-set first → data/eval/dev_set.jsonl (see README)."
     )
+    rows = [json.loads(line) for line in args.dataset.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    if args.adaptive_report:
+        adaptive_report(rows, k=args.k)
+        return
 
     latencies: list[float] = []
     hits: list[bool] = []
 
-    for line in DEV_SET.read_text(encoding="utf-8").splitlines():
-        row = json.loads(line)
+    for row in rows:
         lat, hit, answer, ctx = await _one_pass(row["question"], row["keywords"])
         latencies.append(lat)
         hits.append(hit)
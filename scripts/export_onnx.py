@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""scripts/export_onnx.py
+Export the embedder and cross-encoder to ONNX (+ optional int8) and check parity.
+
+Writes ``artifacts/onnx/embedder`` and ``artifacts/onnx/reranker``, each with
+``model.onnx``, ``model.int8.onnx`` (unless ``--no-quantize``), tokenizer
+files and ``onnx_config.json``.  Then it compares the ONNX path against the
+PyTorch models on corpus paragraphs:
+
+• embeddings  → minimum cosine similarity must be ≥ ``--min-cosine``
+• reranking   → top-k overlap per query must be ≥ ``--min-topk``
+
+and exits non-zero if either variant falls outside tolerance.  Serve the
+exports with ``RETRIEVAL_BACKEND=onnx`` (``ONNX_QUANTIZED=1`` for int8).
+
+Needs ``onnx`` and ``onnxruntime`` (see requirements-dev.txt / cpu.txt).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import sys
+import time
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+# ensure project root is on sys.path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import onnx_backend as ob
+
+
+class _Positional(torch.nn.Module):
+    """Expose a HF model's keyword inputs positionally for torch.onnx.export."""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *args):
+        return self.model(**dict(zip(self.input_names, args)))[0]
+
+
+def _export(model, tokenizer, sample, out_dir: pathlib.Path, output_name: str, quantize: bool):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    enc = tokenizer(*sample, padding=True, truncation=True, return_tensors="pt")
+    names = list(enc.keys())
+    dynamic = {n: {0: "batch", 1: "tokens"} for n in names}
+    dynamic[output_name] = {0: "batch"} if output_name == "logits" else {0: "batch", 1: "tokens"}
+
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            _Positional(model, names),
+            tuple(enc[n] for n in names),
+            str(out_dir / ob.FP32_NAME),
+            input_names=names,
+            output_names=[output_name],
+            dynamic_axes=dynamic,
+            opset_version=17,
+        )
+    tokenizer.save_pretrained(str(out_dir))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(out_dir / ob.FP32_NAME), str(out_dir / ob.INT8_NAME), weight_type=QuantType.QInt8)
+    print(f"📦  Exported → {out_dir}")
+
+
+def export_embedder(name: str, out_dir: pathlib.Path, quantize: bool) -> SentenceTransformer:
+    st = SentenceTransformer(name)
+    pooling = st[1].get_pooling_mode_str() if len(st) > 1 else "mean"
+    if pooling not in ("mean", "cls"):
+        raise SystemExit(f"Unsupported pooling mode {pooling!r} for ONNX export")
+    _export(st[0].auto_model, st.tokenizer, (["query: sample text"],), out_dir, "last_hidden_state", quantize)
+    (out_dir / ob.CONFIG_NAME).write_text(json.dumps({
+        "source": name,
+        "pooling": pooling,
+        "max_length": st.max_seq_length,
+        "dim": st.get_sentence_embedding_dimension(),
+    }, indent=2))
+    return st
+
+
+def export_reranker(name: str, out_dir: pathlib.Path, quantize: bool) -> CrossEncoder:
+    ce = CrossEncoder(name)
+    activation = "sigmoid" if isinstance(ce.default_activation_function, torch.nn.Sigmoid) else "identity"
+    _export(ce.model, ce.tokenizer, (["question"], ["passage"]), out_dir, "logits", quantize)
+    (out_dir / ob.CONFIG_NAME).write_text(json.dumps({
+        "source": name,
+        "activation": activation,
+        "max_length": ce.max_length or ce.tokenizer.model_max_length,
+    }, indent=2))
+    return ce
+
+
+def _check(label: str, value: float, threshold: float) -> bool:
+    ok = value >= threshold
+    print(f"  {'✅' if ok else '❌'} {label:<34} {value:.4f}  (≥ {threshold})")
+    return ok
+
+
+def parity(st, ce, out_root: pathlib.Path, texts, queries, args) -> bool:
+    ok = True
+    ref_vecs = st.encode(texts, normalize_embeddings=True, batch_size=32)
+    for quantized in (False, True) if args.quantize else (False,):
+        tag = "int8" if quantized else "fp32"
+        emb = ob.OnnxEmbedder(out_root / "embedder", quantized=quantized)
+        rer = ob.OnnxCrossEncoder(out_root / "reranker", quantized=quantized)
+
+        t0 = time.perf_counter()
+        vecs = emb.encode(texts, normalize_embeddings=True, batch_size=32)
+        onnx_s = time.perf_counter() - t0
+        ok &= _check(f"[{tag}] embedding min cosine", ob.embedding_parity(ref_vecs, vecs), args.min_cosine)
+
+        overlaps = []
+        for q in queries:
+            pairs = [[q, p] for p in texts[: args.candidates]]
+            overlaps.append(ob.ranking_agreement(ce.predict(pairs), rer.predict(pairs), args.k))
+        ok &= _check(f"[{tag}] rerank top-{args.k} overlap (min)", min(overlaps), args.min_topk)
+        print(f"     {tag} embed time for {len(texts)} texts: {onnx_s:.2f}s")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embed-model", default="intfloat/e5-base-v2")
+    parser.add_argument("--rerank-model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--output_dir", default="artifacts/onnx")
+    parser.add_argument("--no-quantize", dest="quantize", action="store_false", help="skip the int8 variant")
+    parser.add_argument("--corpus", default="data/raw/stripe_faqs_full.jsonl")
+    parser.add_argument("--dataset", default="data/eval/dev_set.jsonl", help="questions used for rerank parity")
+    parser.add_argument("--samples", type=int, default=256, help="corpus paragraphs used for parity")
+    parser.add_argument("--candidates", type=int, default=20, help="passages reranked per question")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--min-topk", type=float, default=0.75)
+    args = parser.parse_args()
+
+    out_root = pathlib.Path(args.output_dir)
+    st = export_embedder(args.embed_model, out_root / "embedder", args.quantize)
+    ce = export_reranker(args.rerank_model, out_root / "reranker", args.quantize)
+
+    with open(args.corpus, encoding="utf-8") as f:
+        texts = [json.loads(line)["text"] for _, line in zip(range(args.samples), f)]
+    queries = [json.loads(line)["question"] for line in open(args.dataset, encoding="utf-8") if line.strip()]
+
+    print("\n── Parity vs. PyTorch ─────────")
+    if not parity(st, ce, out_root, texts, queries, args):
+        raise SystemExit("ONNX export is outside tolerance – do not enable RETRIEVAL_BACKEND=onnx")
+    print("🎉  ONNX exports within tolerance.")
+
+
+if __name__ == "__main__":
+    main()
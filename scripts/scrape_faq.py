@@ -1,95 +1,101 @@
 #!/usr/bin/env python
 """
-Stripe Support full-site scraper (Sync Playwright + tqdm).
+Stripe Support full-site scraper (asyncio + httpx, optional Playwright).
 
 Usage (inside your venv):
-    pip install playwright==1.44.0 beautifulsoup4 tqdm
-    playwright install chromium        # once
-    python -m playwright install-deps  # once (installs libnss3, fonts…)
-
-    python scripts/stripe_scrape_sync.py
+    pip install httpx beautifulsoup4 tqdm
+    python scripts/scrape_faq.py                      # plain HTTP, 8 workers
+    python scripts/scrape_faq.py --concurrency 16 --rate 6
+
+    # pages that need JavaScript (optional):
+    pip install playwright==1.44.0 && playwright install chromium
+    python scripts/scrape_faq.py --browser 4
+
+Paragraphs are appended to the output as pages finish.  An interrupted crawl
+(Ctrl-C, crash) resumes from the frontier stored in data/raw/crawl_state.sqlite
+on the next run; once a crawl completes, the next run starts over but
+unchanged pages answer 304 (or hash the same) and are not parsed again.
 Outputs:
     data/raw/stripe_faqs_full.jsonl
 """
 
-import collections, json, pathlib, re, time
-from bs4 import BeautifulSoup
+import argparse, asyncio, pathlib, sys, time
 from tqdm import tqdm
-from playwright.sync_api import sync_playwright
+
+# ensure project root is on sys.path
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import crawl  # concurrent, conditional crawler
 
 # ───── config ────────────────────────────────────────────────────────────
-ROOT        = "https://support.stripe.com"
-SEED        = ROOT + "/topics"
-HEADERS     = {"User-Agent": "Mozilla/5.0"}
-DELAY_SEC   = 0.35
-MIN_WORDS   = 20
-OUT_FILE    = pathlib.Path("data/raw/stripe_faqs_full.jsonl")
-OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+OUT_FILE   = pathlib.Path("data/raw/stripe_faqs_full.jsonl")
+STATE_FILE = pathlib.Path("data/raw/crawl_state.sqlite")
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seed", default=crawl.SEED)
+    ap.add_argument("--output", type=pathlib.Path, default=OUT_FILE)
+    ap.add_argument("--state", type=pathlib.Path, default=STATE_FILE,
+                    help="SQLite file with ETag / Last-Modified / content hashes from earlier crawls")
+    ap.add_argument("--concurrency", type=int, default=8, help="pages in flight at once")
+    ap.add_argument("--rate", type=float, default=4.0, help="requests per second per host (0 = unlimited)")
+    ap.add_argument("--browser", type=int, default=0, metavar="N",
+                    help="render changed pages with N Playwright contexts (default: plain HTTP)")
+    ap.add_argument("--min-words", type=int, default=crawl.MIN_WORDS)
+    ap.add_argument("--restart", action="store_true", help="ignore an unfinished frontier and crawl from --seed")
+    return ap.parse_args()
 
-TOPIC_RX = re.compile(r"^/topics/[a-z0-9\-]+$")
-ART_RX   = re.compile(r"^/questions/[a-z0-9\-]+$")
 
 # ───── main scraper ──────────────────────────────────────────────────────
-def scrape():
-    queue        = collections.deque([SEED])
-    seen_pages   = set()
-    paragraphs   = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--no-sandbox", "--disable-dev-shm-usage"]
-        )
-        page = browser.new_page(extra_http_headers=HEADERS)
-
-        bar  = tqdm(total=0, unit="page", desc="Crawled", colour="green")
-
-        while queue:
-            url = queue.popleft()
-            if url in seen_pages:
-                continue
-            seen_pages.add(url)
-
-            page.goto(url, timeout=90_000)
-            soup = BeautifulSoup(page.content(), "html.parser")
-
-            # -------- harvest article text ------------------------------
-            if ART_RX.search(url.replace(ROOT, "")):
-                # title = soup.select_one("h1").get_text(strip=True)
-                h1 = soup.select_one("h1") or soup.select_one("h2")
-                title = h1.get_text(strip=True) if h1 else "Untitled"
-                for p_tag in soup.find_all("p"):
-                    txt = p_tag.get_text(" ", strip=True)
-                    if len(txt.split()) >= MIN_WORDS:
-                        paragraphs.append({"url": url, "title": title, "text": txt})
-
-            # -------- enqueue new links ---------------------------------
-            for a in soup.find_all("a", href=True):
-                href = a["href"].split("#")[0]
-                if TOPIC_RX.match(href) or ART_RX.match(href):
-                    full = href if href.startswith("http") else ROOT + href
-                    if full not in seen_pages:
-                        queue.append(full)
-
-            # -------- progress update -----------------------------------
-            bar.update(1)
-            bar.set_postfix(pages=len(seen_pages), paras=len(paragraphs))
-
-            time.sleep(DELAY_SEC)
-
-        browser.close()
-        bar.close()
-
-    OUT_FILE.write_text(
-        "\n".join(json.dumps(d, ensure_ascii=False) for d in paragraphs),
-        encoding="utf-8"
-    )
-    print(f"\n✅  Finished. Pages: {len(seen_pages)}, "
-          f"paragraphs: {len(paragraphs)} → {OUT_FILE}")
+async def scrape(args):
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.state.parent.mkdir(parents=True, exist_ok=True)
+    state = crawl.CrawlState(str(args.state))
+    sink = crawl.JsonlSink(str(args.output))
+
+    async def _run(renderer=None):
+        crawler = crawl.Crawler(args.seed, state, sink, concurrency=args.concurrency, rate=args.rate,
+                                min_words=args.min_words, renderer=renderer, restart=args.restart)
+        bar = tqdm(unit="page", desc="Crawled", colour="green")
+        stop = asyncio.Event()
+
+        async def _progress():
+            while not stop.is_set():
+                bar.n = crawler.stats["pages"]
+                bar.set_postfix(paras=crawler.stats["paragraphs"], parsed=crawler.stats["parsed"])
+                await asyncio.sleep(0.5)
+
+        ticker = asyncio.create_task(_progress())
+        try:
+            return crawler, await crawler.run()
+        finally:
+            stop.set()
+            await ticker
+            bar.n = crawler.stats["pages"]
+            bar.close()
+
+    t0 = time.perf_counter()
+    try:
+        if args.browser:
+            async with crawl.BrowserPool(args.browser) as pool:
+                crawler, stats = await _run(pool)
+        else:
+            crawler, stats = await _run()
+    finally:
+        sink.close()
+        state.close()
+
+    resumed = " (resumed)" if crawler.resumed else ""
+    print(f"\n✅  Finished{resumed} in {time.perf_counter() - t0:.1f}s. Pages: {stats['pages']} "
+          f"(parsed {stats['parsed']}, 304 {stats['not_modified']}, unchanged {stats['unchanged']}, "
+          f"errors {stats['errors']}), paragraphs: {stats['paragraphs']} → {args.output}")
 
 # ───── entry-point ───────────────────────────────────────────────────────
 if __name__ == "__main__":
     try:
-        scrape()
+        asyncio.run(scrape(parse_args()))
     except KeyboardInterrupt:
-        print("\n⏹️  Interrupted — partial data (if any) kept.")
+        print("\n⏹️  Interrupted — output and frontier kept; re-run to resume.")
@@ -27,6 +27,13 @@ for msg in st.session_state.messages:
             with st.expander("Show Sources"):
                 st.markdown(msg["sources"])
 
+def format_source(s: dict) -> str:
+    """One markdown bullet per source, linked to its article when the index has metadata."""
+    line = f"{textwrap.shorten(s['text'], 120)} (score: {s['score']:.2f})"
+    if s.get("url"):
+        line = f"[{s.get('title') or s['url']}]({s['url']}) – {line}"
+    return f"* {line}"
+
 # --- user input form ---
 if prompt := st.chat_input("Ask a question about Stripe payments…"):
     # Add user message to state
@@ -51,9 +58,7 @@ if prompt := st.chat_input("Ask a question about Stripe payments…"):
                         formatted_raw = src
                         try:
                             src_json = json.loads(src)
-                            formatted_raw = "\n".join(
-                                f"* {textwrap.shorten(s['text'], 120)} (score: {s['score']:.2f})" for s in src_json
-                            )
+                            formatted_raw = "\n".join(format_source(s) for s in src_json)
                         except Exception:
                             pass
 